@@ -0,0 +1,180 @@
+"""
+Admin API routes for diagnosing the running service.
+
+All routes require the X-Admin-Token header to match the configured admin
+token and are disabled while no token is configured.
+"""
+
+import asyncio
+import hmac
+import logging
+import time
+from typing import Dict, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+
+from docling_wrapper.api.models import ErrorResponse
+from docling_wrapper.config import ADMIN_TOKEN, SAMPLING_PROFILER_MAX_SECONDS
+from docling_wrapper.utils.profiling import (
+    ProfilerBusy,
+    format_folded,
+    profile_store,
+    sample_stacks,
+)
+
+logger = logging.getLogger(__name__)
+
+ADMIN_TOKEN_HEADER = "X-Admin-Token"
+
+
+class AdminTokenRequired(Exception):
+    """
+    Raised when a request asks for an admin-only feature without the admin token.
+    """
+
+
+def is_admin_request(request: Request) -> bool:
+    """
+    Check whether a request carries the admin token.
+
+    Args:
+        request: The incoming request
+
+    Returns:
+        True if an admin token is configured and the request sent it
+    """
+    token = request.headers.get(ADMIN_TOKEN_HEADER)
+    if not ADMIN_TOKEN or token is None:
+        return False
+    return hmac.compare_digest(token.encode("utf-8"), ADMIN_TOKEN.encode("utf-8"))
+
+
+async def require_admin(request: Request) -> None:
+    """
+    Reject requests without the admin token.
+
+    Raises:
+        HTTPException: 403 if the token is missing, wrong or not configured
+    """
+    if not is_admin_request(request):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
+router = APIRouter(
+    prefix="/admin", tags=["Admin"], dependencies=[Depends(require_admin)]
+)
+
+
+@router.get("/profiles")
+async def list_profiles() -> List[Dict]:
+    """
+    List the stored conversion profiles, newest first.
+    """
+    return [
+        {
+            "profile_id": profile.profile_id,
+            "label": profile.label,
+            "created_at": profile.created_at,
+            "duration_ms": profile.duration_ms,
+            "process_wide": profile.process_wide,
+        }
+        for profile in profile_store.list()
+    ]
+
+
+@router.get(
+    "/profiles/{profile_id}",
+    responses={
+        200: {
+            "description": "pstats text report, or the raw pstats file with format=pstats",
+            "content": {"text/plain": {}, "application/octet-stream": {}},
+        },
+        404: {"model": ErrorResponse},
+    },
+)
+async def get_profile(
+    profile_id: str,
+    format: str = Query("text", pattern="^(text|pstats)$", description="Report format"),
+    sort: str = Query(
+        "cumulative",
+        pattern="^(cumulative|tottime|calls|ncalls)$",
+        description="Sort key",
+    ),
+    limit: int = Query(50, ge=1, le=1000, description="Number of functions to list"),
+) -> Response:
+    """
+    Get a stored conversion profile.
+
+    The text format is a pstats report. The pstats format can be loaded
+    with pstats.Stats or viewers such as snakeviz. On Python 3.12 and later
+    a profile covers every thread of the worker, including other requests
+    converted at the same time; such profiles are marked process-wide.
+    """
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        return JSONResponse(
+            status_code=404,
+            content=ErrorResponse(
+                success=False,
+                error="Profile not found",
+                details={"profile_id": profile_id},
+            ).dict(),
+        )
+    if format == "pstats":
+        return Response(
+            content=profile.dump(),
+            media_type="application/octet-stream",
+            headers={
+                "Content-Disposition": f'attachment; filename="{profile_id}.pstats"'
+            },
+        )
+    return PlainTextResponse(profile.report(sort=sort, limit=limit))
+
+
+@router.post(
+    "/profiler/sample",
+    responses={
+        200: {
+            "description": "Folded stacks, one 'frame;frame;... count' line per stack",
+            "content": {"text/plain": {}},
+        },
+        409: {"model": ErrorResponse},
+    },
+)
+async def sample_profile(
+    seconds: float = Query(
+        5.0, gt=0, le=SAMPLING_PROFILER_MAX_SECONDS, description="How long to sample"
+    ),
+    interval_ms: int = Query(10, ge=1, le=1000, description="Time between samples"),
+    thread: Optional[str] = Query(
+        None,
+        description="Only keep stacks of threads whose name starts with this prefix",
+    ),
+) -> Response:
+    """
+    Run a sampling profiler on this worker and return the folded stacks.
+
+    The stacks of all threads are sampled for the given time. The output can
+    be rendered with flamegraph.pl, speedscope or inferno. Conversion
+    threads are named "conversion_N" and the event loop runs in "MainThread".
+    """
+    logger.info(f"Sampling stacks for {seconds:g}s every {interval_ms}ms")
+    start = time.monotonic()
+    try:
+        stacks = await asyncio.to_thread(sample_stacks, seconds, interval_ms / 1000)
+    except ProfilerBusy as e:
+        return JSONResponse(
+            status_code=409,
+            content=ErrorResponse(
+                success=False, error="Profiler busy", details={"message": str(e)}
+            ).dict(),
+        )
+    if thread:
+        stacks = {
+            stack: count for stack, count in stacks.items() if stack.startswith(thread)
+        }
+    logger.info(
+        f"Sampled {sum(stacks.values())} stacks in {int((time.monotonic() - start) * 1000)}ms"
+    )
+    return PlainTextResponse(format_folded(stacks))
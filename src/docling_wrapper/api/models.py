@@ -1,10 +1,11 @@
 """
 API models for request and response validation.
 """
+
 from enum import Enum
 from typing import Dict, List, Optional, Union
 
-from pydantic import BaseModel, Field, HttpUrl
+from pydantic import BaseModel, Field, HttpUrl, model_validator
 
 
 class SourceType(str, Enum):
@@ -17,6 +18,52 @@ class SourceType(str, Enum):
     HTML_SOURCE = "html_source"
 
 
+class ContentFilter(str, Enum):
+    """
+    Enum for the content filtering applied before conversion.
+    """
+
+    NONE = "none"
+    CLEAN = "clean"
+    MAIN_CONTENT = "main_content"
+
+
+class ConversionMode(str, Enum):
+    """
+    Enum for the trade-off between conversion speed and fidelity.
+    """
+
+    FAST = "fast"
+    BALANCED = "balanced"
+    ACCURATE = "accurate"
+
+
+class ChunkUnit(str, Enum):
+    """
+    Enum for the unit in which chunk sizes are measured.
+    """
+
+    CHARACTERS = "characters"
+    TOKENS = "tokens"
+
+
+class ChunkingOptions(BaseModel):
+    """
+    Options for splitting the converted markdown into chunks.
+    """
+
+    max_size: int = Field(default=1000, gt=0, description="Maximum size of a chunk")
+    unit: ChunkUnit = Field(
+        default=ChunkUnit.CHARACTERS,
+        description="Unit of max_size and overlap; tokens are approximated as 4 characters",
+    )
+    overlap: int = Field(
+        default=100,
+        ge=0,
+        description="Size of the text repeated between consecutive chunks of a section",
+    )
+
+
 class ConversionOptions(BaseModel):
     """
     Options for the conversion process.
@@ -26,13 +73,99 @@ class ConversionOptions(BaseModel):
         default=True, description="Whether to include metadata in the response"
     )
     preserve_images: bool = Field(
-        default=False, description="Whether to preserve images in the markdown output"
+        default=False,
+        description=(
+            "Download the document's images into the image store and point the "
+            "markdown image links at the stored copies"
+        ),
     )
     headers: Optional[Dict[str, str]] = Field(
         default=None, description="Headers to use when fetching the URL"
     )
     verify_ssl: bool = Field(
-        default=False, description="Whether to verify SSL certificates when fetching URLs"
+        default=False,
+        description="Whether to verify SSL certificates when fetching URLs",
+    )
+    max_fetch_attempts: Optional[int] = Field(
+        default=None,
+        ge=1,
+        le=10,
+        description=(
+            "Attempt budget for fetching the URL, shared by retries and hedged "
+            "requests (server default if unset)"
+        ),
+    )
+    hedge_fetch: Optional[bool] = Field(
+        default=None,
+        description=(
+            "Whether to send a second request when the first is slower than usual "
+            "for the host (server default if unset)"
+        ),
+    )
+    content_filter: ContentFilter = Field(
+        default=ContentFilter.NONE,
+        description=(
+            "Markup removed before conversion: 'clean' drops scripts, styles, "
+            "noscript, SVG and comments; 'main_content' additionally keeps only "
+            "the main article region"
+        ),
+    )
+    chunking: Optional[ChunkingOptions] = Field(
+        default=None,
+        description="Return the markdown pre-split into heading-aware chunks",
+    )
+    diff_sections: bool = Field(
+        default=False,
+        description=(
+            "Report which sections were added, changed or removed since the URL "
+            "was last converted with the same headers, by any client; html_url only"
+        ),
+    )
+    changed_sections_only: bool = Field(
+        default=False,
+        description=(
+            "Return only added and changed sections in the markdown and chunks; "
+            "implies diff_sections. Byte offsets still refer to the full document"
+        ),
+    )
+    mode: Optional[ConversionMode] = Field(
+        default=None,
+        description=(
+            "Conversion engine selection: fast uses the lightweight converter, accurate "
+            "the full Docling pipeline, balanced Docling for documents up to a size limit "
+            "when it is installed (server default, fast unless configured, if unset)"
+        ),
+    )
+    skip_near_duplicates: bool = Field(
+        default=False,
+        description=(
+            "Skip converting documents that are near-duplicates of a recently converted "
+            "one, if the server enables near-duplicate detection; the response is then "
+            "marked skipped, with empty markdown and duplicate_of set"
+        ),
+    )
+    use_cache: bool = Field(
+        default=True,
+        description=(
+            "Serve html_url conversions from the result cache, if the server enables "
+            "it, when a fresh result exists; false always fetches and converts the "
+            "page again and leaves the cache untouched"
+        ),
+    )
+    profile: bool = Field(
+        default=False,
+        description=(
+            "Capture a cProfile of the conversion and store it for retrieval from "
+            "the admin API; requires the X-Admin-Token header"
+        ),
+    )
+    timeout_ms: Optional[int] = Field(
+        default=None,
+        gt=0,
+        description=(
+            "Deadline for the whole request in milliseconds, covering fetching "
+            "and conversion (X-Request-Timeout-Ms header or server default if unset)"
+        ),
     )
 
 
@@ -47,6 +180,22 @@ class ConversionRequest(BaseModel):
         default=None, description="Options for the conversion process"
     )
 
+    @model_validator(mode="after")
+    def check_section_diff_source(self) -> "ConversionRequest":
+        """
+        Only allow section diffs for URLs, which have a previous conversion to compare.
+        """
+        options = self.options
+        if (
+            options
+            and (options.diff_sections or options.changed_sections_only)
+            and self.type != SourceType.HTML_URL
+        ):
+            raise ValueError(
+                "Section diffs are only available for html_url conversions"
+            )
+        return self
+
     class Config:
         json_schema_extra = {
             "example": {
@@ -57,11 +206,36 @@ class ConversionRequest(BaseModel):
                     "preserve_images": False,
                     "headers": {"Authorization": "Bearer token"},
                     "verify_ssl": False,
+                    "content_filter": "none",
                 },
             }
         }
 
 
+class HeadingInfo(BaseModel):
+    """
+    A heading in the document outline.
+    """
+
+    level: int = Field(description="Heading level, 1 for <h1> through 6 for <h6>")
+    text: str = Field(description="Heading text")
+
+
+class ImageInfo(BaseModel):
+    """
+    An image downloaded into the image store.
+    """
+
+    source_url: Optional[str] = Field(
+        default=None,
+        description="URL the image was fetched from, None for inline data URIs",
+    )
+    reference: str = Field(..., description="Stable reference to the stored image")
+    digest: str = Field(..., description="SHA-256 of the image content")
+    content_type: str = Field(..., description="MIME type of the image")
+    size_bytes: int = Field(..., description="Size of the image in bytes")
+
+
 class ConversionMetadata(BaseModel):
     """
     Metadata about the conversion process.
@@ -69,10 +243,127 @@ class ConversionMetadata(BaseModel):
 
     title: Optional[str] = Field(default=None, description="Document title")
     source_type: SourceType = Field(description="Type of source that was converted")
-    processing_time_ms: int = Field(description="Time taken to process the document in ms")
+    processing_time_ms: int = Field(
+        description="Time taken to process the document in ms"
+    )
     file_size_bytes: Optional[int] = Field(
         default=None, description="Size of the source file in bytes"
     )
+    language: Optional[str] = Field(
+        default=None, description="Document language as declared in the HTML"
+    )
+    description: Optional[str] = Field(
+        default=None, description="Meta description of the document"
+    )
+    canonical_url: Optional[str] = Field(
+        default=None, description="Canonical URL declared by the document"
+    )
+    headings: Optional[List[HeadingInfo]] = Field(
+        default=None, description="Heading outline of the document"
+    )
+    link_count: Optional[int] = Field(
+        default=None, description="Number of hyperlinks in the document"
+    )
+    image_count: Optional[int] = Field(
+        default=None, description="Number of images in the document"
+    )
+    word_count: Optional[int] = Field(
+        default=None, description="Number of words of readable text in the document"
+    )
+    bytes_removed: Optional[int] = Field(
+        default=None, description="Bytes of markup removed by the content filter"
+    )
+    images: Optional[List[ImageInfo]] = Field(
+        default=None,
+        description="Images stored for the document when preserve_images is set",
+    )
+    images_failed: Optional[int] = Field(
+        default=None,
+        description="Number of images that could not be downloaded or stored",
+    )
+    profile_id: Optional[str] = Field(
+        default=None,
+        description="Id of the stored conversion profile, if profiling was requested",
+    )
+    backend: Optional[str] = Field(
+        default=None, description="Name of the engine that converted the document"
+    )
+    cached: Optional[bool] = Field(
+        default=None, description="Whether the result was served from the result cache"
+    )
+    fingerprint: Optional[str] = Field(
+        default=None,
+        description="SimHash fingerprint of the document text as 16 hex digits",
+    )
+    near_duplicate_of: Optional[str] = Field(
+        default=None,
+        description=(
+            "Fingerprint of a recently converted document this one is a "
+            "near-duplicate of"
+        ),
+    )
+    similarity: Optional[float] = Field(
+        default=None,
+        description=(
+            "Similarity to the near-duplicate from 0 to 1, the share of equal fingerprint bits"
+        ),
+    )
+    skipped: bool = Field(
+        default=False,
+        description="Whether conversion was skipped because of skip_near_duplicates",
+    )
+
+
+class MarkdownChunk(BaseModel):
+    """
+    A chunk of the converted markdown.
+    """
+
+    index: int = Field(description="Position of the chunk in the document")
+    text: str = Field(description="Markdown content of the chunk")
+    heading_path: List[str] = Field(
+        description="Headings enclosing the chunk, from the outermost to the innermost"
+    )
+    start_byte: int = Field(
+        description="UTF-8 byte offset of the chunk start in the markdown"
+    )
+    end_byte: int = Field(
+        description="UTF-8 byte offset of the chunk end in the markdown"
+    )
+    token_estimate: int = Field(description="Approximate number of tokens in the chunk")
+
+
+class SectionChange(BaseModel):
+    """
+    A section of the markdown that differs from the previous conversion.
+    """
+
+    heading_path: List[str] = Field(
+        description="Headings of the section, from the outermost to the innermost"
+    )
+    hash: str = Field(description="Content hash of the section")
+    start_byte: Optional[int] = Field(
+        default=None,
+        description="UTF-8 byte offset of the section start, unset if removed",
+    )
+    end_byte: Optional[int] = Field(
+        default=None,
+        description="UTF-8 byte offset of the section end, unset if removed",
+    )
+
+
+class SectionDiff(BaseModel):
+    """
+    Section-level differences between a conversion and the previous conversion of the same URL.
+    """
+
+    previous_version: bool = Field(
+        description="Whether a previous conversion was known; if not, every section is added"
+    )
+    added: List[SectionChange] = Field(description="Sections that are new")
+    changed: List[SectionChange] = Field(description="Sections whose content changed")
+    removed: List[SectionChange] = Field(description="Sections that no longer exist")
+    unchanged_count: int = Field(description="Number of unchanged sections")
 
 
 class ConversionResponse(BaseModel):
@@ -81,11 +372,32 @@ class ConversionResponse(BaseModel):
     """
 
     success: bool = Field(description="Whether the conversion was successful")
-    markdown: Optional[str] = Field(default=None, description="The converted markdown content")
+    markdown: Optional[str] = Field(
+        default=None, description="The converted markdown content"
+    )
     metadata: Optional[ConversionMetadata] = Field(
         default=None, description="Metadata about the conversion"
     )
-    error: Optional[str] = Field(default=None, description="Error message if conversion failed")
+    chunks: Optional[List[MarkdownChunk]] = Field(
+        default=None, description="The markdown split into chunks, if requested"
+    )
+    section_diff: Optional[SectionDiff] = Field(
+        default=None, description="Section-level differences to the previous conversion"
+    )
+    skipped: bool = Field(
+        default=False,
+        description=(
+            "Whether the document was not converted because it is a near-duplicate "
+            "and skip_near_duplicates is set; the markdown is then empty"
+        ),
+    )
+    duplicate_of: Optional[str] = Field(
+        default=None,
+        description="Fingerprint of the document a skipped document duplicates",
+    )
+    error: Optional[str] = Field(
+        default=None, description="Error message if conversion failed"
+    )
 
     class Config:
         json_schema_extra = {
@@ -97,11 +409,141 @@ class ConversionResponse(BaseModel):
                     "source_type": "html_url",
                     "processing_time_ms": 1500,
                     "file_size_bytes": 12345,
+                    "language": "en",
+                    "headings": [{"level": 1, "text": "Document Title"}],
+                    "link_count": 12,
+                    "image_count": 2,
+                    "word_count": 840,
                 },
             }
         }
 
 
+class CrawlSeedType(str, Enum):
+    """
+    Enum for the type of seed a crawl starts from.
+    """
+
+    PAGE = "page"
+    SITEMAP = "sitemap"
+
+
+class CrawlScope(str, Enum):
+    """
+    Enum for which discovered links a crawl follows.
+    """
+
+    SAME_HOST = "same_host"
+    SAME_DOMAIN = "same_domain"
+    SAME_PREFIX = "same_prefix"
+
+
+class CrawlRequest(BaseModel):
+    """
+    Request model for the crawl endpoint.
+    """
+
+    seed: str = Field(description="URL of the seed page or sitemap.xml")
+    seed_type: CrawlSeedType = Field(
+        default=CrawlSeedType.PAGE,
+        description="Whether the seed is a page or a sitemap",
+    )
+    scope: CrawlScope = Field(
+        default=CrawlScope.SAME_HOST,
+        description=(
+            "Links followed: same host, same domain including subdomains, or URLs "
+            "under the seed's path"
+        ),
+    )
+    max_depth: int = Field(
+        default=1,
+        ge=0,
+        description="Link depth followed from the seed pages, 0 for seeds only",
+    )
+    max_pages: int = Field(
+        default=100, gt=0, description="Maximum number of pages converted"
+    )
+    include_patterns: Optional[List[str]] = Field(
+        default=None,
+        description="Regular expressions of which an in-scope URL must match one",
+    )
+    exclude_patterns: Optional[List[str]] = Field(
+        default=None, description="Regular expressions of URLs never crawled"
+    )
+    concurrency: int = Field(
+        default=4,
+        gt=0,
+        le=32,
+        description="Number of pages fetched and converted concurrently",
+    )
+    per_host_delay_ms: int = Field(
+        default=500, ge=0, description="Minimum delay between requests to the same host"
+    )
+    options: Optional[ConversionOptions] = Field(
+        default=None, description="Options for converting each page"
+    )
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "seed": "https://example.com/sitemap.xml",
+                "seed_type": "sitemap",
+                "scope": "same_host",
+                "max_depth": 0,
+                "max_pages": 500,
+                "exclude_patterns": ["/tag/"],
+                "concurrency": 8,
+                "per_host_delay_ms": 250,
+                "options": {"include_metadata": True, "content_filter": "main_content"},
+            }
+        }
+
+
+class CrawlPageResult(BaseModel):
+    """
+    Result of converting one page during a crawl.
+    """
+
+    url: str = Field(description="Normalised URL of the page")
+    depth: int = Field(description="Link depth of the page from the seed pages")
+    parent_url: Optional[str] = Field(
+        default=None, description="Page the URL was discovered on, unset for seed pages"
+    )
+    success: bool = Field(description="Whether the page was fetched and converted")
+    markdown: Optional[str] = Field(
+        default=None, description="The converted markdown content"
+    )
+    metadata: Optional[ConversionMetadata] = Field(
+        default=None, description="Metadata about the conversion"
+    )
+    chunks: Optional[List[MarkdownChunk]] = Field(
+        default=None, description="The markdown split into chunks, if requested"
+    )
+    skipped: bool = Field(
+        default=False,
+        description="Whether the page was not converted as a near-duplicate",
+    )
+    duplicate_of: Optional[str] = Field(
+        default=None,
+        description="Fingerprint of the document a skipped page duplicates",
+    )
+    error: Optional[str] = Field(
+        default=None, description="Error message if the page failed"
+    )
+
+
+class CrawlSummary(BaseModel):
+    """
+    Summary sent when a crawl finishes.
+    """
+
+    pages_converted: int = Field(description="Number of pages converted")
+    pages_failed: int = Field(description="Number of pages that failed")
+    urls_discovered: int = Field(
+        description="Number of distinct in-scope URLs discovered"
+    )
+
+
 class ErrorResponse(BaseModel):
     """
     Error response model.
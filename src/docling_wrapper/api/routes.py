@@ -1,28 +1,65 @@
 """
 API routes for the Claude - Docling API Wrapper.
 """
+
+import asyncio
+import json
 import logging
+import os
 import time
-from typing import Union
+from typing import AsyncIterator, Awaitable, Dict, List, Optional, Tuple, TypeVar, Union
 
 from fastapi import APIRouter, Depends, HTTPException, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 
+from docling_wrapper.api.admin import (
+    ADMIN_TOKEN_HEADER,
+    AdminTokenRequired,
+    is_admin_request,
+)
 from docling_wrapper.api.models import (
+    ConversionMetadata,
+    ConversionOptions,
     ConversionRequest,
     ConversionResponse,
+    CrawlRequest,
+    CrawlSummary,
     ErrorResponse,
+    SectionDiff,
     SourceType,
 )
-from docling_wrapper.services.html_converter import (
-    convert_html_source_to_markdown,
-    convert_html_url_to_markdown,
+from docling_wrapper.config import REQUEST_TIMEOUT_SECONDS
+from docling_wrapper.services.backends import BackendUnavailable
+from docling_wrapper.services.chunker import (
+    MarkdownSection,
+    chunk_markdown,
+    iter_markdown_chunks,
+)
+from docling_wrapper.services.crawler import Crawler
+from docling_wrapper.services.html_converter import convert_html_source_to_markdown
+from docling_wrapper.services.images import IMAGE_NAME_PATTERN, image_store
+from docling_wrapper.services.result_cache import convert_html_url_cached
+from docling_wrapper.services.section_index import document_key, section_index
+from docling_wrapper.utils.deadline import (
+    ClientDisconnected,
+    Deadline,
+    DeadlineExceeded,
+    RequestCancelled,
 )
+from docling_wrapper.utils.metrics import metrics
+from docling_wrapper.utils.profiling import ProfilerBusy
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["Conversion"])
 
+T = TypeVar("T")
+
+# Header with which clients set a deadline when the options do not
+REQUEST_TIMEOUT_HEADER = "X-Request-Timeout-Ms"
+# How often a running conversion checks whether its client is still connected
+DISCONNECT_POLL_SECONDS = 0.5
+
 
 @router.post(
     "/convert",
@@ -30,8 +67,11 @@ router = APIRouter(tags=["Conversion"])
     responses={
         200: {"model": ConversionResponse},
         400: {"model": ErrorResponse},
+        403: {"model": ErrorResponse},
+        409: {"model": ErrorResponse},
         422: {"model": ErrorResponse},
         500: {"model": ErrorResponse},
+        504: {"model": ErrorResponse},
     },
 )
 async def convert_document(request: Request, conversion_request: ConversionRequest):
@@ -43,38 +83,46 @@ async def convert_document(request: Request, conversion_request: ConversionReque
     - HTML source content
 
     PDF support will be added in a future update.
+
+    The request is bounded by a deadline taken from the timeout_ms option, the
+    X-Request-Timeout-Ms header or the server default. Work stops once the
+    deadline passes (504) or the client disconnects.
     """
     start_time = time.time()
     logger.info(f"Received conversion request of type: {conversion_request.type}")
 
     try:
-        # Extract options
-        options = conversion_request.options or {}
-        headers = options.headers if options and hasattr(options, "headers") else None
-
-        # Process based on source type
-        if conversion_request.type == SourceType.HTML_URL:
-            # Get verify_ssl option
-            verify_ssl = options.verify_ssl if options and hasattr(options, "verify_ssl") else False
-            
-            markdown_content, metadata = await convert_html_url_to_markdown(
-                conversion_request.source, headers, verify_ssl=verify_ssl
-            )
-        elif conversion_request.type == SourceType.HTML_SOURCE:
-            markdown_content, metadata = await convert_html_source_to_markdown(
-                conversion_request.source
+        options = conversion_request.options
+        _check_profiling_allowed(request, options)
+        deadline = _request_deadline(request, options)
+        markdown_content, metadata = await _until_disconnected(
+            request, _run_conversion(conversion_request, deadline), deadline
+        )
+
+        # Compare sections with the previous conversion if requested
+        section_diff, changed_sections = _diff_sections(
+            conversion_request, markdown_content, metadata
+        )
+
+        # Split the markdown into chunks if requested
+        chunks = None
+        if options and options.chunking:
+            chunks = chunk_markdown(
+                markdown_content, options.chunking, changed_sections
             )
-        elif conversion_request.type == SourceType.PDF:
-            # PDF support not implemented yet
-            raise NotImplementedError("PDF conversion is not yet implemented")
-        else:
-            raise ValueError(f"Unsupported source type: {conversion_request.type}")
+
+        if changed_sections is not None:
+            markdown_content = _join_sections(markdown_content, changed_sections)
 
         # Create response
         response = ConversionResponse(
             success=True,
             markdown=markdown_content,
             metadata=metadata if options and options.include_metadata else None,
+            chunks=chunks,
+            section_diff=section_diff,
+            skipped=metadata.skipped,
+            duplicate_of=metadata.near_duplicate_of if metadata.skipped else None,
         )
 
         logger.info(
@@ -82,7 +130,385 @@ async def convert_document(request: Request, conversion_request: ConversionReque
         )
         return response
 
-    except ValueError as e:
+    except Exception as e:
+        return _conversion_error_response(e)
+
+
+@router.post(
+    "/convert/stream",
+    response_model=None,
+    responses={
+        200: {
+            "description": (
+                "Newline-delimited JSON events: metadata, one chunk per line, done"
+            ),
+            "content": {"application/x-ndjson": {}},
+        },
+        400: {"model": ErrorResponse},
+        403: {"model": ErrorResponse},
+        409: {"model": ErrorResponse},
+        422: {"model": ErrorResponse},
+        500: {"model": ErrorResponse},
+        504: {"model": ErrorResponse},
+    },
+)
+async def convert_document_stream(
+    request: Request, conversion_request: ConversionRequest
+) -> Union[StreamingResponse, ConversionResponse, JSONResponse]:
+    """
+    Convert a document to Markdown and return it as newline-delimited JSON chunks.
+
+    The document is converted completely before the first event is sent, so
+    the time to the first chunk is that of /convert. Chunks are then cut and
+    serialised one at a time as the response is written, instead of building
+    the whole response body in memory.
+
+    The events are the metadata if include_metadata is set, a section diff
+    if requested, one event per chunk and a final event with the chunk
+    count. Chunk sizes are taken from the chunking options, with defaults if
+    they are omitted.
+    """
+    logger.info(
+        f"Received streaming conversion request of type: {conversion_request.type}"
+    )
+
+    try:
+        _check_profiling_allowed(request, conversion_request.options)
+        deadline = _request_deadline(request, conversion_request.options)
+        markdown_content, metadata = await _until_disconnected(
+            request, _run_conversion(conversion_request, deadline), deadline
+        )
+        section_diff, changed_sections = _diff_sections(
+            conversion_request, markdown_content, metadata
+        )
+    except Exception as e:
+        return _conversion_error_response(e)
+
+    options = conversion_request.options
+    chunking = options.chunking if options else None
+    include_metadata = bool(options and options.include_metadata)
+
+    async def stream_events() -> AsyncIterator[str]:
+        if include_metadata:
+            yield _ndjson_event("metadata", metadata.model_dump(mode="json"))
+        if section_diff is not None:
+            yield _ndjson_event("section_diff", section_diff.model_dump(mode="json"))
+        chunk_count = 0
+        for chunk in iter_markdown_chunks(markdown_content, chunking, changed_sections):
+            chunk_count += 1
+            yield _ndjson_event("chunk", chunk.model_dump(mode="json"))
+        done: Dict[str, object] = {
+            "chunk_count": chunk_count,
+            "skipped": metadata.skipped,
+        }
+        if metadata.skipped:
+            done["duplicate_of"] = metadata.near_duplicate_of
+        yield _ndjson_event("done", done)
+
+    return StreamingResponse(stream_events(), media_type="application/x-ndjson")
+
+
+@router.post(
+    "/crawl",
+    tags=["Crawl"],
+    response_model=None,
+    responses={
+        200: {
+            "description": "Newline-delimited JSON events: one page per line, then done",
+            "content": {"application/x-ndjson": {}},
+        },
+        400: {"model": ErrorResponse},
+        422: {"model": ErrorResponse},
+        500: {"model": ErrorResponse},
+    },
+)
+async def crawl_site(
+    request: Request, crawl_request: CrawlRequest
+) -> Union[StreamingResponse, ConversionResponse, JSONResponse]:
+    """
+    Crawl a site from a seed page or sitemap and convert every in-scope page.
+
+    Links discovered on converted pages are followed up to the maximum depth
+    if they are in scope. Pages are fetched and converted concurrently and
+    streamed back as newline-delimited JSON "page" events in the order they
+    finish, followed by a "done" event with a summary.
+    """
+    logger.info(
+        f"Received crawl request for {crawl_request.seed_type.value}: {crawl_request.seed}"
+    )
+
+    try:
+        crawler = Crawler(crawl_request)
+        seed_urls = await crawler.seed_urls()
+    except Exception as e:
+        return _conversion_error_response(e)
+
+    async def stream_events() -> AsyncIterator[str]:
+        async for item in crawler.run(seed_urls):
+            event = "done" if isinstance(item, CrawlSummary) else "page"
+            yield _ndjson_event(event, item.model_dump(mode="json"))
+
+    return StreamingResponse(stream_events(), media_type="application/x-ndjson")
+
+
+@router.get(
+    "/images/{name}",
+    responses={
+        200: {"description": "The stored image", "content": {"image/*": {}}},
+        404: {"model": ErrorResponse},
+    },
+    response_model=None,
+)
+async def get_image(name: str) -> Union[FileResponse, JSONResponse]:
+    """
+    Get an image stored for a conversion with preserve_images.
+
+    Images are addressed by the hash of their content, so a reference never
+    changes what it points to and can be cached indefinitely. Images are
+    served sandboxed, so markup in a stored file cannot run on this origin.
+    """
+    path = image_store.path(name) if IMAGE_NAME_PATTERN.match(name) else None
+    if path is None or not os.path.isfile(path):
+        return JSONResponse(
+            status_code=404,
+            content=ErrorResponse(
+                success=False,
+                error="Image not found",
+                details={"name": name},
+            ).dict(),
+        )
+    return FileResponse(
+        path,
+        headers={
+            "Cache-Control": "public, max-age=31536000, immutable",
+            "Content-Security-Policy": "sandbox; default-src 'none'",
+            "X-Content-Type-Options": "nosniff",
+        },
+    )
+
+
+async def _run_conversion(
+    conversion_request: ConversionRequest, deadline: Optional[Deadline] = None
+) -> Tuple[str, ConversionMetadata]:
+    """
+    Convert the source of a request according to its type.
+
+    Args:
+        conversion_request: The conversion request
+        deadline: Optional deadline bounding the conversion
+
+    Returns:
+        Tuple containing:
+        - The converted Markdown content
+        - Metadata about the conversion
+    """
+    # Extract options
+    options = conversion_request.options
+    headers = options.headers if options and hasattr(options, "headers") else None
+
+    # Process based on source type
+    if conversion_request.type == SourceType.HTML_URL:
+        # Get verify_ssl option
+        verify_ssl = (
+            options.verify_ssl if options and hasattr(options, "verify_ssl") else False
+        )
+
+        return await convert_html_url_cached(
+            conversion_request.source,
+            headers,
+            verify_ssl=verify_ssl,
+            options=options,
+            deadline=deadline,
+        )
+    elif conversion_request.type == SourceType.HTML_SOURCE:
+        return await convert_html_source_to_markdown(
+            conversion_request.source, options=options, deadline=deadline
+        )
+    elif conversion_request.type == SourceType.PDF:
+        # PDF support not implemented yet
+        raise NotImplementedError("PDF conversion is not yet implemented")
+    else:
+        raise ValueError(f"Unsupported source type: {conversion_request.type}")
+
+
+def _check_profiling_allowed(
+    request: Request, options: Optional[ConversionOptions]
+) -> None:
+    """
+    Only let admin requests ask for a conversion profile.
+
+    Raises:
+        AdminTokenRequired: If profiling was requested without the admin token
+    """
+    if options and options.profile and not is_admin_request(request):
+        raise AdminTokenRequired(
+            f"Profiling requires a valid {ADMIN_TOKEN_HEADER} header"
+        )
+
+
+def _request_deadline(
+    request: Request, options: Optional[ConversionOptions]
+) -> Deadline:
+    """
+    Start the deadline of a request.
+
+    Args:
+        request: The incoming request
+        options: The conversion options of the request
+
+    Returns:
+        The deadline from the options, the timeout header or the server default
+
+    Raises:
+        ValueError: If the timeout header is not a positive integer
+    """
+    if options and options.timeout_ms is not None:
+        return Deadline(options.timeout_ms / 1000)
+
+    header = request.headers.get(REQUEST_TIMEOUT_HEADER)
+    if header is None:
+        return Deadline(REQUEST_TIMEOUT_SECONDS)
+    try:
+        timeout_ms = int(header)
+    except ValueError:
+        timeout_ms = 0
+    if timeout_ms <= 0:
+        raise ValueError(
+            f"{REQUEST_TIMEOUT_HEADER} must be a positive integer, got {header!r}"
+        )
+    return Deadline(timeout_ms / 1000)
+
+
+async def _until_disconnected(
+    request: Request, work: Awaitable[T], deadline: Deadline
+) -> T:
+    """
+    Await the work for a request, stopping it if the client disconnects.
+
+    Args:
+        request: The incoming request
+        work: The work producing the response
+        deadline: Deadline of the request, cancelled on disconnect
+
+    Returns:
+        The result of the work
+
+    Raises:
+        ClientDisconnected: If the client disconnected first
+    """
+    task = asyncio.ensure_future(work)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_SECONDS)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                logger.info("Client disconnected, stopping conversion")
+                deadline.cancel()
+                raise ClientDisconnected(
+                    "Client disconnected before the conversion finished"
+                )
+    finally:
+        if not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+
+def _diff_sections(
+    conversion_request: ConversionRequest,
+    markdown_content: str,
+    metadata: ConversionMetadata,
+) -> Tuple[Optional[SectionDiff], Optional[List[MarkdownSection]]]:
+    """
+    Record the sections of a converted URL and compare them with its previous conversion.
+
+    The sections of every html_url conversion are recorded, so the first
+    conversion asking for a diff already has a baseline. Skipped
+    near-duplicates have no Markdown and are neither recorded nor diffed.
+
+    Args:
+        conversion_request: The conversion request
+        markdown_content: The converted Markdown content
+        metadata: Metadata about the conversion
+
+    Returns:
+        Tuple containing:
+        - The section diff, or None if not requested
+        - The added and changed sections if only those should be returned, else None
+    """
+    if conversion_request.type != SourceType.HTML_URL or metadata.skipped:
+        return None, None
+
+    options = conversion_request.options
+    section_diff, changed_sections = section_index.diff(
+        document_key(conversion_request.source, options.headers if options else None),
+        markdown_content,
+    )
+    if not options or not (options.diff_sections or options.changed_sections_only):
+        return None, None
+    return section_diff, changed_sections if options.changed_sections_only else None
+
+
+def _join_sections(markdown_content: str, sections: List[MarkdownSection]) -> str:
+    return "\n\n".join(
+        markdown_content[section.start : section.end].strip() for section in sections
+    )
+
+
+def _conversion_error_response(e: Exception) -> Union[ConversionResponse, JSONResponse]:
+    """
+    Map an exception raised during conversion to an API response.
+
+    Args:
+        e: The exception raised during conversion
+
+    Returns:
+        The response to return to the client
+    """
+    if isinstance(e, DeadlineExceeded):
+        logger.warning(f"Deadline exceeded: {str(e)}")
+        metrics.increment("requests_cancelled_total", reason="deadline")
+        return JSONResponse(
+            status_code=504,
+            content=ErrorResponse(
+                success=False,
+                error="Deadline exceeded",
+                details={"message": str(e)},
+            ).dict(),
+        )
+    elif isinstance(e, AdminTokenRequired):
+        logger.warning(f"Forbidden: {str(e)}")
+        return JSONResponse(
+            status_code=403,
+            content=ErrorResponse(
+                success=False,
+                error="Forbidden",
+                details={"message": str(e)},
+            ).dict(),
+        )
+    elif isinstance(e, ProfilerBusy):
+        logger.warning(f"Profiler busy: {str(e)}")
+        return JSONResponse(
+            status_code=409,
+            content=ErrorResponse(
+                success=False,
+                error="Profiler busy",
+                details={"message": str(e)},
+            ).dict(),
+        )
+    elif isinstance(e, RequestCancelled):
+        logger.info(f"Request cancelled: {str(e)}")
+        metrics.increment("requests_cancelled_total", reason="disconnect")
+        # Nobody reads this response; 499 marks it in access logs
+        return JSONResponse(
+            status_code=499,
+            content=ErrorResponse(
+                success=False,
+                error="Client closed request",
+                details={"message": str(e)},
+            ).dict(),
+        )
+    elif isinstance(e, ValueError):
         logger.warning(f"Validation error: {str(e)}")
         # Check if this is an invalid URL error
         error_message = str(e)
@@ -92,7 +518,7 @@ async def convert_document(request: Request, conversion_request: ConversionReque
                 success=False,
                 markdown=None,
                 metadata=None,
-                error="Invalid or inaccessible URL"
+                error="Invalid or inaccessible URL",
             )
             return response
         else:
@@ -105,7 +531,17 @@ async def convert_document(request: Request, conversion_request: ConversionReque
                     details={"message": str(e)},
                 ).dict(),
             )
-    except NotImplementedError as e:
+    elif isinstance(e, BackendUnavailable):
+        logger.warning(f"Backend unavailable: {str(e)}")
+        return JSONResponse(
+            status_code=503,
+            content=ErrorResponse(
+                success=False,
+                error="Backend unavailable",
+                details={"message": str(e)},
+            ).dict(),
+        )
+    elif isinstance(e, NotImplementedError):
         logger.warning(f"Not implemented: {str(e)}")
         return JSONResponse(
             status_code=501,
@@ -115,8 +551,8 @@ async def convert_document(request: Request, conversion_request: ConversionReque
                 details={"message": str(e)},
             ).dict(),
         )
-    except Exception as e:
-        logger.exception(f"Error during conversion: {str(e)}")
+    else:
+        logger.exception(f"Error during conversion: {str(e)}", exc_info=e)
         return JSONResponse(
             status_code=500,
             content=ErrorResponse(
@@ -125,3 +561,7 @@ async def convert_document(request: Request, conversion_request: ConversionReque
                 details={"message": str(e)},
             ).dict(),
         )
+
+
+def _ndjson_event(event: str, data: dict) -> str:
+    return json.dumps({"event": event, "data": data}) + "\n"
@@ -0,0 +1,483 @@
+"""
+Command line interface for converting saved HTML files in bulk.
+
+Files are converted directly with the conversion service, without the HTTP
+API, in a pool of worker processes that uses all cores. Completed files are
+recorded in a progress manifest so that an interrupted run can be resumed.
+
+Example:
+    docling-wrapper pages/ "archive/**/*.html" manifest.jsonl --output-dir markdown/
+"""
+
+import argparse
+import glob
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from docling_wrapper.api.models import (
+    ContentFilter,
+    ConversionMode,
+    ConversionOptions,
+    SourceType,
+)
+
+logger = logging.getLogger(__name__)
+
+HTML_EXTENSIONS = (".html", ".htm", ".xhtml")
+MANIFEST_EXTENSIONS = (".jsonl", ".ndjson")
+PROGRESS_FILE_NAME = ".docling-wrapper-progress.jsonl"
+
+# Seconds between progress lines on stderr
+PROGRESS_INTERVAL_SECONDS = 10.0
+
+# Options of the current worker process, set by the pool initializer
+_worker_options: Optional[ConversionOptions] = None
+_worker_write_metadata = False
+
+
+@dataclass
+class ConversionJob:
+    """
+    A file to convert and where to write the result.
+
+    The size and modification time of the source are taken when the job is
+    created, so a file edited during the run is converted again next time.
+    They are None if the source could not be read.
+    """
+
+    source: str
+    output: str
+    size: Optional[int] = None
+    mtime: Optional[float] = None
+
+
+@dataclass
+class JobResult:
+    """
+    Outcome of converting one file.
+    """
+
+    source: str
+    output: str
+    success: bool
+    size_bytes: int
+    error: Optional[str] = None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Run the bulk conversion command.
+
+    Args:
+        argv: Command line arguments (sys.argv if omitted)
+
+    Returns:
+        The exit code: 0 if every file converted, 1 if some failed, 2 on usage errors
+    """
+    parser = _build_parser()
+    args = parser.parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+
+    output_dir = os.path.abspath(args.output_dir)
+    try:
+        jobs = list(collect_jobs(args.inputs, output_dir))
+    except ValueError as e:
+        parser.error(str(e))
+    if not jobs:
+        print("No HTML files found", file=sys.stderr)
+        return 2
+
+    progress_path = args.progress or os.path.join(output_dir, PROGRESS_FILE_NAME)
+    completed = {} if args.restart else load_progress(progress_path)
+    pending = [job for job in jobs if not _is_done(job, completed)]
+    skipped = len(jobs) - len(pending)
+    if skipped:
+        print(f"Skipping {skipped} files converted by a previous run", file=sys.stderr)
+
+    options = ConversionOptions(
+        content_filter=ContentFilter(args.content_filter),
+        mode=ConversionMode(args.mode) if args.mode else None,
+    )
+    workers = args.workers or os.cpu_count() or 1
+    os.makedirs(os.path.dirname(os.path.abspath(progress_path)), exist_ok=True)
+    stats = _run_pool(
+        pending, options, args.metadata, workers, args.chunksize, progress_path
+    )
+
+    elapsed = max(stats["elapsed"], 1e-9)
+    megabytes = stats["bytes"] / (1024 * 1024)
+    print(
+        f"Converted {stats['converted']} files ({megabytes:.1f} MB), {stats['failed']} failed, "
+        f"{skipped} skipped in {elapsed:.1f}s: "
+        f"{stats['converted'] / elapsed:.1f} files/s, {megabytes / elapsed:.2f} MB/s",
+        file=sys.stderr,
+    )
+    return 1 if stats["failed"] else 0
+
+
+def collect_jobs(inputs: List[str], output_dir: str) -> Iterator[ConversionJob]:
+    """
+    Expand directories, glob patterns, JSONL manifests and files into conversion jobs.
+
+    Outputs mirror the layout of the input below its base directory: the
+    directory itself, the fixed prefix of a glob pattern or the directory of
+    a manifest. Manifest lines are JSON objects with a "path" and an
+    optional "output"; relative paths are taken relative to the manifest,
+    except outputs, which are relative to the output directory and must
+    stay inside it.
+
+    Args:
+        inputs: Directories, glob patterns, manifests and HTML files
+        output_dir: Directory Markdown files are written to
+
+    Yields:
+        One job per source file, without duplicates
+
+    Raises:
+        ValueError: If an input does not exist, a manifest line is invalid,
+            an output is outside the output directory or two sources would
+            write the same output
+    """
+    seen = set()
+    outputs: Dict[str, str] = {}
+    for entry in inputs:
+        for source, base_dir, output in _expand_input(entry):
+            source = os.path.abspath(source)
+            if source in seen:
+                continue
+            seen.add(source)
+            if output is None:
+                relative = os.path.relpath(source, base_dir)
+                if relative.startswith(os.pardir):
+                    relative = os.path.basename(source)
+                output = os.path.splitext(relative)[0] + ".md"
+            output_path = _output_path(output_dir, output)
+            # e.g. page.html and page.htm would both write page.md
+            if output_path in outputs:
+                raise ValueError(
+                    f"{outputs[output_path]} and {source} both write {output_path}"
+                )
+            outputs[output_path] = source
+            job = ConversionJob(source=source, output=output_path)
+            try:
+                stat = os.stat(source)
+                job.size, job.mtime = stat.st_size, stat.st_mtime
+            except OSError:
+                # Missing sources are reported when they fail to convert
+                pass
+            yield job
+
+
+def load_progress(progress_path: str) -> Dict[str, Dict]:
+    """
+    Read the files completed by previous runs from a progress manifest.
+
+    Args:
+        progress_path: Path of the progress manifest
+
+    Returns:
+        The latest successful entry per source path
+    """
+    completed: Dict[str, Dict] = {}
+    if not os.path.exists(progress_path):
+        return completed
+    with open(progress_path, encoding="utf-8") as progress_file:
+        for line in progress_file:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # An interrupted run can leave a partial last line
+                continue
+            if entry.get("success"):
+                completed[entry["source"]] = entry
+            else:
+                completed.pop(entry.get("source"), None)
+    return completed
+
+
+def convert_file(job: ConversionJob) -> JobResult:
+    """
+    Convert one HTML file and write the Markdown atomically.
+
+    Runs in a worker process; the conversion options come from the pool initializer.
+
+    Args:
+        job: The file to convert
+
+    Returns:
+        The outcome of the conversion
+    """
+    # Imported here so the parent process does not load the converter
+    from docling_wrapper.services.html_converter import (
+        build_conversion_metadata,
+        convert_html_document,
+    )
+
+    size_bytes = 0
+    try:
+        start_time = time.time()
+        with open(job.source, "rb") as source_file:
+            content = source_file.read()
+        size_bytes = len(content)
+        html_content = content.decode("utf-8", errors="replace")
+
+        # The pool already uses every core, so documents are not split further
+        document = convert_html_document(
+            html_content, _worker_options, parallel_segments=False
+        )
+        write_atomic(job.output, document.markdown)
+
+        if _worker_write_metadata:
+            processing_time_ms = int((time.time() - start_time) * 1000)
+            metadata = build_conversion_metadata(
+                document, SourceType.HTML_SOURCE, processing_time_ms, size_bytes
+            )
+            write_atomic(
+                os.path.splitext(job.output)[0] + ".json",
+                json.dumps(
+                    metadata.model_dump(mode="json"), ensure_ascii=False, indent=2
+                ),
+            )
+        return JobResult(job.source, job.output, True, size_bytes)
+    except Exception as e:
+        return JobResult(
+            job.source, job.output, False, size_bytes, f"{type(e).__name__}: {e}"
+        )
+
+
+def write_atomic(path: str, text: str) -> None:
+    """
+    Write a text file so that readers see either the old or the complete new content.
+
+    Args:
+        path: Path of the file
+        text: Content to write
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as temp_file:
+            temp_file.write(text)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="docling-wrapper",
+        description="Convert saved HTML files to Markdown in bulk, using all cores.",
+    )
+    parser.add_argument(
+        "inputs",
+        nargs="+",
+        help="Directories, glob patterns (quote them), JSONL manifests or HTML files",
+    )
+    parser.add_argument(
+        "-o", "--output-dir", required=True, help="Directory to write Markdown files to"
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes (default: CPU count)",
+    )
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=16,
+        help="Files handed to a worker at a time; larger values cut overhead for small files",
+    )
+    parser.add_argument(
+        "--content-filter",
+        choices=[content_filter.value for content_filter in ContentFilter],
+        default=ContentFilter.NONE.value,
+        help="Markup removed before conversion",
+    )
+    parser.add_argument(
+        "--mode",
+        choices=[mode.value for mode in ConversionMode],
+        default=None,
+        help="Speed/fidelity trade-off selecting the conversion engine (default: server default)",
+    )
+    parser.add_argument(
+        "--metadata",
+        action="store_true",
+        help="Also write conversion metadata as .json files",
+    )
+    parser.add_argument(
+        "--progress",
+        default=None,
+        help=f"Progress manifest for resuming (default: OUTPUT_DIR/{PROGRESS_FILE_NAME})",
+    )
+    parser.add_argument(
+        "--restart", action="store_true", help="Ignore the progress of previous runs"
+    )
+    parser.add_argument(
+        "-v", "--verbose", action="store_true", help="Log every conversion"
+    )
+    return parser
+
+
+def _expand_input(entry: str) -> Iterator[Tuple[str, str, Optional[str]]]:
+    """
+    Expand one input into (source, base directory, explicit output) tuples.
+    """
+    if os.path.isdir(entry):
+        for root, directories, files in os.walk(entry):
+            directories.sort()
+            for name in sorted(files):
+                if name.lower().endswith(HTML_EXTENSIONS):
+                    yield os.path.join(root, name), entry, None
+    elif os.path.isfile(entry) and entry.lower().endswith(MANIFEST_EXTENSIONS):
+        yield from _read_manifest(entry)
+    elif os.path.isfile(entry):
+        yield entry, os.path.dirname(entry) or ".", None
+    elif glob.has_magic(entry):
+        base_dir = _glob_base(entry)
+        for path in sorted(glob.iglob(entry, recursive=True)):
+            if os.path.isfile(path):
+                yield path, base_dir, None
+    else:
+        raise ValueError(f"Input not found: {entry}")
+
+
+def _read_manifest(manifest_path: str) -> Iterator[Tuple[str, str, Optional[str]]]:
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    with open(manifest_path, encoding="utf-8") as manifest:
+        for line_number, line in enumerate(manifest, start=1):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+                path = entry["path"]
+            except (json.JSONDecodeError, KeyError, TypeError):
+                raise ValueError(
+                    f'{manifest_path}:{line_number}: expected a JSON object with a "path"'
+                )
+            output = entry.get("output")
+            if output is not None and not isinstance(output, str):
+                raise ValueError(
+                    f'{manifest_path}:{line_number}: "output" must be a string'
+                )
+            yield os.path.join(base_dir, path), base_dir, output
+
+
+def _output_path(output_dir: str, output: str) -> str:
+    """
+    Resolve an output below the output directory, refusing paths that leave it.
+    """
+    path = os.path.realpath(os.path.join(output_dir, output))
+    root = os.path.realpath(output_dir)
+    if os.path.commonpath([root, path]) != root or path == root:
+        raise ValueError(f"Output {output!r} is outside the output directory")
+    return path
+
+
+def _glob_base(pattern: str) -> str:
+    parts = []
+    for part in pattern.split(os.sep):
+        if glob.has_magic(part):
+            break
+        parts.append(part)
+    return os.sep.join(parts) or "."
+
+
+def _is_done(job: ConversionJob, completed: Dict[str, Dict]) -> bool:
+    entry = completed.get(job.source)
+    if (
+        entry is None
+        or job.size is None
+        or entry.get("output") != job.output
+        or not os.path.exists(job.output)
+    ):
+        return False
+    # Sources changed since they were converted are converted again
+    return entry.get("size") == job.size and entry.get("mtime") == job.mtime
+
+
+def _init_worker(options: ConversionOptions, write_metadata: bool) -> None:
+    global _worker_options, _worker_write_metadata
+    _worker_options = options
+    _worker_write_metadata = write_metadata
+    # Per-file conversion logs would drown the progress output
+    if not logging.getLogger().isEnabledFor(logging.INFO):
+        logging.getLogger("docling_wrapper").setLevel(logging.WARNING)
+
+
+def _run_pool(
+    jobs: List[ConversionJob],
+    options: ConversionOptions,
+    write_metadata: bool,
+    workers: int,
+    chunksize: int,
+    progress_path: str,
+) -> Dict[str, float]:
+    """
+    Convert jobs in a process pool, recording each outcome in the progress manifest.
+    """
+    stats = {"converted": 0, "failed": 0, "bytes": 0, "elapsed": 0.0}
+    if not jobs:
+        return stats
+
+    jobs_by_source = {job.source: job for job in jobs}
+    start = time.monotonic()
+    last_report = start
+    # Line buffering keeps the manifest complete up to the last finished file
+    with (
+        open(progress_path, "a", encoding="utf-8", buffering=1) as progress_file,
+        multiprocessing.Pool(
+            processes=workers,
+            initializer=_init_worker,
+            initargs=(options, write_metadata),
+        ) as pool,
+    ):
+        for result in pool.imap_unordered(
+            convert_file, jobs, chunksize=max(chunksize, 1)
+        ):
+            entry = {
+                "source": result.source,
+                "output": result.output,
+                "success": result.success,
+            }
+            if result.success:
+                stats["converted"] += 1
+                stats["bytes"] += result.size_bytes
+                # Recorded as of enqueueing, so later edits are picked up on resume
+                job = jobs_by_source[result.source]
+                entry.update(size=job.size, mtime=job.mtime)
+            else:
+                stats["failed"] += 1
+                entry["error"] = result.error
+                print(f"Failed: {result.source}: {result.error}", file=sys.stderr)
+            progress_file.write(json.dumps(entry) + "\n")
+
+            now = time.monotonic()
+            if now - last_report >= PROGRESS_INTERVAL_SECONDS:
+                done = stats["converted"] + stats["failed"]
+                print(
+                    f"{done}/{len(jobs)} files, {done / (now - start):.1f} files/s",
+                    file=sys.stderr,
+                )
+                last_report = now
+
+    stats["elapsed"] = time.monotonic() - start
+    return stats
+
+
+if __name__ == "__main__":
+    sys.exit(main())
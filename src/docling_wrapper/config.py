@@ -0,0 +1,186 @@
+"""
+Service configuration read from environment variables.
+"""
+
+import logging
+import os
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+
+def _env_int(name: str, default: int) -> int:
+    """
+    Read an integer setting from the environment.
+
+    Args:
+        name: Name of the environment variable
+        default: Value to use if the variable is unset or invalid
+
+    Returns:
+        The configured value
+    """
+    value = os.environ.get(name)
+    if value is None or value.strip() == "":
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        logger.warning(
+            f"Invalid integer for {name}: {value!r}, using default {default}"
+        )
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    """
+    Read a float setting from the environment.
+
+    Args:
+        name: Name of the environment variable
+        default: Value to use if the variable is unset or invalid
+
+    Returns:
+        The configured value
+    """
+    value = os.environ.get(name)
+    if value is None or value.strip() == "":
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        logger.warning(f"Invalid number for {name}: {value!r}, using default {default}")
+        return default
+
+
+# Number of URLs whose section hashes are kept for incremental re-conversion
+SECTION_INDEX_MAX_DOCUMENTS = _env_int(
+    "DOCLING_WRAPPER_SECTION_INDEX_MAX_DOCUMENTS", 5000
+)
+
+# Largest sitemap accepted by crawls, after gzip decompression. The sitemap
+# protocol allows at most 50 MB uncompressed.
+SITEMAP_MAX_BYTES = _env_int("DOCLING_WRAPPER_SITEMAP_MAX_BYTES", 50 * 1024 * 1024)
+
+# Fetch layer limits. Per-host limits keep a batch aimed at one site from
+# overloading it while requests to other hosts proceed at full speed.
+FETCH_MAX_CONNECTIONS = _env_int("DOCLING_WRAPPER_FETCH_MAX_CONNECTIONS", 200)
+FETCH_MAX_CONNECTIONS_PER_HOST = _env_int(
+    "DOCLING_WRAPPER_FETCH_MAX_CONNECTIONS_PER_HOST", 6
+)
+# Requests started per second per host, 0 disables rate limiting
+FETCH_REQUESTS_PER_SECOND_PER_HOST = _env_float(
+    "DOCLING_WRAPPER_FETCH_REQUESTS_PER_SECOND_PER_HOST", 10.0
+)
+# Longest Retry-After honoured before giving up on a throttled request
+FETCH_MAX_RETRY_AFTER_SECONDS = _env_float(
+    "DOCLING_WRAPPER_FETCH_MAX_RETRY_AFTER_SECONDS", 30.0
+)
+DNS_CACHE_TTL_SECONDS = _env_float("DOCLING_WRAPPER_DNS_CACHE_TTL_SECONDS", 60.0)
+
+# Retries of idempotent requests. The attempt budget covers the first
+# request, retries and hedged requests.
+FETCH_MAX_ATTEMPTS = _env_int("DOCLING_WRAPPER_FETCH_MAX_ATTEMPTS", 3)
+FETCH_RETRY_BASE_DELAY_SECONDS = _env_float(
+    "DOCLING_WRAPPER_FETCH_RETRY_BASE_DELAY_SECONDS", 0.2
+)
+FETCH_RETRY_MAX_DELAY_SECONDS = _env_float(
+    "DOCLING_WRAPPER_FETCH_RETRY_MAX_DELAY_SECONDS", 5.0
+)
+# Hedging starts a second GET once the first is slower than this latency percentile
+FETCH_HEDGE_ENABLED = _env_int("DOCLING_WRAPPER_FETCH_HEDGE_ENABLED", 0) == 1
+FETCH_HEDGE_PERCENTILE = _env_float("DOCLING_WRAPPER_FETCH_HEDGE_PERCENTILE", 95.0)
+FETCH_HEDGE_MIN_DELAY_SECONDS = _env_float(
+    "DOCLING_WRAPPER_FETCH_HEDGE_MIN_DELAY_SECONDS", 0.05
+)
+
+# Default time a conversion request may take, 0 for no limit. Clients can
+# ask for a shorter or longer deadline per request.
+REQUEST_TIMEOUT_SECONDS = _env_float("DOCLING_WRAPPER_REQUEST_TIMEOUT_SECONDS", 120.0)
+# Threads running conversions off the event loop
+CONVERSION_WORKERS = _env_int("DOCLING_WRAPPER_CONVERSION_WORKERS", os.cpu_count() or 2)
+
+# Token that admin requests must send in the X-Admin-Token header; admin
+# endpoints and per-request profiling are disabled while it is unset
+ADMIN_TOKEN = os.environ.get("DOCLING_WRAPPER_ADMIN_TOKEN", "")
+# Number of captured conversion profiles kept for retrieval
+PROFILE_STORE_MAX_PROFILES = _env_int("DOCLING_WRAPPER_PROFILE_STORE_MAX_PROFILES", 50)
+# Longest run of the sampling profiler endpoint
+SAMPLING_PROFILER_MAX_SECONDS = _env_float(
+    "DOCLING_WRAPPER_SAMPLING_PROFILER_MAX_SECONDS", 60.0
+)
+
+# Resource monitor. The worker reports itself degraded while a measurement
+# is above its threshold; 0 disables a threshold.
+MONITOR_INTERVAL_SECONDS = _env_float("DOCLING_WRAPPER_MONITOR_INTERVAL_SECONDS", 1.0)
+HEALTH_MAX_LOOP_LAG_SECONDS = _env_float(
+    "DOCLING_WRAPPER_HEALTH_MAX_LOOP_LAG_SECONDS", 0.5
+)
+HEALTH_MAX_RSS_MB = _env_float("DOCLING_WRAPPER_HEALTH_MAX_RSS_MB", 0.0)
+HEALTH_MAX_OPEN_FDS = _env_int("DOCLING_WRAPPER_HEALTH_MAX_OPEN_FDS", 0)
+HEALTH_MAX_QUEUE_DEPTH = _env_int(
+    "DOCLING_WRAPPER_HEALTH_MAX_QUEUE_DEPTH", 4 * CONVERSION_WORKERS
+)
+
+# Documents larger than this are cut at block boundaries into segments of
+# about the target size, which are converted in parallel processes.
+# Segmentation is off with fewer than two processes.
+SEGMENT_MIN_DOCUMENT_BYTES = _env_int(
+    "DOCLING_WRAPPER_SEGMENT_MIN_DOCUMENT_BYTES", 1024 * 1024
+)
+SEGMENT_TARGET_BYTES = _env_int("DOCLING_WRAPPER_SEGMENT_TARGET_BYTES", 256 * 1024)
+SEGMENT_PROCESSES = _env_int("DOCLING_WRAPPER_SEGMENT_PROCESSES", os.cpu_count() or 1)
+
+# Images downloaded for preserve_images are stored once per content hash
+IMAGE_STORE_DIR = os.environ.get(
+    "DOCLING_WRAPPER_IMAGE_STORE_DIR",
+    os.path.join(tempfile.gettempdir(), "docling-wrapper-images"),
+)
+# Prefix of the image references written into the markdown
+IMAGE_BASE_URL = os.environ.get("DOCLING_WRAPPER_IMAGE_BASE_URL", "/api/v1/images")
+IMAGE_MAX_PER_DOCUMENT = _env_int("DOCLING_WRAPPER_IMAGE_MAX_PER_DOCUMENT", 50)
+IMAGE_MAX_BYTES = _env_int("DOCLING_WRAPPER_IMAGE_MAX_BYTES", 5 * 1024 * 1024)
+IMAGE_FETCH_CONCURRENCY = _env_int("DOCLING_WRAPPER_IMAGE_FETCH_CONCURRENCY", 8)
+# Image URLs remembered with their stored hash, so repeated images are not downloaded again
+IMAGE_URL_CACHE_SIZE = _env_int("DOCLING_WRAPPER_IMAGE_URL_CACHE_SIZE", 10000)
+
+# Conversion mode used when a request does not pick one: fast, balanced or accurate.
+# Fast by default, so installing Docling does not slow down existing clients.
+DEFAULT_CONVERSION_MODE = (
+    os.environ.get("DOCLING_WRAPPER_DEFAULT_MODE", "fast").strip().lower()
+)
+# Largest document the balanced mode sends through the Docling pipeline
+BALANCED_DOCLING_MAX_BYTES = _env_int(
+    "DOCLING_WRAPPER_BALANCED_DOCLING_MAX_BYTES", 512 * 1024
+)
+
+# Result cache for html_url conversions, opt-in: a TTL of 0 disables caching.
+# A cached result can be up to the TTL older than the page it came from.
+RESULT_CACHE_TTL_SECONDS = _env_float("DOCLING_WRAPPER_RESULT_CACHE_TTL_SECONDS", 0.0)
+RESULT_CACHE_MAX_ENTRIES = _env_int("DOCLING_WRAPPER_RESULT_CACHE_MAX_ENTRIES", 1000)
+# Request counts behind the hotness of a URL halve over this time
+RESULT_CACHE_HIT_HALF_LIFE_SECONDS = _env_float(
+    "DOCLING_WRAPPER_RESULT_CACHE_HIT_HALF_LIFE_SECONDS", 600.0
+)
+# Background refresh of hot entries before they expire; a concurrency of 0 disables it
+CACHE_REFRESH_CONCURRENCY = _env_int("DOCLING_WRAPPER_CACHE_REFRESH_CONCURRENCY", 2)
+CACHE_REFRESH_INTERVAL_SECONDS = _env_float(
+    "DOCLING_WRAPPER_CACHE_REFRESH_INTERVAL_SECONDS", 5.0
+)
+CACHE_REFRESH_AHEAD_SECONDS = _env_float(
+    "DOCLING_WRAPPER_CACHE_REFRESH_AHEAD_SECONDS", 30.0
+)
+# Decayed request count from which an entry counts as hot
+CACHE_REFRESH_MIN_HITS = _env_float("DOCLING_WRAPPER_CACHE_REFRESH_MIN_HITS", 3.0)
+
+# Near-duplicate detection over recently converted documents, opt-in: 0 documents
+# disables it. The index is shared by all clients of the server.
+NEAR_DUPLICATE_INDEX_MAX_DOCUMENTS = _env_int(
+    "DOCLING_WRAPPER_NEAR_DUPLICATE_INDEX_MAX_DOCUMENTS", 0
+)
+# Largest number of differing fingerprint bits, out of 64, for a near-duplicate
+NEAR_DUPLICATE_MAX_DISTANCE = _env_int("DOCLING_WRAPPER_NEAR_DUPLICATE_MAX_DISTANCE", 6)
+# File the index is loaded from at startup and saved to at shutdown; empty keeps it in memory
+NEAR_DUPLICATE_INDEX_PATH = os.environ.get(
+    "DOCLING_WRAPPER_NEAR_DUPLICATE_INDEX_PATH", ""
+)
@@ -0,0 +1,233 @@
+"""
+Registry of the engines that convert HTML to Markdown.
+
+The fast engine is the regex converter in mock_docling; it needs no extra
+dependencies and converts typical pages in milliseconds. The docling engine
+runs the full Docling pipeline, which recovers document structure more
+faithfully at a much higher cost, and is only available when the docling
+package is installed. The conversion mode of a request picks the engine.
+"""
+
+import importlib.util
+import io
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from docling_wrapper.api.models import ConversionMode
+from docling_wrapper.config import BALANCED_DOCLING_MAX_BYTES, DEFAULT_CONVERSION_MODE
+from docling_wrapper.utils import mock_docling
+
+logger = logging.getLogger(__name__)
+
+FAST_BACKEND = "fast"
+DOCLING_BACKEND = "docling"
+
+
+class BackendUnavailable(Exception):
+    """
+    Raised when a request needs a conversion engine that is not installed.
+
+    The API is implemented, the server just lacks the dependency, so this
+    is not a NotImplementedError.
+    """
+
+
+class ConversionBackend:
+    """
+    An engine that converts HTML documents to Markdown.
+    """
+
+    name = ""
+    description = ""
+    # Module-level function with the signature of convert, used to convert
+    # segments of large documents in other processes; None keeps documents whole
+    segment_function: Optional[Callable[..., str]] = None
+
+    def is_available(self) -> bool:
+        """
+        Whether the engine's dependencies are installed.
+        """
+        return True
+
+    def convert(
+        self,
+        html_content: str,
+        title: Optional[str] = None,
+        check_cancelled: Optional[Callable[[], None]] = None,
+    ) -> str:
+        """
+        Convert an HTML document to Markdown.
+
+        Args:
+            html_content: The HTML content to convert
+            title: The document title if the caller already extracted it
+            check_cancelled: Optional callback that raises to abort the conversion
+
+        Returns:
+            The converted Markdown content
+        """
+        raise NotImplementedError
+
+
+class FastBackend(ConversionBackend):
+    """
+    The lightweight regex converter.
+    """
+
+    name = FAST_BACKEND
+    description = "Lightweight regex converter for common markup"
+    segment_function = staticmethod(mock_docling.convert_html_to_markdown)
+
+    def convert(
+        self,
+        html_content: str,
+        title: Optional[str] = None,
+        check_cancelled: Optional[Callable[[], None]] = None,
+    ) -> str:
+        return mock_docling.convert_html_to_markdown(
+            html_content, title=title, check_cancelled=check_cancelled
+        )
+
+
+class DoclingBackend(ConversionBackend):
+    """
+    The full Docling document conversion pipeline.
+    """
+
+    name = DOCLING_BACKEND
+    description = "Docling document conversion pipeline"
+
+    def __init__(self) -> None:
+        self._converter: Any = None
+        self._available: Optional[bool] = None
+        self._lock = threading.Lock()
+
+    def is_available(self) -> bool:
+        if self._available is None:
+            self._available = importlib.util.find_spec("docling") is not None
+        return self._available
+
+    def convert(
+        self,
+        html_content: str,
+        title: Optional[str] = None,
+        check_cancelled: Optional[Callable[[], None]] = None,
+    ) -> str:
+        from docling.datamodel.base_models import DocumentStream
+
+        # The pipeline cannot be interrupted, so cancellation is checked around it
+        if check_cancelled:
+            check_cancelled()
+        source = DocumentStream(
+            name="document.html", stream=io.BytesIO(html_content.encode("utf-8"))
+        )
+        result = self._get_converter().convert(source)
+        if check_cancelled:
+            check_cancelled()
+        markdown: str = result.document.export_to_markdown()
+        return markdown
+
+    def _get_converter(self) -> Any:
+        # Creating the converter loads the pipeline, so it is done once and shared
+        with self._lock:
+            if self._converter is None:
+                from docling.datamodel.base_models import InputFormat
+                from docling.document_converter import DocumentConverter
+
+                self._converter = DocumentConverter(allowed_formats=[InputFormat.HTML])
+                logger.info("Initialised Docling document converter")
+            return self._converter
+
+
+_backends: Dict[str, ConversionBackend] = {}
+
+
+def register_backend(backend: ConversionBackend) -> None:
+    """
+    Register a conversion engine, replacing one of the same name.
+
+    Args:
+        backend: The engine to register
+    """
+    _backends[backend.name] = backend
+
+
+def get_backend(name: str) -> ConversionBackend:
+    """
+    Get a registered conversion engine by name.
+
+    Args:
+        name: Name of the engine
+
+    Returns:
+        The engine
+
+    Raises:
+        BackendUnavailable: If no engine of that name is registered or it is not installed
+    """
+    backend = _backends.get(name)
+    if backend is None or not backend.is_available():
+        raise BackendUnavailable(f"Conversion backend {name!r} is not available")
+    return backend
+
+
+def list_backends() -> List[ConversionBackend]:
+    """
+    List the registered conversion engines, including unavailable ones.
+    """
+    return list(_backends.values())
+
+
+def default_mode() -> ConversionMode:
+    """
+    Get the conversion mode used when a request does not pick one.
+    """
+    try:
+        return ConversionMode(DEFAULT_CONVERSION_MODE)
+    except ValueError:
+        logger.warning(
+            f"Invalid default conversion mode {DEFAULT_CONVERSION_MODE!r}, using fast"
+        )
+        return ConversionMode.FAST
+
+
+def select_backend(
+    mode: Optional[ConversionMode], document_bytes: int
+) -> ConversionBackend:
+    """
+    Pick the conversion engine for a document.
+
+    Fast always uses the lightweight converter and accurate always uses
+    Docling. Balanced uses Docling for documents of up to
+    BALANCED_DOCLING_MAX_BYTES if it is installed, and the lightweight
+    converter otherwise.
+
+    Args:
+        mode: The requested conversion mode, or None for the server default
+        document_bytes: Size of the document in bytes
+
+    Returns:
+        The engine to convert the document with
+
+    Raises:
+        BackendUnavailable: If accurate mode was requested without Docling installed
+    """
+    mode = mode or default_mode()
+    if mode == ConversionMode.FAST:
+        return get_backend(FAST_BACKEND)
+    if mode == ConversionMode.ACCURATE:
+        return get_backend(DOCLING_BACKEND)
+
+    docling_backend = _backends.get(DOCLING_BACKEND)
+    if (
+        docling_backend is not None
+        and docling_backend.is_available()
+        and document_bytes <= BALANCED_DOCLING_MAX_BYTES
+    ):
+        return docling_backend
+    return get_backend(FAST_BACKEND)
+
+
+register_backend(FastBackend())
+register_backend(DoclingBackend())
@@ -0,0 +1,225 @@
+"""
+Service for splitting converted Markdown into heading-aware chunks.
+"""
+
+import logging
+import math
+import re
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Tuple
+
+from docling_wrapper.api.models import ChunkingOptions, ChunkUnit, MarkdownChunk
+
+logger = logging.getLogger(__name__)
+
+# Rough number of characters per token for English text
+CHARS_PER_TOKEN = 4
+
+# Headings may be indented, the mock converter keeps the HTML source indentation
+_HEADING_PATTERN = re.compile(r"^[ \t]*(#{1,6})\s+(.*?)\s*#*\s*$")
+_FENCE_PATTERN = re.compile(r"^\s*(```|~~~)")
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+_LAST_WHITESPACE_PATTERN = re.compile(r".*\s", re.DOTALL)
+
+
+@dataclass
+class MarkdownSection:
+    """
+    A heading and the content up to the next heading, as a span of the Markdown.
+    """
+
+    heading_path: List[str]
+    start: int
+    end: int
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens in a text.
+
+    Args:
+        text: The text to estimate
+
+    Returns:
+        The approximate token count
+    """
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def split_sections(markdown: str) -> List[MarkdownSection]:
+    """
+    Split Markdown into sections at ATX headings, ignoring fenced code blocks.
+
+    Args:
+        markdown: The Markdown content to split
+
+    Returns:
+        The sections in document order, covering the whole content
+    """
+    sections: List[MarkdownSection] = []
+    heading_stack: List[Tuple[int, str]] = []
+    section_start = 0
+    current_path: List[str] = []
+    in_fence = False
+    offset = 0
+
+    for line in markdown.splitlines(keepends=True):
+        if _FENCE_PATTERN.match(line):
+            in_fence = not in_fence
+        elif not in_fence:
+            heading_match = _HEADING_PATTERN.match(line.rstrip("\r\n"))
+            if heading_match:
+                if offset > section_start:
+                    sections.append(
+                        MarkdownSection(current_path, section_start, offset)
+                    )
+                level = len(heading_match.group(1))
+                while heading_stack and heading_stack[-1][0] >= level:
+                    heading_stack.pop()
+                heading_stack.append((level, heading_match.group(2)))
+                current_path = [text for _, text in heading_stack]
+                section_start = offset
+        offset += len(line)
+
+    if offset > section_start or not sections:
+        sections.append(MarkdownSection(current_path, section_start, offset))
+    return sections
+
+
+def iter_markdown_chunks(
+    markdown: str,
+    options: Optional[ChunkingOptions] = None,
+    sections: Optional[List[MarkdownSection]] = None,
+) -> Iterator[MarkdownChunk]:
+    """
+    Split Markdown into chunks that never cross a heading.
+
+    Chunks are yielded as soon as they are cut so callers can stream them.
+
+    Args:
+        markdown: The Markdown content to split
+        options: Chunk size and overlap settings (defaults if omitted)
+        sections: Sections to chunk, all sections of the Markdown if omitted
+
+    Yields:
+        The chunks in document order
+    """
+    options = options or ChunkingOptions()
+    scale = CHARS_PER_TOKEN if options.unit == ChunkUnit.TOKENS else 1
+    max_chars = options.max_size * scale
+    overlap_chars = min(options.overlap * scale, max_chars // 2)
+
+    if sections is None:
+        sections = split_sections(markdown)
+
+    byte_offsets = ByteOffsetTracker(markdown)
+    index = 0
+    for section in sections:
+        spans = _split_span(
+            markdown, section.start, section.end, max_chars, overlap_chars
+        )
+        for start, end in spans:
+            text = markdown[start:end]
+            yield MarkdownChunk(
+                index=index,
+                text=text,
+                heading_path=section.heading_path,
+                start_byte=byte_offsets.at(start),
+                end_byte=byte_offsets.at(end),
+                token_estimate=estimate_tokens(text),
+            )
+            index += 1
+
+
+def chunk_markdown(
+    markdown: str,
+    options: Optional[ChunkingOptions] = None,
+    sections: Optional[List[MarkdownSection]] = None,
+) -> List[MarkdownChunk]:
+    """
+    Split Markdown into heading-aware chunks.
+
+    Args:
+        markdown: The Markdown content to split
+        options: Chunk size and overlap settings (defaults if omitted)
+        sections: Sections to chunk, all sections of the Markdown if omitted
+
+    Returns:
+        The chunks in document order
+    """
+    chunks = list(iter_markdown_chunks(markdown, options, sections))
+    logger.info(f"Split markdown into {len(chunks)} chunks")
+    return chunks
+
+
+def _split_span(
+    markdown: str, start: int, end: int, max_chars: int, overlap_chars: int
+) -> Iterator[Tuple[int, int]]:
+    """
+    Cut a span into pieces of at most max_chars, preferring paragraph, line and word breaks.
+    """
+    start, end = _trim(markdown, start, end)
+    while start < end:
+        if end - start <= max_chars:
+            yield start, end
+            return
+
+        cut = _find_break(markdown, start, start + max_chars)
+        piece_start, piece_end = _trim(markdown, start, cut)
+        if piece_end > piece_start:
+            yield piece_start, piece_end
+
+        next_start = cut
+        if overlap_chars:
+            # Begin the overlap on a word boundary; without one in the overlap
+            # window the next piece starts where this one ended
+            next_start = max(cut - overlap_chars, start + 1)
+            if not markdown[next_start - 1].isspace():
+                boundary = _WHITESPACE_PATTERN.search(markdown, next_start, cut)
+                next_start = boundary.end() if boundary else cut
+        start, end = _trim(markdown, next_start, end)
+
+
+def _find_break(markdown: str, start: int, upper: int) -> int:
+    # Prefer the strongest break in the second half of the piece
+    lower = start + (upper - start) // 2
+    for separator in ("\n\n", "\n", " "):
+        position = markdown.rfind(separator, lower, upper)
+        if position != -1:
+            return position + len(separator)
+    # A short piece is still better than a word cut in two
+    boundary = _LAST_WHITESPACE_PATTERN.search(markdown, start + 1, upper)
+    return boundary.end() if boundary else upper
+
+
+def _trim(markdown: str, start: int, end: int) -> Tuple[int, int]:
+    while start < end and markdown[start].isspace():
+        start += 1
+    while end > start and markdown[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+class ByteOffsetTracker:
+    """
+    Converts character offsets of a text to UTF-8 byte offsets.
+
+    Offsets are computed relative to the previous lookup, so converting
+    mostly-increasing offsets does not re-encode the prefix each time.
+    """
+
+    def __init__(self, text: str) -> None:
+        self._text = text
+        self._ascii = text.isascii()
+        self._char = 0
+        self._byte = 0
+
+    def at(self, char_offset: int) -> int:
+        if self._ascii:
+            return char_offset
+        if char_offset >= self._char:
+            self._byte += len(self._text[self._char : char_offset].encode("utf-8"))
+        else:
+            self._byte -= len(self._text[char_offset : self._char].encode("utf-8"))
+        self._char = char_offset
+        return self._byte
@@ -0,0 +1,406 @@
+"""
+Service for crawling a site from a seed page or sitemap and converting each page.
+"""
+
+import asyncio
+import logging
+import re
+import time
+import zlib
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple, Union
+from urllib.parse import urljoin, urlsplit
+
+from defusedxml import ElementTree
+
+from docling_wrapper.api.models import (
+    ConversionOptions,
+    CrawlPageResult,
+    CrawlRequest,
+    CrawlScope,
+    CrawlSeedType,
+    CrawlSummary,
+    SourceType,
+)
+from docling_wrapper.config import REQUEST_TIMEOUT_SECONDS, SITEMAP_MAX_BYTES
+from docling_wrapper.services.chunker import chunk_markdown
+from docling_wrapper.services.html_converter import (
+    build_conversion_metadata,
+    convert_html_document_async,
+    retry_policy_from_options,
+    store_document_images,
+)
+from docling_wrapper.services.section_index import document_key
+from docling_wrapper.utils.deadline import Deadline
+from docling_wrapper.utils.http_client import fetch_url_content, normalize_url
+
+logger = logging.getLogger(__name__)
+
+# Limits on nested sitemap indexes, to bound the work a single seed can cause
+MAX_SITEMAP_DEPTH = 2
+MAX_SITEMAPS = 50
+
+_SKIPPED_LINK_SCHEMES = ("mailto:", "javascript:", "tel:", "data:", "ftp:")
+
+
+class Crawler:
+    """
+    Crawls pages breadth-first from the seeds of a crawl request.
+
+    Pages are fetched and converted by a pool of concurrent workers and the
+    results are yielded as soon as each page is done.
+    """
+
+    def __init__(self, crawl_request: CrawlRequest) -> None:
+        """
+        Prepare a crawl.
+
+        Args:
+            crawl_request: The crawl request
+
+        Raises:
+            ValueError: If an include or exclude pattern is not a valid regular expression,
+                or an option only available for single conversions was set
+        """
+        self.request = crawl_request
+        self.seed_url = normalize_url(crawl_request.seed)
+        options = crawl_request.options
+        if options:
+            _check_crawl_options(options)
+        self._headers = options.headers if options else None
+        self._verify_ssl = options.verify_ssl if options else False
+        self._retry_policy = retry_policy_from_options(options)
+        self._include = _compile_patterns(crawl_request.include_patterns)
+        self._exclude = _compile_patterns(crawl_request.exclude_patterns)
+        self._politeness = _HostPoliteness(crawl_request.per_host_delay_ms / 1000)
+        self._seen: Set[str] = set()
+        self._frontier: "asyncio.Queue[Tuple[str, int, Optional[str]]]" = (
+            asyncio.Queue()
+        )
+
+    async def seed_urls(self) -> List[str]:
+        """
+        Resolve the seed of the crawl into the URLs crawled at depth 0.
+
+        Returns:
+            The seed URLs
+
+        Raises:
+            ValueError: If the sitemap cannot be fetched or parsed
+        """
+        if self.request.seed_type == CrawlSeedType.PAGE:
+            return [self.seed_url]
+
+        urls: List[str] = []
+        pending = [(self.seed_url, 0)]
+        sitemaps_read = 0
+        while pending and sitemaps_read < MAX_SITEMAPS:
+            sitemap_url, level = pending.pop(0)
+            sitemaps_read += 1
+            try:
+                page_urls, child_sitemaps = await self._read_sitemap(sitemap_url)
+            except Exception as e:
+                if sitemap_url == self.seed_url:
+                    raise ValueError(
+                        f"Invalid or inaccessible URL: {sitemap_url} ({str(e)})"
+                    )
+                logger.warning(f"Skipping sitemap {sitemap_url}: {str(e)}")
+                continue
+            urls.extend(page_urls)
+            if level < MAX_SITEMAP_DEPTH:
+                pending.extend((child, level + 1) for child in child_sitemaps)
+
+        logger.info(f"Sitemap {self.seed_url} listed {len(urls)} URLs")
+        return urls
+
+    async def run(
+        self, seed_urls: List[str]
+    ) -> AsyncIterator[Union[CrawlPageResult, CrawlSummary]]:
+        """
+        Crawl from the seed URLs.
+
+        Args:
+            seed_urls: The URLs crawled at depth 0
+
+        Yields:
+            One result per page as soon as it is converted, then a summary
+        """
+        results: "asyncio.Queue[Optional[CrawlPageResult]]" = asyncio.Queue()
+        for url in seed_urls:
+            self._enqueue(url, 0, None)
+
+        workers = [
+            asyncio.create_task(self._worker(results))
+            for _ in range(self.request.concurrency)
+        ]
+
+        async def signal_done() -> None:
+            await self._frontier.join()
+            await results.put(None)
+
+        done_task = asyncio.create_task(signal_done())
+        converted = failed = 0
+        try:
+            while True:
+                result = await results.get()
+                if result is None:
+                    break
+                if result.success:
+                    converted += 1
+                else:
+                    failed += 1
+                yield result
+        finally:
+            # Stop outstanding work if the consumer went away early
+            for task in workers + [done_task]:
+                task.cancel()
+            await asyncio.gather(*workers, done_task, return_exceptions=True)
+
+        logger.info(
+            f"Crawl of {self.seed_url} finished: {converted} converted, {failed} failed"
+        )
+        yield CrawlSummary(
+            pages_converted=converted,
+            pages_failed=failed,
+            urls_discovered=len(self._seen),
+        )
+
+    async def _worker(
+        self, results: "asyncio.Queue[Optional[CrawlPageResult]]"
+    ) -> None:
+        while True:
+            url, depth, parent_url = await self._frontier.get()
+            try:
+                result, links = await self._crawl_page(url, depth, parent_url)
+                if depth < self.request.max_depth:
+                    for link in links:
+                        self._enqueue(link, depth + 1, url)
+                await results.put(result)
+            finally:
+                self._frontier.task_done()
+
+    async def _crawl_page(
+        self, url: str, depth: int, parent_url: Optional[str]
+    ) -> Tuple[CrawlPageResult, List[str]]:
+        """
+        Fetch and convert one page.
+
+        Returns:
+            Tuple containing:
+            - The page result
+            - The absolute URLs linked from the page
+        """
+        options = self.request.options
+        start_time = time.time()
+        try:
+            await self._politeness.wait(urlsplit(url).hostname or "")
+            deadline = self._fetch_deadline()
+            html_content, _, content_size = await fetch_url_content(
+                url,
+                self._headers,
+                verify_ssl=self._verify_ssl,
+                retry_policy=self._retry_policy,
+                deadline=deadline,
+            )
+            if not isinstance(html_content, str):
+                raise ValueError("Not an HTML page")
+
+            document = await convert_html_document_async(
+                html_content,
+                options,
+                deadline,
+                label=url,
+                document_key=document_key(url, self._headers),
+            )
+            await store_document_images(
+                document, options, url, self._headers, self._verify_ssl, deadline
+            )
+            processing_time_ms = int((time.time() - start_time) * 1000)
+            metadata = build_conversion_metadata(
+                document, SourceType.HTML_URL, processing_time_ms, content_size
+            )
+            chunks = None
+            if options and options.chunking:
+                chunks = chunk_markdown(document.markdown, options.chunking)
+        except Exception as e:
+            logger.warning(f"Crawl failed for {url}: {str(e)}")
+            return (
+                CrawlPageResult(
+                    url=url,
+                    depth=depth,
+                    parent_url=parent_url,
+                    success=False,
+                    error=str(e),
+                ),
+                [],
+            )
+
+        links = [_absolute_link(url, href) for href in document.analysis.links]
+        result = CrawlPageResult(
+            url=url,
+            depth=depth,
+            parent_url=parent_url,
+            success=True,
+            markdown=document.markdown,
+            metadata=metadata if options is None or options.include_metadata else None,
+            skipped=document.skipped,
+            duplicate_of=document.near_duplicate_of if document.skipped else None,
+            chunks=chunks,
+        )
+        return result, [link for link in links if link]
+
+    def _enqueue(self, url: str, depth: int, parent_url: Optional[str]) -> None:
+        url = normalize_url(url)
+        if url in self._seen or len(self._seen) >= self.request.max_pages:
+            return
+        if not self._in_scope(url):
+            return
+        self._seen.add(url)
+        self._frontier.put_nowait((url, depth, parent_url))
+
+    def _fetch_deadline(self) -> Deadline:
+        """
+        Start the deadline of one page or sitemap.
+
+        The timeout option, or the server default, bounds each page and
+        sitemap rather than the whole crawl.
+        """
+        options = self.request.options
+        if options and options.timeout_ms is not None:
+            return Deadline(options.timeout_ms / 1000)
+        return Deadline(REQUEST_TIMEOUT_SECONDS)
+
+    def _in_scope(self, url: str) -> bool:
+        parts = urlsplit(url)
+        seed_parts = urlsplit(self.seed_url)
+        if parts.scheme not in ("http", "https"):
+            return False
+
+        scope = self.request.scope
+        if scope == CrawlScope.SAME_HOST and parts.hostname != seed_parts.hostname:
+            return False
+        if scope == CrawlScope.SAME_DOMAIN:
+            domain = _strip_www(seed_parts.hostname or "")
+            host = parts.hostname or ""
+            if host != domain and not host.endswith("." + domain):
+                return False
+        if scope == CrawlScope.SAME_PREFIX:
+            # Sitemaps usually sit at the root, so their prefix is the whole host
+            prefix = self.seed_url.rsplit("/", 1)[0] + "/"
+            if not url.startswith(prefix):
+                return False
+
+        if self._include and not any(pattern.search(url) for pattern in self._include):
+            return False
+        return not any(pattern.search(url) for pattern in self._exclude)
+
+    async def _read_sitemap(self, sitemap_url: str) -> Tuple[List[str], List[str]]:
+        """
+        Fetch a sitemap or sitemap index.
+
+        Returns:
+            Tuple containing:
+            - The page URLs listed in a sitemap
+            - The sitemap URLs listed in a sitemap index
+
+        Raises:
+            ValueError: If the sitemap is too large or not well-formed XML, or
+                declares entities
+        """
+        content, _, _ = await fetch_url_content(
+            sitemap_url,
+            self._headers,
+            verify_ssl=self._verify_ssl,
+            retry_policy=self._retry_policy,
+            deadline=self._fetch_deadline(),
+        )
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        if content[:2] == b"\x1f\x8b":
+            content = _decompress_gzip(content, SITEMAP_MAX_BYTES)
+        elif len(content) > SITEMAP_MAX_BYTES:
+            raise ValueError(f"Sitemap exceeds {SITEMAP_MAX_BYTES} bytes")
+
+        # defusedxml rejects entity declarations, so entity expansion cannot blow up
+        root = ElementTree.fromstring(content)
+        locations = [
+            element.text.strip()
+            for element in root.iter()
+            if element.tag.endswith("loc") and element.text
+        ]
+        if root.tag.endswith("sitemapindex"):
+            return [], locations
+        return locations, []
+
+
+class _HostPoliteness:
+    """
+    Spaces the starts of requests to the same host by a minimum delay.
+    """
+
+    def __init__(self, delay_seconds: float) -> None:
+        self._delay = delay_seconds
+        self._next_start: Dict[str, float] = {}
+
+    async def wait(self, host: str) -> None:
+        now = time.monotonic()
+        start = max(now, self._next_start.get(host, 0.0))
+        # Reserve the slot before sleeping so concurrent workers queue up behind it
+        self._next_start[host] = start + self._delay
+        if start > now:
+            await asyncio.sleep(start - now)
+
+
+def _check_crawl_options(options: ConversionOptions) -> None:
+    """
+    Reject options the crawler would otherwise silently ignore.
+
+    Raises:
+        ValueError: If an option only available for single conversions is set
+    """
+    if options.profile:
+        raise ValueError("Profiling is only available for single conversions")
+    if options.diff_sections or options.changed_sections_only:
+        raise ValueError("Section diffs are only available for single conversions")
+    # Crawled pages are always fetched fresh, so only asking for the cache is refused
+    if "use_cache" in options.model_fields_set and options.use_cache:
+        raise ValueError("The result cache is only available for single conversions")
+
+
+def _decompress_gzip(content: bytes, max_bytes: int) -> bytes:
+    """
+    Decompress gzip data, refusing to produce more than max_bytes.
+
+    Raises:
+        ValueError: If the data is not valid gzip or decompresses to more than max_bytes
+    """
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    try:
+        data = decompressor.decompress(content, max_bytes + 1)
+    except zlib.error as e:
+        raise ValueError(f"Invalid gzip data: {str(e)}")
+    if len(data) > max_bytes or decompressor.unconsumed_tail:
+        raise ValueError(f"Sitemap exceeds {max_bytes} bytes when decompressed")
+    return data
+
+
+def _compile_patterns(patterns: Optional[List[str]]) -> List[re.Pattern]:
+    compiled = []
+    for pattern in patterns or []:
+        try:
+            compiled.append(re.compile(pattern))
+        except re.error as e:
+            raise ValueError(f"Invalid URL pattern {pattern!r}: {str(e)}")
+    return compiled
+
+
+def _absolute_link(page_url: str, href: str) -> Optional[str]:
+    if href.startswith("#") or href.lower().startswith(_SKIPPED_LINK_SCHEMES):
+        return None
+    try:
+        return normalize_url(urljoin(page_url, href))
+    except ValueError:
+        return None
+
+
+def _strip_www(host: str) -> str:
+    return host[4:] if host.startswith("www.") else host
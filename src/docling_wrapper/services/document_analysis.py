@@ -0,0 +1,185 @@
+"""
+Single-pass analysis of HTML documents.
+
+The document is parsed once and everything the service needs to know about it
+(title, language, meta description, canonical URL, heading outline, links,
+images, word count and readable text) is collected in the same pass.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Elements whose text content is not part of the readable document
+NON_CONTENT_TAGS = {"script", "style", "noscript", "template", "svg"}
+
+HEADING_TAGS = {"h1": 1, "h2": 2, "h3": 3, "h4": 4, "h5": 5, "h6": 6}
+
+# Characters fed to the parser between cancellation checks
+FEED_SIZE = 256 * 1024
+
+
+@dataclass
+class DocumentAnalysis:
+    """
+    Result of analysing an HTML document.
+    """
+
+    title: Optional[str] = None
+    language: Optional[str] = None
+    description: Optional[str] = None
+    canonical_url: Optional[str] = None
+    headings: List[Tuple[int, str]] = field(default_factory=list)
+    links: List[str] = field(default_factory=list)
+    image_count: int = 0
+    word_count: int = 0
+    # Readable text of the document, without title, scripts and styles
+    text: str = ""
+
+    @property
+    def link_count(self) -> int:
+        """
+        Number of hyperlinks found in the document.
+        """
+        return len(self.links)
+
+
+class _AnalysisParser(HTMLParser):
+    """
+    HTML parser that fills a DocumentAnalysis while feeding the document.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.analysis = DocumentAnalysis()
+        self._non_content_depth = 0
+        self._svg_depth = 0
+        self._in_title = False
+        self._title_parts: List[str] = []
+        self._heading_level: Optional[int] = None
+        self._heading_parts: List[str] = []
+        self._text_parts: List[str] = []
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        attributes: Dict[str, str] = {name: value or "" for name, value in attrs}
+
+        if tag == "html":
+            if attributes.get("lang") and self.analysis.language is None:
+                self.analysis.language = attributes["lang"].strip()
+        elif tag == "title":
+            # Titles inside inline SVG graphics are not the document title
+            if self.analysis.title is None and not self._svg_depth:
+                self._in_title = True
+                self._title_parts = []
+        elif tag == "meta":
+            self._handle_meta(attributes)
+        elif tag == "link":
+            rel = attributes.get("rel", "").lower().split()
+            if (
+                "canonical" in rel
+                and attributes.get("href")
+                and self.analysis.canonical_url is None
+            ):
+                self.analysis.canonical_url = attributes["href"].strip()
+        elif tag == "a":
+            if attributes.get("href"):
+                self.analysis.links.append(attributes["href"].strip())
+        elif tag == "img":
+            self.analysis.image_count += 1
+        elif tag in HEADING_TAGS:
+            self._heading_level = HEADING_TAGS[tag]
+            self._heading_parts = []
+
+        if tag in NON_CONTENT_TAGS:
+            self._non_content_depth += 1
+            if tag == "svg":
+                self._svg_depth += 1
+
+    def handle_startendtag(
+        self, tag: str, attrs: List[Tuple[str, Optional[str]]]
+    ) -> None:
+        # Self-closing tags never open a scope, so only record them
+        if tag in NON_CONTENT_TAGS or tag in HEADING_TAGS or tag == "title":
+            return
+        self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == "title" and self._in_title:
+            self._in_title = False
+            self.analysis.title = _collapse_whitespace("".join(self._title_parts))
+        elif tag in HEADING_TAGS and self._heading_level is not None:
+            text = _collapse_whitespace("".join(self._heading_parts))
+            if text:
+                self.analysis.headings.append((self._heading_level, text))
+            self._heading_level = None
+
+        if tag in NON_CONTENT_TAGS and self._non_content_depth > 0:
+            self._non_content_depth -= 1
+            if tag == "svg" and self._svg_depth > 0:
+                self._svg_depth -= 1
+
+    def handle_data(self, data: str) -> None:
+        if self._in_title:
+            self._title_parts.append(data)
+            return
+        if self._non_content_depth:
+            return
+        if self._heading_level is not None:
+            self._heading_parts.append(data)
+        self.analysis.word_count += len(data.split())
+        self._text_parts.append(data)
+
+    def _handle_meta(self, attributes: Dict[str, str]) -> None:
+        name = (attributes.get("name") or attributes.get("property") or "").lower()
+        content = attributes.get("content", "").strip()
+        if name in ("description", "og:description") and content:
+            # Prefer the plain description over the Open Graph one
+            if self.analysis.description is None or name == "description":
+                self.analysis.description = content
+        elif attributes.get("http-equiv", "").lower() == "content-language" and content:
+            if self.analysis.language is None:
+                self.analysis.language = content
+
+
+def _collapse_whitespace(text: str) -> str:
+    return " ".join(text.split())
+
+
+def analyze_html(
+    html_content: str, check_cancelled: Optional[Callable[[], None]] = None
+) -> DocumentAnalysis:
+    """
+    Analyse HTML content in a single parse.
+
+    Args:
+        html_content: The HTML content to analyse
+        check_cancelled: Optional callback run between parts of the document;
+            it raises to abort an analysis that is no longer needed
+
+    Returns:
+        The collected document analysis
+    """
+    parser = _AnalysisParser()
+    try:
+        for start in range(0, len(html_content), FEED_SIZE):
+            if check_cancelled:
+                check_cancelled()
+            parser.feed(html_content[start : start + FEED_SIZE])
+        parser.close()
+    except Exception as e:
+        if check_cancelled:
+            check_cancelled()
+        # HTMLParser is lenient, but never let analysis break a conversion
+        logger.warning(f"Document analysis stopped early: {str(e)}")
+
+    analysis = parser.analysis
+    analysis.text = _collapse_whitespace(" ".join(parser._text_parts))
+    if parser._in_title and analysis.title is None:
+        # Unterminated <title>, keep what was collected
+        analysis.title = _collapse_whitespace("".join(parser._title_parts)) or None
+    if analysis.title == "":
+        analysis.title = None
+    return analysis
@@ -1,36 +1,107 @@
 """
 Service for converting HTML to Markdown using Docling.
 """
+
+import hashlib
 import logging
-import sys
+import re
 import time
-from typing import Dict, Optional, Tuple
-
-# Try to import from docling, if not available, use our mock implementation
-try:
-    # First check if docling module is available
-    import docling
-    
-    # Then check if it has the convert_html_to_markdown function
-    if hasattr(docling, 'convert_html_to_markdown'):
-        from docling import convert_html_to_markdown
-        print("Using actual Docling library for HTML conversion")
-    else:
-        # Docling exists but doesn't have the function we need
-        print("Docling library found but missing convert_html_to_markdown function, using mock implementation")
-        from docling_wrapper.utils.mock_docling import convert_html_to_markdown
-except ImportError:
-    print("Docling library not found, using mock implementation for HTML conversion")
-    from docling_wrapper.utils.mock_docling import convert_html_to_markdown
-
-from docling_wrapper.api.models import ConversionMetadata, SourceType
-from docling_wrapper.utils.http_client import fetch_url_content, is_valid_url
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from docling_wrapper.api.models import (
+    ContentFilter,
+    ConversionMetadata,
+    ConversionOptions,
+    HeadingInfo,
+    ImageInfo,
+    SourceType,
+)
+from docling_wrapper.config import SEGMENT_MIN_DOCUMENT_BYTES, SEGMENT_TARGET_BYTES
+from docling_wrapper.services.backends import select_backend
+from docling_wrapper.services.document_analysis import DocumentAnalysis, analyze_html
+from docling_wrapper.services.images import localize_images
+from docling_wrapper.services.near_duplicates import (
+    format_fingerprint,
+    html_text,
+    near_duplicate_index,
+    simhash,
+    similarity,
+)
+from docling_wrapper.services.segmenter import (
+    convert_segments,
+    segmentation_enabled,
+    split_html,
+)
+from docling_wrapper.utils.deadline import Deadline, RequestCancelled
+from docling_wrapper.utils.executor import run_conversion
+from docling_wrapper.utils.http_client import (
+    RetryPolicy,
+    fetch_url_content,
+    is_valid_url,
+    normalize_url,
+)
+from docling_wrapper.utils.metrics import metrics
+from docling_wrapper.utils.profiling import profile_store
 
 logger = logging.getLogger(__name__)
 
+# Patterns used by the content filter
+_COMMENT_PATTERN = re.compile(r"<!--.*?-->", re.DOTALL)
+_NON_CONTENT_PATTERN = re.compile(
+    r"<(script|style|noscript|svg|template)\b[^>]*>.*?</\1\s*>",
+    re.IGNORECASE | re.DOTALL,
+)
+_BOILERPLATE_PATTERN = re.compile(
+    r"<(nav|footer|aside)\b[^>]*>.*?</\1\s*>", re.IGNORECASE | re.DOTALL
+)
+# Forms cannot nest; many CMS and ASP.NET pages wrap their whole body in one
+_FORM_PATTERN = re.compile(r"<form\b[^>]*>.*?</form\s*>", re.IGNORECASE | re.DOTALL)
+_CONTENT_TAG_PATTERN = re.compile(
+    r"<(h[1-6]|p|article|main|section|table|ul|ol)\b", re.IGNORECASE
+)
+_PAGE_HEADER_PATTERN = re.compile(
+    r"<header\b[^>]*>.*?</header\s*>", re.IGNORECASE | re.DOTALL
+)
+_BODY_PATTERN = re.compile(r"<body\b[^>]*>(.*)</body\s*>", re.IGNORECASE | re.DOTALL)
+# Main region candidates in order of preference; only articles compete on size
+_MAIN_REGION_PATTERNS = (
+    (re.compile(r"<(main)\b[^>]*>", re.IGNORECASE), False),
+    (
+        re.compile(
+            r"<([a-z][a-z0-9]*)\b[^>]*\brole\s*=\s*[\"']?main\b[^>]*>", re.IGNORECASE
+        ),
+        False,
+    ),
+    (re.compile(r"<(article)\b[^>]*>", re.IGNORECASE), True),
+)
+
+
+@dataclass
+class ConvertedDocument:
+    """
+    Result of converting an HTML document.
+    """
+
+    markdown: str
+    analysis: DocumentAnalysis
+    bytes_removed: Optional[int] = None
+    profile_id: Optional[str] = None
+    images: Optional[List[ImageInfo]] = None
+    images_failed: Optional[int] = None
+    backend: Optional[str] = None
+    fingerprint: Optional[str] = None
+    near_duplicate_of: Optional[str] = None
+    similarity: Optional[float] = None
+    skipped: bool = False
+
 
 async def convert_html_url_to_markdown(
-    url: str, headers: Optional[Dict[str, str]] = None, verify_ssl: bool = False
+    url: str,
+    headers: Optional[Dict[str, str]] = None,
+    verify_ssl: bool = False,
+    options: Optional[ConversionOptions] = None,
+    deadline: Optional[Deadline] = None,
 ) -> Tuple[str, ConversionMetadata]:
     """
     Convert HTML from a URL to Markdown.
@@ -39,6 +110,8 @@ async def convert_html_url_to_markdown(
         url: The URL to fetch HTML from
         headers: Optional headers to include in the request
         verify_ssl: Whether to verify SSL certificates (default: False)
+        options: Optional conversion options
+        deadline: Optional deadline bounding the fetch and the conversion
 
     Returns:
         Tuple containing:
@@ -48,68 +121,485 @@ async def convert_html_url_to_markdown(
     Raises:
         ValueError: If the URL is invalid
         httpx.HTTPError: If the request fails
+        RequestCancelled: If the deadline passed or the request was cancelled
     """
     # Validate URL
-    if not await is_valid_url(url, verify_ssl=verify_ssl):
+    if not await is_valid_url(url, verify_ssl=verify_ssl, deadline=deadline):
         raise ValueError(f"Invalid or inaccessible URL: {url}")
 
     start_time = time.time()
-    
+
     # Fetch HTML content
-    html_content, response_headers, content_size = await fetch_url_content(url, headers, verify_ssl=verify_ssl)
-    
-    # Extract title from HTML if available
-    title = extract_title_from_html(html_content)
-    
-    # Convert HTML to Markdown
-    markdown_content = convert_html_to_markdown(html_content)
-    
+    html_content, response_headers, content_size = await fetch_url_content(
+        url,
+        headers,
+        verify_ssl=verify_ssl,
+        retry_policy=retry_policy_from_options(options),
+        deadline=deadline,
+    )
+
+    # Analyse and convert the document off the event loop
+    document = await convert_html_document_async(
+        html_content, options, deadline, label=url, document_key=normalize_url(url)
+    )
+    await store_document_images(document, options, url, headers, verify_ssl, deadline)
+
     # Calculate processing time
     processing_time_ms = int((time.time() - start_time) * 1000)
-    
+
     # Create metadata
-    metadata = ConversionMetadata(
-        title=title,
-        source_type=SourceType.HTML_URL,
-        processing_time_ms=processing_time_ms,
-        file_size_bytes=content_size,
+    metadata = build_conversion_metadata(
+        document, SourceType.HTML_URL, processing_time_ms, content_size
     )
-    
-    return markdown_content, metadata
 
+    return document.markdown, metadata
 
-async def convert_html_source_to_markdown(html_content: str) -> Tuple[str, ConversionMetadata]:
+
+async def convert_html_source_to_markdown(
+    html_content: str,
+    options: Optional[ConversionOptions] = None,
+    deadline: Optional[Deadline] = None,
+) -> Tuple[str, ConversionMetadata]:
     """
     Convert HTML source to Markdown.
 
     Args:
         html_content: The HTML content to convert
+        options: Optional conversion options
+        deadline: Optional deadline bounding the conversion
 
     Returns:
         Tuple containing:
         - The converted Markdown content
         - Metadata about the conversion
+
+    Raises:
+        RequestCancelled: If the deadline passed or the request was cancelled
     """
     start_time = time.time()
-    
-    # Extract title from HTML if available
-    title = extract_title_from_html(html_content)
-    
-    # Convert HTML to Markdown
-    markdown_content = convert_html_to_markdown(html_content)
-    
+
+    # Analyse and convert the document off the event loop
+    document = await convert_html_document_async(
+        html_content, options, deadline, label="html_source"
+    )
+    # Relative image links can only be resolved if the page names its URL
+    await store_document_images(
+        document,
+        options,
+        document.analysis.canonical_url,
+        verify_ssl=options.verify_ssl if options else False,
+        deadline=deadline,
+    )
+
     # Calculate processing time
     processing_time_ms = int((time.time() - start_time) * 1000)
-    
+
     # Create metadata
-    metadata = ConversionMetadata(
-        title=title,
-        source_type=SourceType.HTML_SOURCE,
+    metadata = build_conversion_metadata(
+        document,
+        SourceType.HTML_SOURCE,
+        processing_time_ms,
+        len(html_content.encode("utf-8")),
+    )
+
+    return document.markdown, metadata
+
+
+async def store_document_images(
+    document: ConvertedDocument,
+    options: Optional[ConversionOptions],
+    base_url: Optional[str],
+    headers: Optional[Dict[str, str]] = None,
+    verify_ssl: bool = False,
+    deadline: Optional[Deadline] = None,
+) -> None:
+    """
+    Download the images of a converted document into the image store, if requested.
+
+    The image links in the document's Markdown are rewritten to the stored
+    copies and the stored images are recorded on the document.
+
+    Args:
+        document: The converted document, updated in place
+        options: Optional conversion options; nothing happens unless preserve_images is set
+        base_url: URL relative image links are resolved against, if known
+        headers: Optional headers to include in requests to the document's host
+        verify_ssl: Whether to verify SSL certificates
+        deadline: Optional deadline bounding the downloads
+    """
+    if not (options and options.preserve_images):
+        return
+    document.markdown, document.images, document.images_failed = await localize_images(
+        document.markdown, base_url, headers, verify_ssl=verify_ssl, deadline=deadline
+    )
+
+
+def retry_policy_from_options(
+    options: Optional[ConversionOptions],
+) -> Optional[RetryPolicy]:
+    """
+    Build the fetch retry policy requested by the conversion options.
+
+    Args:
+        options: Optional conversion options
+
+    Returns:
+        The retry policy, or None to use the server defaults
+    """
+    if options is None or (
+        options.max_fetch_attempts is None and options.hedge_fetch is None
+    ):
+        return None
+    policy = RetryPolicy()
+    if options.max_fetch_attempts is not None:
+        policy.max_attempts = options.max_fetch_attempts
+    if options.hedge_fetch is not None:
+        policy.hedge = options.hedge_fetch
+    return policy
+
+
+async def convert_html_document_async(
+    html_content: str,
+    options: Optional[ConversionOptions] = None,
+    deadline: Optional[Deadline] = None,
+    label: str = "",
+    document_key: Optional[str] = None,
+) -> ConvertedDocument:
+    """
+    Convert HTML content in the conversion thread pool.
+
+    If the options ask for profiling, the conversion runs under cProfile and
+    the id of the stored profile is set on the result.
+
+    Args:
+        html_content: The HTML content to convert
+        options: Optional conversion options
+        deadline: Optional deadline bounding the conversion
+        label: Description of the document for the stored profile
+        document_key: Reference of the document for near-duplicate detection
+
+    Returns:
+        The converted document
+
+    Raises:
+        RequestCancelled: If the deadline passed or the request was cancelled
+        ProfilerBusy: If profiling was requested while another conversion is profiled
+    """
+    if not (options and options.profile):
+        return await run_conversion(
+            convert_html_document,
+            html_content,
+            options,
+            deadline,
+            document_key=document_key,
+            deadline=deadline,
+        )
+
+    # The generic result of profile does not flow through run_conversion
+    profiled: Tuple[ConvertedDocument, str] = await run_conversion(
+        profile_store.profile,
+        label,
+        convert_html_document,
+        html_content,
+        options,
+        deadline,
+        document_key=document_key,
+        deadline=deadline,
+    )
+    document, profile_id = profiled
+    document.profile_id = profile_id
+    return document
+
+
+def convert_html_document(
+    html_content: str,
+    options: Optional[ConversionOptions] = None,
+    deadline: Optional[Deadline] = None,
+    parallel_segments: bool = True,
+    document_key: Optional[str] = None,
+) -> ConvertedDocument:
+    """
+    Analyse HTML content once and convert it to Markdown.
+
+    The analysis runs on the original document so that head metadata such as
+    the title survives the content filter.
+
+    The conversion engine is chosen by the mode in the options. Documents of
+    at least SEGMENT_MIN_DOCUMENT_BYTES are split into segments that are
+    converted in parallel processes, if more than one is configured and the
+    engine supports it.
+
+    The text to convert is fingerprinted and compared with recently converted
+    documents. A near-duplicate is flagged, or returned without Markdown and
+    marked skipped if the options ask to skip near-duplicates; skipped
+    documents are not added to the index.
+
+    Args:
+        html_content: The HTML content to convert
+        options: Optional conversion options
+        deadline: Optional deadline, checked between the steps of the conversion
+        parallel_segments: Whether large documents may be split over the segment
+            process pool; callers that already convert in parallel processes turn it off
+        document_key: Reference of the document for near-duplicate detection, such
+            as its normalised URL; derived from the content if omitted
+
+    Returns:
+        The converted document
+
+    Raises:
+        RequestCancelled: If the deadline passed or the request was cancelled
+        BackendUnavailable: If the requested mode needs an engine that is not installed
+        ValueError: If the main_content filter left no text to convert
+    """
+    check_cancelled = deadline.check if deadline else None
+    analysis = analyze_html(html_content, check_cancelled)
+
+    bytes_removed = None
+    content_filter = options.content_filter if options else ContentFilter.NONE
+    if content_filter != ContentFilter.NONE:
+        html_content, bytes_removed = strip_boilerplate(
+            html_content, main_content=content_filter == ContentFilter.MAIN_CONTENT
+        )
+
+    document = ConvertedDocument(
+        markdown="", analysis=analysis, bytes_removed=bytes_removed
+    )
+    fingerprint = None
+    # Reference and fingerprint to index once the document is converted
+    indexed: Optional[Tuple[str, int]] = None
+    if near_duplicate_index.enabled:
+        # The analysis text is that of the unfiltered document
+        fingerprint = simhash(
+            analysis.text if bytes_removed is None else html_text(html_content)
+        )
+    if fingerprint is not None:
+        document.fingerprint = format_fingerprint(fingerprint)
+        reference = document_key or _content_reference(analysis, html_content)
+        indexed = (reference, fingerprint)
+        match = near_duplicate_index.find(fingerprint, exclude=reference)
+        if match is not None:
+            duplicate_fingerprint, distance = match
+            document.near_duplicate_of = format_fingerprint(duplicate_fingerprint)
+            document.similarity = similarity(distance)
+            metrics.increment("near_duplicates_found_total")
+            logger.info(
+                f"Document is a near-duplicate of {document.near_duplicate_of} "
+                f"(similarity {document.similarity:.3f})"
+            )
+            if options and options.skip_near_duplicates:
+                metrics.increment("near_duplicates_skipped_total")
+                document.skipped = True
+                return document
+
+    document_bytes = _utf8_length(html_content)
+    backend = select_backend(options.mode if options else None, document_bytes)
+
+    segments = [html_content]
+    segment_function = backend.segment_function if parallel_segments else None
+    if (
+        segment_function is not None
+        and segmentation_enabled()
+        and document_bytes >= SEGMENT_MIN_DOCUMENT_BYTES
+    ):
+        segments = split_html(html_content, SEGMENT_TARGET_BYTES)
+
+    # Engines take the pre-extracted title so they do not scan for it again
+    title = analysis.title or ""
+    start_time = time.perf_counter()
+    try:
+        if segment_function is not None and len(segments) > 1:
+            logger.info(f"Converting document in {len(segments)} segments")
+            # Only the first segment carries the title
+            markdown_content = convert_segments(
+                segment_function,
+                segments,
+                {"title": title},
+                {"title": ""},
+                check_cancelled,
+            )
+        else:
+            markdown_content = backend.convert(html_content, title, check_cancelled)
+    except RequestCancelled:
+        raise
+    except Exception:
+        metrics.increment("conversion_failures_total", backend=backend.name)
+        raise
+    metrics.increment("conversions_total", backend=backend.name)
+    metrics.observe(
+        "conversion_duration_seconds",
+        time.perf_counter() - start_time,
+        backend=backend.name,
+    )
+    metrics.observe("conversion_document_bytes", document_bytes, backend=backend.name)
+
+    if indexed is not None:
+        near_duplicate_index.add(*indexed)
+    document.markdown = markdown_content
+    document.backend = backend.name
+    return document
+
+
+def _content_reference(analysis: DocumentAnalysis, html_content: str) -> str:
+    """
+    Build the near-duplicate reference of a document converted without a known URL.
+
+    Args:
+        analysis: Analysis of the document
+        html_content: The HTML content to convert
+
+    Returns:
+        The normalised canonical URL if the page names one, else a hash of the content
+    """
+    canonical_url = analysis.canonical_url
+    if canonical_url and canonical_url.startswith(("http://", "https://")):
+        return normalize_url(canonical_url)
+    return "sha256:" + hashlib.sha256(html_content.encode("utf-8")).hexdigest()
+
+
+def strip_boilerplate(html_content: str, main_content: bool = False) -> Tuple[str, int]:
+    """
+    Remove markup that never contributes to the converted document.
+
+    Scripts, styles, noscript blocks, inline SVG, templates and comments are
+    always dropped. With main_content, only the main article region is kept
+    (<main>, role="main" or the largest <article>), falling back to the body
+    without the page header. Navigation, footers, sidebars and forms without
+    headings, paragraphs, lists or tables are removed from the kept region.
+
+    Args:
+        html_content: The HTML content to filter
+        main_content: Whether to isolate the main article region
+
+    Returns:
+        Tuple containing:
+        - The filtered HTML content
+        - The number of bytes removed
+
+    Raises:
+        ValueError: If main_content removed all text of a document that has text
+    """
+    filtered = _COMMENT_PATTERN.sub("", html_content)
+    filtered = _NON_CONTENT_PATTERN.sub("", filtered)
+
+    if main_content:
+        body_match = _BODY_PATTERN.search(filtered)
+        body = body_match.group(1) if body_match else filtered
+        region = _find_main_region(filtered)
+        if region is None:
+            # Without a marked-up main region the page header is boilerplate too,
+            # inside an article it usually carries the article heading
+            region = _PAGE_HEADER_PATTERN.sub("", body)
+        region = _BOILERPLATE_PATTERN.sub("", region)
+        region = _FORM_PATTERN.sub(_strip_form_without_content, region)
+        if not html_text(region).strip() and html_text(body).strip():
+            raise ValueError(
+                "The main_content filter found no text on the page; "
+                "use content_filter 'clean' or 'none' to convert it"
+            )
+        filtered = region
+
+    bytes_removed = _utf8_length(html_content) - _utf8_length(filtered)
+    logger.info(f"Content filter removed {bytes_removed} bytes of markup")
+    return filtered, bytes_removed
+
+
+def _strip_form_without_content(match: re.Match) -> str:
+    # Search boxes and sign-up forms are boilerplate, page-wide forms are not
+    form = match.group(0)
+    return form if _CONTENT_TAG_PATTERN.search(form) else ""
+
+
+def _find_main_region(html_content: str) -> Optional[str]:
+    """
+    Find the main article region of an HTML document.
+
+    Args:
+        html_content: The HTML content to search
+
+    Returns:
+        The markup of the main region if found, None otherwise
+    """
+    for pattern, pick_largest in _MAIN_REGION_PATTERNS:
+        candidates = []
+        for match in pattern.finditer(html_content):
+            element = _extract_element(html_content, match)
+            if element:
+                candidates.append(element)
+                if not pick_largest:
+                    break
+        if candidates:
+            return max(candidates, key=len)
+    return None
+
+
+def _extract_element(html_content: str, start_match: re.Match) -> Optional[str]:
+    """
+    Extract an element including its children, honouring nested tags of the same name.
+
+    Args:
+        html_content: The HTML content containing the element
+        start_match: Match of the element's start tag, with the tag name in group 1
+
+    Returns:
+        The element's markup if its end tag is found, None otherwise
+    """
+    tag = start_match.group(1)
+    tag_pattern = re.compile(rf"<(/?){tag}\b[^>]*>", re.IGNORECASE)
+    depth = 0
+    for match in tag_pattern.finditer(html_content, start_match.start()):
+        depth += -1 if match.group(1) else 1
+        if depth == 0:
+            return html_content[start_match.start() : match.end()]
+    return None
+
+
+def _utf8_length(text: str) -> int:
+    return len(text) if text.isascii() else len(text.encode("utf-8"))
+
+
+def build_conversion_metadata(
+    document: ConvertedDocument,
+    source_type: SourceType,
+    processing_time_ms: int,
+    file_size_bytes: Optional[int],
+) -> ConversionMetadata:
+    """
+    Build the conversion metadata from a converted document.
+
+    Args:
+        document: The converted document
+        source_type: The type of source that was converted
+        processing_time_ms: Time taken to process the document in ms
+        file_size_bytes: Size of the source document in bytes
+
+    Returns:
+        The conversion metadata
+    """
+    analysis = document.analysis
+    return ConversionMetadata(
+        title=analysis.title,
+        source_type=source_type,
         processing_time_ms=processing_time_ms,
-        file_size_bytes=len(html_content.encode('utf-8')),
+        file_size_bytes=file_size_bytes,
+        language=analysis.language,
+        description=analysis.description,
+        canonical_url=analysis.canonical_url,
+        headings=[
+            HeadingInfo(level=level, text=text) for level, text in analysis.headings
+        ],
+        link_count=analysis.link_count,
+        image_count=analysis.image_count,
+        word_count=analysis.word_count,
+        bytes_removed=document.bytes_removed,
+        images=document.images,
+        images_failed=document.images_failed,
+        profile_id=document.profile_id,
+        backend=document.backend,
+        fingerprint=document.fingerprint,
+        near_duplicate_of=document.near_duplicate_of,
+        similarity=document.similarity,
+        skipped=document.skipped,
     )
-    
-    return markdown_content, metadata
 
 
 def extract_title_from_html(html_content: str) -> Optional[str]:
@@ -122,9 +612,4 @@ def extract_title_from_html(html_content: str) -> Optional[str]:
     Returns:
         The title if found, None otherwise
     """
-    # Simple regex-based title extraction
-    import re
-    title_match = re.search(r"<title>(.*?)</title>", html_content, re.IGNORECASE | re.DOTALL)
-    if title_match:
-        return title_match.group(1).strip()
-    return None
+    return analyze_html(html_content).title
@@ -0,0 +1,399 @@
+"""
+Service for downloading the images of converted documents into a content-addressed store.
+
+Images are stored once per SHA-256 of their content, so the same logo or
+icon referenced by thousands of pages takes up one file. Image links in the
+converted Markdown are rewritten to stable references into the store.
+"""
+
+import asyncio
+import base64
+import binascii
+import functools
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import unquote_to_bytes, urljoin, urlsplit
+
+from docling_wrapper.api.models import ImageInfo
+from docling_wrapper.config import (
+    IMAGE_BASE_URL,
+    IMAGE_FETCH_CONCURRENCY,
+    IMAGE_MAX_BYTES,
+    IMAGE_MAX_PER_DOCUMENT,
+    IMAGE_STORE_DIR,
+    IMAGE_URL_CACHE_SIZE,
+)
+from docling_wrapper.utils.deadline import Deadline, RequestCancelled
+from docling_wrapper.utils.http_client import fetch_limited_content
+from docling_wrapper.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# File extensions of the accepted image types. SVG is not accepted: it can
+# carry scripts, which would run on this service's origin.
+IMAGE_EXTENSIONS = {
+    "image/avif": ".avif",
+    "image/bmp": ".bmp",
+    "image/gif": ".gif",
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/tiff": ".tiff",
+    "image/webp": ".webp",
+    "image/x-icon": ".ico",
+    "image/vnd.microsoft.icon": ".ico",
+}
+
+# Stored image names are the content hash and an extension
+IMAGE_NAME_PATTERN = re.compile(r"^[0-9a-f]{64}\.[a-z]{3,4}$")
+
+_MARKDOWN_IMAGE_PATTERN = re.compile(
+    r"!\[([^\]]*)\]\(\s*(<[^>]*>|[^)\s]+)(\s+\"[^\"]*\")?\s*\)"
+)
+_DATA_URI_PATTERN = re.compile(r"^data:([\w/+.-]+)((?:;[^,;]*)*),(.*)$", re.DOTALL)
+
+
+@dataclass
+class StoredImage:
+    """
+    An image in the store.
+    """
+
+    digest: str
+    content_type: str
+    size_bytes: int
+
+    @property
+    def name(self) -> str:
+        return self.digest + IMAGE_EXTENSIONS[self.content_type]
+
+    @property
+    def reference(self) -> str:
+        return f"{IMAGE_BASE_URL}/{self.name}"
+
+
+class ImageStore:
+    """
+    Content-addressed image files on disk, plus a cache of image URLs already stored.
+    """
+
+    def __init__(
+        self, root: str = IMAGE_STORE_DIR, url_cache_size: int = IMAGE_URL_CACHE_SIZE
+    ):
+        self.root = root
+        self.url_cache_size = url_cache_size
+        # Keyed by URL and the headers it was fetched with, see _download_key
+        self._by_url: "OrderedDict[str, StoredImage]" = OrderedDict()
+        self._downloads: Dict[str, "asyncio.Task[StoredImage]"] = {}
+
+    def path(self, name: str) -> str:
+        """
+        Get the file path of a stored image.
+
+        Args:
+            name: Name of the image, its content hash and extension
+
+        Returns:
+            The path, fanned out over subdirectories by hash prefix
+        """
+        return os.path.join(self.root, name[:2], name)
+
+    def put(self, content: bytes, content_type: str) -> StoredImage:
+        """
+        Store image content unless an identical image is stored already.
+
+        The file is written to a temporary name and renamed into place, so
+        readers never see a partial image.
+
+        Args:
+            content: The image data
+            content_type: MIME type of the image
+
+        Returns:
+            The stored image
+        """
+        image = StoredImage(
+            digest=hashlib.sha256(content).hexdigest(),
+            content_type=content_type,
+            size_bytes=len(content),
+        )
+        path = self.path(image.name)
+        if os.path.exists(path):
+            metrics.increment("image_store_deduplicated_total")
+            return image
+
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as temp_file:
+                temp_file.write(content)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+        metrics.increment("image_store_writes_total")
+        return image
+
+    async def fetch(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        verify_ssl: bool = False,
+        deadline: Optional[Deadline] = None,
+    ) -> StoredImage:
+        """
+        Store the image at a URL, downloading it only if it is not known yet.
+
+        Concurrent requests for the same URL and headers share one download,
+        which continues if the request that started it is cancelled. Images
+        fetched with other headers, such as another client's credentials, are
+        neither shared nor served from the URL cache.
+
+        Args:
+            url: Absolute URL or data URI of the image
+            headers: Optional headers to include in the request
+            verify_ssl: Whether to verify SSL certificates
+            deadline: Optional deadline bounding the download
+
+        Returns:
+            The stored image
+
+        Raises:
+            ValueError: If the content is not an accepted image or too large,
+                or a shared download was cancelled
+            httpx.HTTPError: If the download fails
+            RequestCancelled: If the deadline passed or the request was cancelled
+        """
+        key = _download_key(url, headers, verify_ssl)
+        cached = self._by_url.get(key)
+        if cached is not None and os.path.exists(self.path(cached.name)):
+            self._by_url.move_to_end(key)
+            metrics.increment("image_url_cache_hits_total")
+            return cached
+
+        task = self._downloads.get(key)
+        if task is None:
+            # The download runs as its own task, so cancelling the request
+            # that started it does not cancel it for the others waiting
+            task = asyncio.ensure_future(
+                self._store(key, url, headers, verify_ssl, deadline)
+            )
+            self._downloads[key] = task
+            task.add_done_callback(functools.partial(self._download_done, key))
+            owner = True
+        else:
+            owner = False
+
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            current = asyncio.current_task()
+            if not task.cancelled() or (current is not None and current.cancelling()):
+                raise
+            # The shared download was cancelled, not this request
+            raise ValueError(f"Download of {url[:200]} was cancelled")
+        except RequestCancelled:
+            if owner:
+                raise
+            # The deadline of the request that started the download passed
+            raise ValueError(f"Download of {url[:200]} was cancelled")
+
+    async def _store(
+        self,
+        key: str,
+        url: str,
+        headers: Optional[Dict[str, str]],
+        verify_ssl: bool,
+        deadline: Optional[Deadline],
+    ) -> StoredImage:
+        content, content_type = await self._download(url, headers, verify_ssl, deadline)
+        image = await asyncio.to_thread(self.put, content, content_type)
+        self._remember(key, image)
+        return image
+
+    def _download_done(self, key: str, task: "asyncio.Task[StoredImage]") -> None:
+        if self._downloads.get(key) is task:
+            del self._downloads[key]
+        if not task.cancelled():
+            # Waiters may all be gone; do not log the exception as unretrieved
+            task.exception()
+
+    async def _download(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]],
+        verify_ssl: bool,
+        deadline: Optional[Deadline],
+    ) -> Tuple[bytes, str]:
+        if url.startswith("data:"):
+            return _decode_data_uri(url)
+        content, response_headers = await fetch_limited_content(
+            url, IMAGE_MAX_BYTES, headers, verify_ssl=verify_ssl, deadline=deadline
+        )
+        content_type = (
+            response_headers.get("content-type", "").split(";")[0].strip().lower()
+        )
+        if content_type not in IMAGE_EXTENSIONS:
+            raise ValueError(f"Unsupported image type {content_type!r}")
+        metrics.increment("image_downloads_total")
+        return content, content_type
+
+    def _remember(self, key: str, image: StoredImage) -> None:
+        if key.startswith("data:"):
+            # Inline images are hashed again rather than kept as cache keys
+            return
+        self._by_url[key] = image
+        self._by_url.move_to_end(key)
+        while len(self._by_url) > self.url_cache_size:
+            self._by_url.popitem(last=False)
+
+
+async def localize_images(
+    markdown: str,
+    base_url: Optional[str] = None,
+    headers: Optional[Dict[str, str]] = None,
+    verify_ssl: bool = False,
+    deadline: Optional[Deadline] = None,
+) -> Tuple[str, List[ImageInfo], int]:
+    """
+    Download the images of a Markdown document into the store and point the links at it.
+
+    Up to IMAGE_MAX_PER_DOCUMENT distinct images are fetched concurrently;
+    links to further images and to images that fail to download keep their
+    original URLs.
+
+    Args:
+        markdown: The converted Markdown content
+        base_url: URL relative image links are resolved against, if known
+        headers: Optional headers to include in requests to the host of base_url
+        verify_ssl: Whether to verify SSL certificates
+        deadline: Optional deadline bounding the downloads
+
+    Returns:
+        Tuple containing:
+        - The Markdown with rewritten image links
+        - The stored images in document order
+        - The number of images that could not be stored
+
+    Raises:
+        RequestCancelled: If the deadline passed or the request was cancelled
+    """
+    sources: List[str] = []
+    for match in _MARKDOWN_IMAGE_PATTERN.finditer(markdown):
+        url = _resolve(match.group(2).strip("<>"), base_url)
+        if url is not None and url not in sources:
+            sources.append(url)
+    if not sources:
+        return markdown, [], 0
+
+    selected = sources[:IMAGE_MAX_PER_DOCUMENT]
+    if len(sources) > len(selected):
+        logger.info(
+            f"Keeping {len(sources) - len(selected)} images beyond the limit as links"
+        )
+
+    semaphore = asyncio.Semaphore(IMAGE_FETCH_CONCURRENCY)
+    page_host = urlsplit(base_url).hostname if base_url else None
+
+    async def store(url: str) -> Optional[StoredImage]:
+        # Credentials meant for the page must not leak to other hosts
+        image_headers = (
+            headers if page_host and urlsplit(url).hostname == page_host else None
+        )
+        async with semaphore:
+            try:
+                return await image_store.fetch(url, image_headers, verify_ssl, deadline)
+            except RequestCancelled:
+                raise
+            except Exception as e:
+                logger.warning(f"Could not store image {url[:200]}: {str(e)}")
+                metrics.increment("image_failures_total")
+                return None
+
+    results = await asyncio.gather(*(store(url) for url in selected))
+    stored: Dict[str, StoredImage] = {
+        url: image for url, image in zip(selected, results) if image is not None
+    }
+
+    def rewrite(match: "re.Match[str]") -> str:
+        url = _resolve(match.group(2).strip("<>"), base_url)
+        image = stored.get(url) if url is not None else None
+        if image is None:
+            return match.group(0)
+        return f"![{match.group(1)}]({image.reference}{match.group(3) or ''})"
+
+    images = [
+        ImageInfo(
+            source_url=None if url.startswith("data:") else url,
+            reference=image.reference,
+            digest=image.digest,
+            content_type=image.content_type,
+            size_bytes=image.size_bytes,
+        )
+        for url, image in stored.items()
+    ]
+    failed = len(selected) - len(stored)
+    logger.info(f"Stored {len(stored)} images, {failed} failed")
+    return _MARKDOWN_IMAGE_PATTERN.sub(rewrite, markdown), images, failed
+
+
+def _download_key(url: str, headers: Optional[Dict[str, str]], verify_ssl: bool) -> str:
+    """
+    Build the key under which a download is shared and its result remembered.
+
+    Images fetched with request headers, such as a client's credentials, may
+    differ per client, so they are never shared with requests sending other
+    headers, like section_index.document_key and result_cache.cache_key.
+    """
+    if url.startswith("data:"):
+        return url
+    canonical = sorted((name.lower(), value) for name, value in (headers or {}).items())
+    digest = hashlib.sha256(
+        json.dumps([canonical, verify_ssl]).encode("utf-8")
+    ).hexdigest()[:16]
+    return f"{url}#{digest}"
+
+
+def _resolve(src: str, base_url: Optional[str]) -> Optional[str]:
+    if src.startswith("data:"):
+        return src
+    if src.startswith(("http://", "https://")):
+        return src
+    if base_url:
+        resolved = urljoin(base_url, src)
+        if resolved.startswith(("http://", "https://")):
+            return resolved
+    if src.startswith("//"):
+        return "https:" + src
+    return None
+
+
+def _decode_data_uri(uri: str) -> Tuple[bytes, str]:
+    match = _DATA_URI_PATTERN.match(uri)
+    if match is None:
+        raise ValueError("Malformed data URI")
+    content_type = match.group(1).lower()
+    if content_type not in IMAGE_EXTENSIONS:
+        raise ValueError(f"Unsupported image type {content_type!r}")
+    try:
+        if ";base64" in match.group(2).lower():
+            content = base64.b64decode(match.group(3), validate=False)
+        else:
+            content = unquote_to_bytes(match.group(3))
+    except (binascii.Error, ValueError) as e:
+        raise ValueError(f"Malformed data URI: {str(e)}")
+    if len(content) > IMAGE_MAX_BYTES:
+        raise ValueError(f"Inline image exceeds {IMAGE_MAX_BYTES} bytes")
+    return content, content_type
+
+
+# Shared store used by the service
+image_store = ImageStore()
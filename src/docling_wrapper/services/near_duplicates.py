@@ -0,0 +1,273 @@
+"""
+Service for detecting near-duplicate documents with SimHash fingerprints.
+
+A fingerprint is the 64-bit SimHash of the word shingles of a document's
+normalised text. Numbers and long random-looking tokens are normalised away,
+so pages that only differ in a timestamp or session token get the same or a
+very close fingerprint. Recent fingerprints are kept in an index split into
+bands, so that every fingerprint within the maximum Hamming distance is
+found without comparing against all of them.
+"""
+
+import hashlib
+import html
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+
+from docling_wrapper.config import (
+    NEAR_DUPLICATE_INDEX_MAX_DOCUMENTS,
+    NEAR_DUPLICATE_INDEX_PATH,
+    NEAR_DUPLICATE_MAX_DISTANCE,
+)
+from docling_wrapper.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+FINGERPRINT_BITS = 64
+
+# Number of consecutive words in a shingle
+SHINGLE_WORDS = 4
+
+# Tokens this long that mix letters and digits are ids, hashes or session tokens
+_RANDOM_TOKEN_LENGTH = 16
+
+_WORD_PATTERN = re.compile(r"\w+")
+_DIGITS_PATTERN = re.compile(r"\d+")
+_TAG_PATTERN = re.compile(r"<[^>]*>")
+
+
+def simhash(text: str) -> Optional[int]:
+    """
+    Compute the SimHash fingerprint of a text.
+
+    Args:
+        text: The readable text of a document
+
+    Returns:
+        The 64-bit fingerprint, or None if the text has no words
+    """
+    words = _normalised_words(text)
+    if not words:
+        return None
+    size = min(SHINGLE_WORDS, len(words))
+    digests = b"".join(
+        hashlib.blake2b(
+            " ".join(words[i : i + size]).encode("utf-8"), digest_size=8
+        ).digest()
+        for i in range(len(words) - size + 1)
+    )
+
+    # Count the set bits per position over all shingles. Counting byte values
+    # per byte position first keeps the per-shingle work in C.
+    threshold = len(digests) // 8 / 2
+    fingerprint = 0
+    for position in range(8):
+        bit_counts = [0] * 8
+        for value, count in Counter(digests[position::8]).items():
+            for bit in range(8):
+                if value & (0x80 >> bit):
+                    bit_counts[bit] += count
+        for bit_count in bit_counts:
+            fingerprint = (fingerprint << 1) | (bit_count > threshold)
+    return fingerprint
+
+
+def html_text(html_content: str) -> str:
+    """
+    Extract text from HTML without scripts and styles, cheaply enough for fingerprinting.
+
+    Args:
+        html_content: HTML content that no longer contains scripts or styles
+
+    Returns:
+        The text content
+    """
+    return html.unescape(_TAG_PATTERN.sub(" ", html_content))
+
+
+def format_fingerprint(fingerprint: int) -> str:
+    """
+    Format a fingerprint as 16 hex digits.
+    """
+    return f"{fingerprint:016x}"
+
+
+def similarity(distance: int) -> float:
+    """
+    Convert the Hamming distance between two fingerprints to a similarity from 0 to 1.
+    """
+    return 1.0 - distance / FINGERPRINT_BITS
+
+
+class NearDuplicateIndex:
+    """
+    Bounded in-memory index of document fingerprints, evicting the least recently added.
+
+    The fingerprint bits are split into max_distance + 1 bands. Two
+    fingerprints within max_distance of each other differ in at most
+    max_distance bands, so they share at least one band exactly.
+    """
+
+    def __init__(
+        self,
+        max_documents: int = NEAR_DUPLICATE_INDEX_MAX_DOCUMENTS,
+        max_distance: int = NEAR_DUPLICATE_MAX_DISTANCE,
+        path: str = NEAR_DUPLICATE_INDEX_PATH,
+    ) -> None:
+        self.max_documents = max_documents
+        self.max_distance = max(0, min(max_distance, FINGERPRINT_BITS - 1))
+        self.path = path
+        self._bands = _band_masks(self.max_distance + 1)
+        self._fingerprints: "OrderedDict[str, int]" = OrderedDict()
+        self._buckets: List[Dict[int, Set[str]]] = [{} for _ in self._bands]
+        # Conversions run in worker threads
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_documents > 0
+
+    def __len__(self) -> int:
+        return len(self._fingerprints)
+
+    def find(
+        self, fingerprint: int, exclude: Optional[str] = None
+    ) -> Optional[Tuple[int, int]]:
+        """
+        Find the closest indexed document within the maximum distance.
+
+        The index is shared by all clients, so the match is identified by its
+        fingerprint rather than its reference, which may be another client's URL.
+
+        Args:
+            fingerprint: Fingerprint of the document to look up
+            exclude: Reference of the document itself, which is not its own duplicate
+
+        Returns:
+            The fingerprint of the closest document and its Hamming distance, or None
+        """
+        with self._lock:
+            candidates: Set[str] = set()
+            for (shift, mask), buckets in zip(self._bands, self._buckets):
+                candidates.update(buckets.get((fingerprint >> shift) & mask, ()))
+            candidates.discard(exclude)
+
+            best: Optional[Tuple[int, int]] = None
+            for reference in candidates:
+                candidate = self._fingerprints[reference]
+                distance = (candidate ^ fingerprint).bit_count()
+                if distance <= self.max_distance and (
+                    best is None or distance < best[1]
+                ):
+                    best = (candidate, distance)
+            return best
+
+    def add(self, reference: str, fingerprint: int) -> None:
+        """
+        Index the fingerprint of a converted document, replacing its previous one.
+
+        Args:
+            reference: Reference of the document, such as its normalised URL
+            fingerprint: Fingerprint of the document
+        """
+        with self._lock:
+            self._remove(reference)
+            self._fingerprints[reference] = fingerprint
+            for (shift, mask), buckets in zip(self._bands, self._buckets):
+                buckets.setdefault((fingerprint >> shift) & mask, set()).add(reference)
+            while len(self._fingerprints) > self.max_documents:
+                self._remove(next(iter(self._fingerprints)))
+        metrics.set_gauge("near_duplicate_index_documents", len(self._fingerprints))
+
+    def load(self) -> None:
+        """
+        Load the fingerprints saved at the configured path, if there are any.
+        """
+        if not self.enabled or not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as index_file:
+                documents = json.load(index_file)["documents"]
+            for reference, fingerprint in documents:
+                self.add(reference, int(fingerprint, 16))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(
+                f"Could not load near-duplicate index from {self.path}: {str(e)}"
+            )
+            return
+        logger.info(f"Loaded {len(self)} document fingerprints from {self.path}")
+
+    def save(self) -> None:
+        """
+        Save the fingerprints to the configured path, replacing the file atomically.
+        """
+        if not self.enabled or not self.path:
+            return
+        with self._lock:
+            documents = [
+                [reference, format_fingerprint(fingerprint)]
+                for reference, fingerprint in self._fingerprints.items()
+            ]
+        directory = os.path.dirname(os.path.abspath(self.path))
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as temp_file:
+                    json.dump({"documents": documents}, temp_file)
+                os.replace(temp_path, self.path)
+            except BaseException:
+                if os.path.exists(temp_path):
+                    os.unlink(temp_path)
+                raise
+        except OSError as e:
+            logger.warning(
+                f"Could not save near-duplicate index to {self.path}: {str(e)}"
+            )
+            return
+        logger.info(f"Saved {len(documents)} document fingerprints to {self.path}")
+
+    def _remove(self, reference: str) -> None:
+        fingerprint = self._fingerprints.pop(reference, None)
+        if fingerprint is None:
+            return
+        for (shift, mask), buckets in zip(self._bands, self._buckets):
+            key = (fingerprint >> shift) & mask
+            bucket = buckets.get(key)
+            if bucket is not None:
+                bucket.discard(reference)
+                if not bucket:
+                    del buckets[key]
+
+
+def _normalised_words(text: str) -> List[str]:
+    words = [
+        word
+        for word in _WORD_PATTERN.findall(text.lower())
+        if len(word) < _RANDOM_TOKEN_LENGTH or word.isalpha()
+    ]
+    # Dates, times and counters differ between otherwise identical pages
+    return _DIGITS_PATTERN.sub("0", " ".join(words)).split()
+
+
+def _band_masks(bands: int) -> List[Tuple[int, int]]:
+    # Split the fingerprint into bands of as equal width as possible
+    masks = []
+    shift = 0
+    for index in range(bands):
+        width = FINGERPRINT_BITS // bands + (
+            1 if index < FINGERPRINT_BITS % bands else 0
+        )
+        masks.append((shift, (1 << width) - 1))
+        shift += width
+    return masks
+
+
+# Shared index used by the service
+near_duplicate_index = NearDuplicateIndex()
@@ -0,0 +1,411 @@
+"""
+Service for caching html_url conversion results and refreshing hot entries.
+
+Results are cached for a fixed time to live per normalised URL and the
+options that shape the output. Every request adds to a per-entry request
+count that decays over time, which tells hot URLs from cold ones. A
+background refresher fetches and converts hot entries again shortly before
+they expire, so popular documents are always served from the cache.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+
+from docling_wrapper.api.models import ConversionMetadata, ConversionOptions
+from docling_wrapper.config import (
+    CACHE_REFRESH_AHEAD_SECONDS,
+    CACHE_REFRESH_CONCURRENCY,
+    CACHE_REFRESH_INTERVAL_SECONDS,
+    CACHE_REFRESH_MIN_HITS,
+    REQUEST_TIMEOUT_SECONDS,
+    RESULT_CACHE_HIT_HALF_LIFE_SECONDS,
+    RESULT_CACHE_MAX_ENTRIES,
+    RESULT_CACHE_TTL_SECONDS,
+)
+from docling_wrapper.services.html_converter import convert_html_url_to_markdown
+from docling_wrapper.utils.deadline import Deadline
+from docling_wrapper.utils.http_client import normalize_url
+from docling_wrapper.utils.metrics import metrics
+from docling_wrapper.utils.monitor import STATUS_HEALTHY, resource_monitor
+
+logger = logging.getLogger(__name__)
+
+# Options that only affect how a result is fetched or post-processed per
+# request, not the converted document itself
+_REQUEST_ONLY_OPTIONS = {
+    "include_metadata",
+    "max_fetch_attempts",
+    "hedge_fetch",
+    "chunking",
+    "diff_sections",
+    "changed_sections_only",
+    "use_cache",
+    "profile",
+    "timeout_ms",
+}
+
+
+@dataclass
+class CacheEntry:
+    """
+    A cached conversion result with what is needed to reproduce it.
+    """
+
+    url: str
+    headers: Optional[Dict[str, str]]
+    verify_ssl: bool
+    options: Optional[ConversionOptions]
+    markdown: str
+    metadata: ConversionMetadata
+    expires_at: float
+    hits: float = 0.0
+    hits_updated_at: float = 0.0
+    # Earliest time of the next refresh attempt, pushed back after a failure
+    refresh_after: float = 0.0
+    refreshing: bool = False
+
+    def decayed_hits(self, now: float, half_life_seconds: float) -> float:
+        """
+        Get the request count of the entry, with each request weighted by its age.
+        """
+        if half_life_seconds <= 0:
+            return self.hits
+        decay: float = 0.5 ** ((now - self.hits_updated_at) / half_life_seconds)
+        return self.hits * decay
+
+
+class ResultCache:
+    """
+    Bounded in-memory cache of conversion results, evicting the least recently used.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = RESULT_CACHE_TTL_SECONDS,
+        max_entries: int = RESULT_CACHE_MAX_ENTRIES,
+        half_life_seconds: float = RESULT_CACHE_HIT_HALF_LIFE_SECONDS,
+    ) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.half_life_seconds = half_life_seconds
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, key: str) -> Optional[Tuple[str, ConversionMetadata]]:
+        """
+        Count a request for a cache key and return its result if it is fresh.
+
+        Args:
+            key: The cache key
+
+        Returns:
+            The cached Markdown and metadata, or None if there is no fresh result
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            metrics.increment("result_cache_misses_total")
+            return None
+
+        now = time.monotonic()
+        self._record_hit(entry, now)
+        self._entries.move_to_end(key)
+        if entry.expires_at <= now:
+            metrics.increment("result_cache_misses_total")
+            return None
+        metrics.increment("result_cache_hits_total")
+        return entry.markdown, entry.metadata.model_copy(update={"cached": True})
+
+    def store(
+        self,
+        key: str,
+        url: str,
+        headers: Optional[Dict[str, str]],
+        verify_ssl: bool,
+        options: Optional[ConversionOptions],
+        markdown: str,
+        metadata: ConversionMetadata,
+        count_request: bool = True,
+    ) -> None:
+        """
+        Store a conversion result, keeping the request count of the entry it replaces.
+
+        Args:
+            key: The cache key
+            url: The converted URL
+            headers: Headers the page was fetched with
+            verify_ssl: Whether SSL certificates were verified
+            options: Options the page was converted with
+            markdown: The converted Markdown content
+            metadata: Metadata about the conversion
+            count_request: Whether the result answers a request that was not counted yet
+        """
+        now = time.monotonic()
+        entry = CacheEntry(
+            url=url,
+            headers=headers,
+            verify_ssl=verify_ssl,
+            options=options,
+            markdown=markdown,
+            metadata=metadata,
+            expires_at=now + self.ttl_seconds,
+            hits_updated_at=now,
+        )
+        previous = self._entries.get(key)
+        if previous is not None:
+            entry.hits = previous.decayed_hits(now, self.half_life_seconds)
+        elif count_request:
+            entry.hits = 1.0
+
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        metrics.set_gauge("result_cache_entries", len(self._entries))
+
+    def due_for_refresh(
+        self, ahead_seconds: float, min_hits: float
+    ) -> List[Tuple[str, CacheEntry]]:
+        """
+        Find hot entries that expire soon, hottest first.
+
+        Args:
+            ahead_seconds: How long before expiry an entry is refreshed
+            min_hits: Decayed request count from which an entry is hot
+
+        Returns:
+            The keys and entries to refresh
+        """
+        now = time.monotonic()
+        due = []
+        for key, entry in self._entries.items():
+            if entry.refreshing or entry.refresh_after > now:
+                continue
+            if entry.expires_at - now > ahead_seconds:
+                continue
+            hits = entry.decayed_hits(now, self.half_life_seconds)
+            if hits >= min_hits:
+                due.append((hits, key, entry))
+        due.sort(key=lambda item: item[0], reverse=True)
+        return [(key, entry) for _, key, entry in due]
+
+    def clear(self) -> None:
+        """
+        Drop all cached results.
+        """
+        self._entries.clear()
+        metrics.set_gauge("result_cache_entries", 0)
+
+    def _record_hit(self, entry: CacheEntry, now: float) -> None:
+        entry.hits = entry.decayed_hits(now, self.half_life_seconds) + 1.0
+        entry.hits_updated_at = now
+
+
+def cache_key(
+    url: str,
+    headers: Optional[Dict[str, str]],
+    verify_ssl: bool,
+    options: Optional[ConversionOptions],
+) -> str:
+    """
+    Build the cache key of a conversion from the normalised URL and what shapes its result.
+
+    Args:
+        url: The URL to convert
+        headers: Headers the page is fetched with
+        verify_ssl: Whether SSL certificates are verified
+        options: Conversion options
+
+    Returns:
+        The cache key
+    """
+    shaping_options = (
+        options.model_dump(mode="json", exclude=_REQUEST_ONLY_OPTIONS)
+        if options
+        else {}
+    )
+    shaping_options["verify_ssl"] = verify_ssl
+    shaping_options["headers"] = headers or {}
+    digest = hashlib.sha256(
+        json.dumps(shaping_options, sort_keys=True).encode("utf-8")
+    ).hexdigest()[:16]
+    return f"{normalize_url(url)}#{digest}"
+
+
+async def convert_html_url_cached(
+    url: str,
+    headers: Optional[Dict[str, str]] = None,
+    verify_ssl: bool = False,
+    options: Optional[ConversionOptions] = None,
+    deadline: Optional[Deadline] = None,
+) -> Tuple[str, ConversionMetadata]:
+    """
+    Convert HTML from a URL to Markdown, serving fresh results from the cache.
+
+    Profiled conversions and requests with use_cache disabled always convert
+    the page and leave the cache alone: a profiled conversion is slower than
+    usual and a bypassing client may be seeing a page others should not.
+    Skipped near-duplicates are not cached either, as they have no Markdown.
+
+    Args:
+        url: The URL to fetch HTML from
+        headers: Optional headers to include in the request
+        verify_ssl: Whether to verify SSL certificates
+        options: Optional conversion options
+        deadline: Optional deadline bounding the fetch and the conversion
+
+    Returns:
+        Tuple containing:
+        - The converted Markdown content
+        - Metadata about the conversion
+
+    Raises:
+        ValueError: If the URL is invalid
+        httpx.HTTPError: If the request fails
+        RequestCancelled: If the deadline passed or the request was cancelled
+    """
+    if not result_cache.enabled:
+        return await convert_html_url_to_markdown(
+            url, headers, verify_ssl, options, deadline
+        )
+
+    key = cache_key(url, headers, verify_ssl, options)
+    bypass = options is not None and (not options.use_cache or options.profile)
+    if not bypass:
+        cached = result_cache.lookup(key)
+        if cached is not None:
+            logger.info(f"Serving {url} from the result cache")
+            return cached
+
+    markdown, metadata = await convert_html_url_to_markdown(
+        url, headers, verify_ssl, options, deadline
+    )
+    if not bypass and not metadata.skipped:
+        result_cache.store(key, url, headers, verify_ssl, options, markdown, metadata)
+    return markdown, metadata
+
+
+class CacheRefresher:
+    """
+    Refreshes hot cache entries in the background before they expire.
+    """
+
+    def __init__(
+        self,
+        cache: ResultCache,
+        interval_seconds: float = CACHE_REFRESH_INTERVAL_SECONDS,
+        ahead_seconds: float = CACHE_REFRESH_AHEAD_SECONDS,
+        min_hits: float = CACHE_REFRESH_MIN_HITS,
+        concurrency: int = CACHE_REFRESH_CONCURRENCY,
+    ) -> None:
+        self.cache = cache
+        self.interval_seconds = interval_seconds
+        self.ahead_seconds = ahead_seconds
+        self.min_hits = min_hits
+        self.concurrency = concurrency
+        self._task: Optional[asyncio.Task] = None
+        self._refreshes: Set[asyncio.Task] = set()
+
+    def start(self) -> None:
+        """
+        Start refreshing on the running event loop, unless caching or refreshing is disabled.
+        """
+        if not self.cache.enabled or self.concurrency <= 0:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logger.info(
+                f"Cache refresher started (concurrency {self.concurrency}, "
+                f"{self.ahead_seconds:g}s before expiry)"
+            )
+
+    async def stop(self) -> None:
+        """
+        Stop refreshing and cancel refreshes in progress.
+        """
+        tasks = list(self._refreshes)
+        if self._task is not None:
+            tasks.append(self._task)
+            self._task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                self._start_due_refreshes()
+            except Exception as e:
+                logger.warning(f"Scheduling cache refreshes failed: {str(e)}")
+
+    def _start_due_refreshes(self) -> None:
+        budget = self.concurrency - len(self._refreshes)
+        if budget <= 0:
+            return
+        # Refreshing is optional work; a degraded worker keeps its capacity for requests
+        if resource_monitor.snapshot().status != STATUS_HEALTHY:
+            metrics.increment("cache_refreshes_skipped_total")
+            return
+        for key, entry in self.cache.due_for_refresh(self.ahead_seconds, self.min_hits)[
+            :budget
+        ]:
+            entry.refreshing = True
+            task = asyncio.create_task(self._refresh(key, entry))
+            self._refreshes.add(task)
+            task.add_done_callback(self._refreshes.discard)
+
+    async def _refresh(self, key: str, entry: CacheEntry) -> None:
+        try:
+            markdown, metadata = await convert_html_url_to_markdown(
+                entry.url,
+                entry.headers,
+                entry.verify_ssl,
+                entry.options,
+                Deadline(REQUEST_TIMEOUT_SECONDS),
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Refreshing cached result for {entry.url} failed: {str(e)}")
+            metrics.increment("cache_refreshes_total", outcome="failure")
+            # Retry on a later tick, while the entry is still being requested
+            entry.refresh_after = time.monotonic() + max(
+                self.ahead_seconds / 2, self.interval_seconds
+            )
+            return
+        finally:
+            entry.refreshing = False
+
+        if metadata.skipped:
+            # Keep serving the converted result until it expires
+            metrics.increment("cache_refreshes_total", outcome="skipped")
+            return
+        self.cache.store(
+            key,
+            entry.url,
+            entry.headers,
+            entry.verify_ssl,
+            entry.options,
+            markdown,
+            metadata,
+            count_request=False,
+        )
+        metrics.increment("cache_refreshes_total", outcome="success")
+        logger.info(f"Refreshed cached result for {entry.url}")
+
+
+# Shared cache and refresher used by the service
+result_cache = ResultCache()
+cache_refresher = CacheRefresher(result_cache)
@@ -0,0 +1,181 @@
+"""
+Service for tracking per-section content hashes of converted documents.
+
+When a URL is converted again, its sections are compared with the hashes
+recorded for the previous conversion so that only added, changed and removed
+sections need to be re-indexed downstream.
+"""
+
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from docling_wrapper.api.models import SectionChange, SectionDiff
+from docling_wrapper.config import SECTION_INDEX_MAX_DOCUMENTS
+from docling_wrapper.services.chunker import (
+    ByteOffsetTracker,
+    MarkdownSection,
+    split_sections,
+)
+from docling_wrapper.utils.http_client import normalize_url
+
+logger = logging.getLogger(__name__)
+
+
+class SectionIndex:
+    """
+    Bounded in-memory store of section hashes per document, evicting the least recently used.
+    """
+
+    def __init__(self, max_documents: int = SECTION_INDEX_MAX_DOCUMENTS) -> None:
+        self.max_documents = max_documents
+        self._documents: "OrderedDict[str, Dict[str, str]]" = OrderedDict()
+
+    def diff(
+        self,
+        document_key: str,
+        markdown: str,
+        sections: Optional[List[MarkdownSection]] = None,
+    ) -> Tuple[SectionDiff, List[MarkdownSection]]:
+        """
+        Compare a document with its previous version and record the new hashes.
+
+        Args:
+            document_key: Key identifying the document, such as its normalised URL
+            markdown: The converted Markdown content
+            sections: Sections of the Markdown, split from it if omitted
+
+        Returns:
+            Tuple containing:
+            - The differences to the previous version
+            - The added and changed sections in document order
+        """
+        if sections is None:
+            sections = split_sections(markdown)
+
+        current: Dict[str, str] = {}
+        located: Dict[str, MarkdownSection] = {}
+        for key, section in _keyed_sections(sections):
+            current[key] = _hash_section(markdown[section.start : section.end])
+            located[key] = section
+
+        previous = self._documents.get(document_key)
+        byte_offsets = ByteOffsetTracker(markdown)
+
+        added: List[SectionChange] = []
+        changed: List[SectionChange] = []
+        modified_sections: List[MarkdownSection] = []
+        unchanged_count = 0
+        for key, digest in current.items():
+            section = located[key]
+            if previous is not None and previous.get(key) == digest:
+                unchanged_count += 1
+                continue
+            change = SectionChange(
+                heading_path=section.heading_path,
+                hash=digest,
+                start_byte=byte_offsets.at(section.start),
+                end_byte=byte_offsets.at(section.end),
+            )
+            if previous is not None and key in previous:
+                changed.append(change)
+            else:
+                added.append(change)
+            modified_sections.append(section)
+
+        removed: List[SectionChange] = []
+        if previous is not None:
+            for key, digest in previous.items():
+                if key not in current:
+                    removed.append(
+                        SectionChange(heading_path=_heading_path(key), hash=digest)
+                    )
+
+        self._store(document_key, current)
+        logger.info(
+            f"Section diff for {document_key}: {len(added)} added, {len(changed)} changed, "
+            f"{len(removed)} removed, {unchanged_count} unchanged"
+        )
+
+        section_diff = SectionDiff(
+            previous_version=previous is not None,
+            added=added,
+            changed=changed,
+            removed=removed,
+            unchanged_count=unchanged_count,
+        )
+        return section_diff, modified_sections
+
+    def forget(self, document_key: str) -> None:
+        """
+        Drop the recorded hashes of a document.
+
+        Args:
+            document_key: Key identifying the document
+        """
+        self._documents.pop(document_key, None)
+
+    def _store(self, document_key: str, hashes: Dict[str, str]) -> None:
+        self._documents[document_key] = hashes
+        self._documents.move_to_end(document_key)
+        while len(self._documents) > self.max_documents:
+            self._documents.popitem(last=False)
+
+
+def document_key(url: str, headers: Optional[Dict[str, str]] = None) -> str:
+    """
+    Build the key under which the sections of a converted URL are recorded.
+
+    Pages fetched with request headers, such as a client's credentials, may
+    differ per client, so they never share a baseline with other headers.
+
+    Args:
+        url: The converted URL
+        headers: Headers the page was fetched with
+
+    Returns:
+        The normalised URL, with a digest of the headers if there are any
+    """
+    key = normalize_url(url)
+    if headers:
+        canonical = sorted((name.lower(), value) for name, value in headers.items())
+        digest = hashlib.sha256(json.dumps(canonical).encode("utf-8")).hexdigest()[:16]
+        key = f"{key}#{digest}"
+    return key
+
+
+# Separator between headings in section keys; unlikely to appear in a heading
+_KEY_SEPARATOR = "\x1f"
+
+
+def _keyed_sections(
+    sections: List[MarkdownSection],
+) -> List[Tuple[str, MarkdownSection]]:
+    """
+    Key sections by heading path, numbering repeated paths in document order.
+    """
+    seen: Dict[str, int] = {}
+    keyed = []
+    for section in sections:
+        path_key = _KEY_SEPARATOR.join(section.heading_path)
+        occurrence = seen.get(path_key, 0)
+        seen[path_key] = occurrence + 1
+        keyed.append((f"{path_key}{_KEY_SEPARATOR}{occurrence}", section))
+    return keyed
+
+
+def _heading_path(key: str) -> List[str]:
+    path = key.rsplit(_KEY_SEPARATOR, 1)[0]
+    return path.split(_KEY_SEPARATOR) if path else []
+
+
+def _hash_section(text: str) -> str:
+    # Whitespace-only differences do not count as changes
+    normalised = " ".join(text.split())
+    return hashlib.sha256(normalised.encode("utf-8")).hexdigest()[:16]
+
+
+# Shared index used by the API
+section_index = SectionIndex()
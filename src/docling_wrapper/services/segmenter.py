@@ -0,0 +1,296 @@
+"""
+Service for splitting large HTML documents and converting the segments in parallel.
+
+Conversion of a single document is CPU-bound and runs on one core. Large
+documents are cut at block boundaries into self-contained HTML segments,
+which are converted in a process pool and stitched back together in order.
+"""
+
+import concurrent.futures
+import logging
+import multiprocessing
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from docling_wrapper.config import SEGMENT_PROCESSES
+from docling_wrapper.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Elements that only group blocks; segments may be cut between their children.
+# Lists, tables and preformatted blocks are never cut, so list numbering and
+# table structure stay intact.
+SPLITTABLE_CONTAINERS = {
+    "article",
+    "aside",
+    "blockquote",
+    "center",
+    "div",
+    "footer",
+    "header",
+    "main",
+    "nav",
+    "section",
+}
+
+VOID_ELEMENTS = {
+    "area",
+    "base",
+    "br",
+    "col",
+    "embed",
+    "hr",
+    "img",
+    "input",
+    "link",
+    "meta",
+    "param",
+    "source",
+    "track",
+    "wbr",
+}
+
+# Elements whose content is not parsed as markup, with the pattern ending them
+RAW_TEXT_END_PATTERNS = {
+    name: re.compile(rf"</{name}\s*>", re.IGNORECASE)
+    for name in ("script", "style", "textarea", "title", "xmp")
+}
+
+# How often a waiting conversion checks for cancellation, in seconds
+_POLL_SECONDS = 0.1
+
+# Tags and comments. Attribute values containing ">" are rare enough that
+# the cheaper pattern is worth misreading them; a misread tag at worst
+# moves a cut.
+_TAG_PATTERN = re.compile(
+    r"<(?:(/?)([a-zA-Z][a-zA-Z0-9:-]*)([^>]*)>|!--.*?-->)", re.DOTALL
+)
+_BODY_OPEN_PATTERN = re.compile(r"<body\b[^>]*>", re.IGNORECASE)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+# Set once the pool has failed to start or lost a process
+_pool_failed = False
+
+
+def split_html(html_content: str, target_size: int) -> List[str]:
+    """
+    Cut an HTML document into segments of about the target size.
+
+    Cuts are only made after an element whose ancestors are all block
+    containers, such as div and section. Each segment is a complete
+    document: the containers open at the start of a segment are reopened
+    with their original attributes and those open at its end are closed.
+    Only the first segment keeps the document head.
+
+    Args:
+        html_content: The HTML document to split
+        target_size: Approximate size of a segment in characters
+
+    Returns:
+        The segments in document order; the unchanged document if it cannot be cut
+    """
+    body_match = _BODY_OPEN_PATTERN.search(html_content)
+    region_start = body_match.end() if body_match else 0
+
+    # Names and opening tags of the open elements
+    open_names: List[str] = []
+    open_tags: List[str] = []
+    cuts: List[Tuple[int, List[Tuple[str, str]]]] = []
+    segment_start = region_start
+    region_end = len(html_content)
+    skip_until = region_start
+
+    for match in _TAG_PATTERN.finditer(html_content, region_start):
+        start, position = match.span()
+        if start < skip_until:
+            continue
+        slash, name, attributes = match.groups()
+        if name is None:
+            continue
+        name = name.lower()
+
+        if slash:
+            if name == "body" or name == "html":
+                region_end = start
+                break
+            if name not in open_names:
+                continue
+            while open_names:
+                open_tags.pop()
+                if open_names.pop() == name:
+                    break
+        elif name in RAW_TEXT_END_PATTERNS:
+            close_match = RAW_TEXT_END_PATTERNS[name].search(html_content, position)
+            position = skip_until = (
+                close_match.end() if close_match else len(html_content)
+            )
+        elif name not in VOID_ELEMENTS and not attributes.rstrip().endswith("/"):
+            open_names.append(name)
+            open_tags.append(match.group(0))
+            continue
+
+        # An element just ended; cut here if it is a safe boundary
+        if position - segment_start >= target_size and all(
+            open_name in SPLITTABLE_CONTAINERS for open_name in open_names
+        ):
+            cuts.append((position, list(zip(open_names, open_tags))))
+            segment_start = position
+
+    if cuts and cuts[-1][0] >= region_end:
+        # Nothing would be left for a final segment
+        cuts.pop()
+    if not cuts:
+        return [html_content]
+
+    segments = []
+    start = region_start
+    open_at_start: List[Tuple[str, str]] = []
+    boundaries = cuts + [(region_end, [])]
+    for index, (end, open_at_end) in enumerate(boundaries):
+        prefix = html_content[:region_start] if index == 0 else "<html><body>"
+        reopened = "".join(tag for _, tag in open_at_start)
+        closed = "".join(f"</{name}>" for name, _ in reversed(open_at_end))
+        segments.append(
+            f"{prefix}{reopened}{html_content[start:end]}{closed}"
+            f"{'</body></html>' if body_match or index > 0 else ''}"
+        )
+        start, open_at_start = end, open_at_end
+    return segments
+
+
+def convert_segments(
+    converter: Callable[..., str],
+    segments: List[str],
+    first_kwargs: Dict[str, Any],
+    other_kwargs: Dict[str, Any],
+    check_cancelled: Optional[Callable[[], None]] = None,
+) -> str:
+    """
+    Convert segments in the process pool and stitch the results in order.
+
+    If the pool cannot be started or a pool process dies, the segments are
+    converted one after another in the calling thread instead, and
+    splitting is disabled for the rest of the process lifetime.
+
+    Args:
+        converter: The HTML to Markdown function; it must be importable by name
+        segments: The segments to convert
+        first_kwargs: Keyword arguments for converting the first segment
+        other_kwargs: Keyword arguments for converting the other segments
+        check_cancelled: Optional callback run while waiting; it raises to
+            abort, dropping segments that have not started
+
+    Returns:
+        The Markdown of the whole document
+    """
+    futures: List[concurrent.futures.Future] = []
+    try:
+        # Spawning the processes happens on the first submit
+        pool = _get_pool()
+        futures = [
+            pool.submit(
+                converter, segment, **(first_kwargs if index == 0 else other_kwargs)
+            )
+            for index, segment in enumerate(segments)
+        ]
+    except (RuntimeError, OSError) as e:
+        for future in futures:
+            future.cancel()
+        _disable_pool(e)
+        return _convert_in_process(
+            converter, segments, first_kwargs, other_kwargs, check_cancelled
+        )
+
+    metrics.increment("segmented_conversions_total")
+    metrics.observe("conversion_segments", len(segments))
+    try:
+        parts = []
+        for future in futures:
+            while True:
+                if check_cancelled:
+                    check_cancelled()
+                done, _ = concurrent.futures.wait([future], timeout=_POLL_SECONDS)
+                if done:
+                    break
+            parts.append(future.result().strip())
+    except (BrokenProcessPool, concurrent.futures.CancelledError) as e:
+        # Futures are also cancelled when another conversion shuts the
+        # failed pool down
+        _disable_pool(e)
+        return _convert_in_process(
+            converter, segments, first_kwargs, other_kwargs, check_cancelled
+        )
+    finally:
+        for future in futures:
+            future.cancel()
+    return "\n\n".join(part for part in parts if part)
+
+
+def segmentation_enabled() -> bool:
+    """
+    Whether there are enough processes to convert segments in parallel.
+
+    Splitting is turned off once the pool has failed, so that every large
+    document does not pay for another failed start.
+    """
+    return SEGMENT_PROCESSES > 1 and not _pool_failed
+
+
+def _convert_in_process(
+    converter: Callable[..., str],
+    segments: List[str],
+    first_kwargs: Dict[str, Any],
+    other_kwargs: Dict[str, Any],
+    check_cancelled: Optional[Callable[[], None]],
+) -> str:
+    parts = []
+    for index, segment in enumerate(segments):
+        if check_cancelled:
+            check_cancelled()
+        kwargs = first_kwargs if index == 0 else other_kwargs
+        parts.append(converter(segment, **kwargs).strip())
+    return "\n\n".join(part for part in parts if part)
+
+
+def _disable_pool(error: BaseException) -> None:
+    global _pool, _pool_failed
+    logger.warning(
+        f"Segment conversion pool failed, converting segments in-process and "
+        f"disabling document splitting: {type(error).__name__}: {str(error)}"
+    )
+    metrics.increment("segment_pool_failures_total")
+    with _pool_lock:
+        pool, _pool = _pool, None
+        _pool_failed = True
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Forking a process that runs threads can deadlock the child
+            _pool = ProcessPoolExecutor(
+                max_workers=SEGMENT_PROCESSES,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            logger.info(
+                f"Started segment conversion pool with {SEGMENT_PROCESSES} processes"
+            )
+        return _pool
+
+
+def shutdown_segment_pool() -> None:
+    """
+    Stop the segment conversion processes, dropping queued segments.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
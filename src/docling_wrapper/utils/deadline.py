@@ -0,0 +1,107 @@
+"""
+Request deadlines and cancellation.
+
+A Deadline travels with a request through validation, fetching and
+conversion. Async code bounds its timeouts by the remaining time, and
+conversion code running in executor threads calls check() between passes
+so that work stops once the deadline expires or the client disconnects.
+"""
+
+import time
+from typing import Optional
+
+
+class RequestCancelled(Exception):
+    """
+    Raised when the work for a request is stopped before it completed.
+    """
+
+
+class DeadlineExceeded(RequestCancelled, TimeoutError):
+    """
+    Raised when a request runs past its deadline.
+    """
+
+
+class ClientDisconnected(RequestCancelled):
+    """
+    Raised when the client went away before the response was ready.
+    """
+
+
+class Deadline:
+    """
+    Point in time by which a request must be done, plus an explicit cancellation flag.
+    """
+
+    def __init__(self, timeout_seconds: Optional[float] = None) -> None:
+        """
+        Start a deadline.
+
+        Args:
+            timeout_seconds: Time the request may take, None or 0 for no limit
+        """
+        self.timeout_seconds = timeout_seconds or None
+        self.expires_at = (
+            time.monotonic() + self.timeout_seconds if self.timeout_seconds else None
+        )
+        self._cancelled: Optional[RequestCancelled] = None
+
+    def remaining(self) -> Optional[float]:
+        """
+        Get the time left until the deadline.
+
+        Returns:
+            The remaining seconds (never negative), or None if there is no limit
+        """
+        if self.expires_at is None:
+            return None
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        """
+        Whether the deadline passed or the request was cancelled.
+        """
+        if self._cancelled is not None:
+            return True
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def timeout(self, default: float) -> float:
+        """
+        Bound a timeout by the remaining time.
+
+        Args:
+            default: The timeout that applies without a deadline
+
+        Returns:
+            The smaller of the default and the remaining time
+        """
+        remaining = self.remaining()
+        return default if remaining is None else min(default, remaining)
+
+    def cancel(self, reason: Optional[RequestCancelled] = None) -> None:
+        """
+        Cancel the request, so that the next check() raises.
+
+        Args:
+            reason: The exception check() raises (ClientDisconnected if omitted)
+        """
+        if self._cancelled is None:
+            self._cancelled = reason or ClientDisconnected("Client disconnected")
+
+    def check(self) -> None:
+        """
+        Raise if the request was cancelled or its deadline passed.
+
+        Raises:
+            RequestCancelled: If the request was cancelled
+            DeadlineExceeded: If the deadline passed
+        """
+        if self._cancelled is not None:
+            # Raise a fresh exception, checks may run in several threads
+            raise type(self._cancelled)(str(self._cancelled))
+        if self.expires_at is not None and time.monotonic() >= self.expires_at:
+            raise DeadlineExceeded(
+                f"Request exceeded its deadline of {self.timeout_seconds:g}s"
+            )
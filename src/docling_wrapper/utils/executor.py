@@ -0,0 +1,120 @@
+"""
+Executor for running conversions off the event loop.
+
+Conversions are CPU-bound and would otherwise block every other request on
+the worker. They run in a dedicated thread pool; the in-flight and queued
+counts are tracked for monitoring.
+"""
+
+import asyncio
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from docling_wrapper.config import CONVERSION_WORKERS
+from docling_wrapper.utils.deadline import Deadline, DeadlineExceeded
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_executor = ThreadPoolExecutor(
+    max_workers=CONVERSION_WORKERS, thread_name_prefix="conversion"
+)
+_lock = threading.Lock()
+_queued = 0
+_running = 0
+
+
+async def run_conversion(
+    func: Callable[..., T],
+    *args: Any,
+    deadline: Optional[Deadline] = None,
+    **kwargs: Any,
+) -> T:
+    """
+    Run a conversion function in the conversion thread pool.
+
+    If the deadline passes or the awaiting task is cancelled (for instance
+    because the client disconnected), a queued job is dropped and a running
+    one is told to stop through the deadline, which the function must check.
+
+    Args:
+        func: The function to run
+        args: Positional arguments for the function
+        deadline: Deadline of the request the work belongs to
+        kwargs: Keyword arguments for the function
+
+    Returns:
+        The result of the function
+
+    Raises:
+        DeadlineExceeded: If the deadline passed before the function finished
+    """
+    global _queued
+    with _lock:
+        _queued += 1
+    future = _executor.submit(_track_running, functools.partial(func, *args, **kwargs))
+    try:
+        timeout = deadline.remaining() if deadline else None
+        return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+    except asyncio.TimeoutError:
+        _stop(
+            future,
+            deadline,
+            DeadlineExceeded("Conversion exceeded the request deadline"),
+        )
+        raise DeadlineExceeded("Conversion exceeded the request deadline")
+    except asyncio.CancelledError:
+        _stop(future, deadline, None)
+        raise
+
+
+def in_flight_count() -> int:
+    """
+    Number of conversions currently running in the pool.
+    """
+    return _running
+
+
+def queue_depth() -> int:
+    """
+    Number of conversions waiting for a free worker.
+    """
+    return _queued
+
+
+def _track_running(func: Callable[[], T]) -> T:
+    global _queued, _running
+    with _lock:
+        _queued -= 1
+        _running += 1
+    try:
+        return func()
+    finally:
+        with _lock:
+            _running -= 1
+
+
+def _stop(
+    future: Any, deadline: Optional[Deadline], reason: Optional[DeadlineExceeded]
+) -> None:
+    global _queued
+    # Cancelling only succeeds while the job has not started
+    if future.cancel():
+        with _lock:
+            _queued -= 1
+        logger.info("Dropped queued conversion")
+        return
+    if deadline is not None:
+        deadline.cancel(reason)
+        logger.info("Asked running conversion to stop")
+
+
+def shutdown_executor() -> None:
+    """
+    Stop the conversion thread pool, dropping queued work.
+    """
+    _executor.shutdown(wait=False, cancel_futures=True)
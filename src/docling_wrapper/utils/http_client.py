@@ -1,18 +1,780 @@
 """
 HTTP client utilities for fetching content from URLs.
+
+All requests go through shared, pooled clients and a host-aware scheduler
+that limits concurrent connections and request rate per host, honours
+Retry-After on throttled responses and caches DNS resolutions.
 """
+
+import asyncio
+import ipaddress
 import logging
-from typing import Dict, Optional, Tuple, Union
+import random
+import socket
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+)
+from urllib.parse import urlsplit, urlunsplit
+from urllib.request import getproxies_environment
 
+import httpcore
 import httpx
 
+from docling_wrapper.config import (
+    DNS_CACHE_TTL_SECONDS,
+    FETCH_HEDGE_ENABLED,
+    FETCH_HEDGE_MIN_DELAY_SECONDS,
+    FETCH_HEDGE_PERCENTILE,
+    FETCH_MAX_ATTEMPTS,
+    FETCH_MAX_CONNECTIONS,
+    FETCH_MAX_CONNECTIONS_PER_HOST,
+    FETCH_MAX_RETRY_AFTER_SECONDS,
+    FETCH_REQUESTS_PER_SECOND_PER_HOST,
+    FETCH_RETRY_BASE_DELAY_SECONDS,
+    FETCH_RETRY_MAX_DELAY_SECONDS,
+)
+from docling_wrapper.utils.deadline import Deadline, DeadlineExceeded, RequestCancelled
+from docling_wrapper.utils.metrics import metrics
+
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# Shared clients, one per SSL verification setting, so connections are pooled
+_clients: Dict[bool, httpx.AsyncClient] = {}
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# Responses that signal throttling or temporary unavailability
+_THROTTLED_STATUS_CODES = {429, 503}
+
+
+class DNSCache:
+    """
+    Caches host name resolutions for a fixed time to live.
+    """
+
+    def __init__(self, ttl_seconds: float = DNS_CACHE_TTL_SECONDS) -> None:
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[Tuple[str, int], Tuple[float, List[str]]] = {}
+        self._pending: Dict[Tuple[str, int], "asyncio.Future[List[str]]"] = {}
+
+    async def resolve(self, host: str, port: int) -> List[str]:
+        """
+        Resolve a host name to its addresses, using the cache if the entry is fresh.
+
+        Concurrent lookups of the same host share one resolution.
+
+        Args:
+            host: The host name to resolve
+            port: The port to connect to
+
+        Returns:
+            The resolved addresses in resolver order
+        """
+        key = (host, port)
+        entry = self._entries.get(key)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+
+        pending = self._pending.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            infos = await asyncio.get_running_loop().getaddrinfo(
+                host, port, type=socket.SOCK_STREAM
+            )
+            addresses = list(dict.fromkeys(str(info[4][0]) for info in infos))
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, addresses)
+            future.set_result(addresses)
+            return addresses
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting
+            future.exception()
+            raise
+        finally:
+            del self._pending[key]
+
+    def clear(self) -> None:
+        """
+        Drop all cached resolutions.
+        """
+        self._entries.clear()
+
+
+class _CachingNetworkBackend(httpcore.AsyncNetworkBackend):
+    """
+    Network backend that connects to cached DNS resolutions.
+
+    TLS still uses the original host name for SNI and certificate checks,
+    as httpcore passes it separately when starting TLS.
+    """
+
+    def __init__(self, dns_cache: DNSCache) -> None:
+        self._dns_cache = dns_cache
+        self._backend = httpcore.AnyIOBackend()
+
+    async def connect_tcp(
+        self,
+        host: str,
+        port: int,
+        timeout: Optional[float] = None,
+        local_address: Optional[str] = None,
+        socket_options: Optional[Iterable[Any]] = None,
+    ) -> httpcore.AsyncNetworkStream:
+        if _is_ip_address(host):
+            addresses = [host]
+        else:
+            try:
+                addresses = await self._dns_cache.resolve(host, port)
+            except OSError as e:
+                raise httpcore.ConnectError(str(e)) from e
+
+        last_error: Optional[Exception] = None
+        for address in addresses:
+            try:
+                return await self._backend.connect_tcp(
+                    address,
+                    port,
+                    timeout=timeout,
+                    local_address=local_address,
+                    socket_options=socket_options,
+                )
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as e:
+                last_error = e
+        raise last_error or httpcore.ConnectError(f"No addresses for {host}")
+
+    async def connect_unix_socket(
+        self,
+        path: str,
+        timeout: Optional[float] = None,
+        socket_options: Optional[Iterable[Any]] = None,
+    ) -> httpcore.AsyncNetworkStream:
+        return await self._backend.connect_unix_socket(
+            path, timeout=timeout, socket_options=socket_options
+        )
+
+    async def sleep(self, seconds: float) -> None:
+        await self._backend.sleep(seconds)
+
+
+# httpcore errors and the httpx errors they surface as, most specific first
+_HTTPCORE_ERRORS: Tuple[Tuple[type, type], ...] = (
+    (httpcore.ConnectTimeout, httpx.ConnectTimeout),
+    (httpcore.ReadTimeout, httpx.ReadTimeout),
+    (httpcore.WriteTimeout, httpx.WriteTimeout),
+    (httpcore.PoolTimeout, httpx.PoolTimeout),
+    (httpcore.TimeoutException, httpx.TimeoutException),
+    (httpcore.ConnectError, httpx.ConnectError),
+    (httpcore.ReadError, httpx.ReadError),
+    (httpcore.WriteError, httpx.WriteError),
+    (httpcore.NetworkError, httpx.NetworkError),
+    (httpcore.ProxyError, httpx.ProxyError),
+    (httpcore.UnsupportedProtocol, httpx.UnsupportedProtocol),
+    (httpcore.LocalProtocolError, httpx.LocalProtocolError),
+    (httpcore.RemoteProtocolError, httpx.RemoteProtocolError),
+    (httpcore.ProtocolError, httpx.ProtocolError),
+)
+
+
+@contextmanager
+def _httpx_errors() -> Iterator[None]:
+    """
+    Raise httpcore errors as the httpx errors that callers handle.
+    """
+    try:
+        yield
+    except Exception as e:
+        for httpcore_error, httpx_error in _HTTPCORE_ERRORS:
+            if isinstance(e, httpcore_error):
+                raise httpx_error(str(e)) from e
+        raise
+
+
+class _ResponseStream(httpx.AsyncByteStream):
+    """
+    Body of a response read from the connection pool.
+    """
+
+    def __init__(self, stream: AsyncIterable[bytes]) -> None:
+        self._stream = stream
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        with _httpx_errors():
+            async for part in self._stream:
+                yield part
+
+    async def aclose(self) -> None:
+        aclose = getattr(self._stream, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+
+class _CachingTransport(httpx.AsyncBaseTransport):
+    """
+    Transport over an httpcore connection pool that connects through the DNS cache.
+
+    httpx.AsyncHTTPTransport does not take a network backend, so the pool is
+    built here with the same settings it would use.
+    """
+
+    def __init__(
+        self, verify_ssl: bool, limits: httpx.Limits, dns_cache: DNSCache
+    ) -> None:
+        self._pool = httpcore.AsyncConnectionPool(
+            ssl_context=httpx.create_ssl_context(verify=verify_ssl),
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            network_backend=_CachingNetworkBackend(dns_cache),
+        )
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        assert isinstance(request.stream, httpx.AsyncByteStream)
+        core_request = httpcore.Request(
+            method=request.method,
+            url=httpcore.URL(
+                scheme=request.url.raw_scheme,
+                host=request.url.raw_host,
+                port=request.url.port,
+                target=request.url.raw_path,
+            ),
+            headers=request.headers.raw,
+            content=request.stream,
+            extensions=request.extensions,
+        )
+        with _httpx_errors():
+            core_response = await self._pool.handle_async_request(core_request)
+        assert isinstance(core_response.stream, AsyncIterable)
+        return httpx.Response(
+            status_code=core_response.status,
+            headers=core_response.headers,
+            stream=_ResponseStream(core_response.stream),
+            extensions=core_response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        await self._pool.aclose()
+
+
+class _HostState:
+    """
+    Scheduling state of a single host.
+    """
+
+    def __init__(self, max_connections: int) -> None:
+        self.semaphore = asyncio.Semaphore(max_connections)
+        self.next_start = 0.0
+        self.blocked_until = 0.0
+        self.active = 0
+
+
+class HostScheduler:
+    """
+    Schedules requests per host.
+
+    Each host gets a limited number of concurrent requests, a minimum interval
+    between request starts, and a pause after it answers with Retry-After.
+    Hosts are independent, so throughput across many hosts is not affected by
+    the limits of any single one.
+    """
+
+    # Idle host states are pruned once this many are tracked
+    MAX_TRACKED_HOSTS = 10000
+
+    def __init__(
+        self,
+        max_connections_per_host: int = FETCH_MAX_CONNECTIONS_PER_HOST,
+        requests_per_second: float = FETCH_REQUESTS_PER_SECOND_PER_HOST,
+    ) -> None:
+        self.max_connections_per_host = max(max_connections_per_host, 1)
+        self.min_interval = 1 / requests_per_second if requests_per_second > 0 else 0.0
+        self._hosts: Dict[str, _HostState] = {}
+
+    @asynccontextmanager
+    async def slot(self, host: str) -> AsyncIterator[None]:
+        """
+        Wait until a request to the host may start and hold a connection slot.
+
+        Args:
+            host: The host the request is sent to
+        """
+        state = self._host_state(host)
+        state.active += 1
+        try:
+            async with state.semaphore:
+                await self._wait_for_turn(state)
+                yield
+        finally:
+            state.active -= 1
+
+    def defer(self, host: str, seconds: float) -> None:
+        """
+        Pause all requests to a host, e.g. after it answered with Retry-After.
+
+        Args:
+            host: The host to pause
+            seconds: How long to pause
+        """
+        state = self._host_state(host)
+        state.blocked_until = max(state.blocked_until, time.monotonic() + seconds)
+        logger.info(f"Deferring requests to {host} for {seconds:.1f}s")
+
+    async def _wait_for_turn(self, state: _HostState) -> None:
+        while True:
+            now = time.monotonic()
+            start = max(now, state.next_start, state.blocked_until)
+            if start <= now:
+                state.next_start = now + self.min_interval
+                return
+            await asyncio.sleep(start - now)
+
+    def _host_state(self, host: str) -> _HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            if len(self._hosts) >= self.MAX_TRACKED_HOSTS:
+                self._prune()
+            state = _HostState(self.max_connections_per_host)
+            self._hosts[host] = state
+        return state
+
+    def _prune(self) -> None:
+        now = time.monotonic()
+        idle = [
+            host
+            for host, state in self._hosts.items()
+            if state.active == 0 and state.blocked_until <= now
+        ]
+        for host in idle:
+            del self._hosts[host]
+
+
+# Shared scheduler and DNS cache used by all requests
+host_scheduler = HostScheduler()
+dns_cache = DNSCache()
+
+
+def get_http_client(verify_ssl: bool = False) -> httpx.AsyncClient:
+    """
+    Get the shared HTTP client for the given SSL verification setting.
+
+    Connections go through the DNS cache, unless HTTP_PROXY, HTTPS_PROXY or
+    ALL_PROXY is set: httpx only applies the proxy environment, NO_PROXY
+    included, to its default transport, and the proxy resolves names itself.
+
+    Args:
+        verify_ssl: Whether the client verifies SSL certificates
+
+    Returns:
+        The pooled HTTP client
+    """
+    client = _clients.get(verify_ssl)
+    if client is None or client.is_closed:
+        limits = httpx.Limits(
+            max_connections=FETCH_MAX_CONNECTIONS,
+            max_keepalive_connections=FETCH_MAX_CONNECTIONS // 4,
+        )
+        if _environment_proxies_configured():
+            client = httpx.AsyncClient(verify=verify_ssl, limits=limits)
+        else:
+            transport = _CachingTransport(verify_ssl, limits, dns_cache)
+            client = httpx.AsyncClient(
+                verify=verify_ssl, limits=limits, transport=transport
+            )
+        _clients[verify_ssl] = client
+    return client
+
+
+def _environment_proxies_configured() -> bool:
+    proxies = getproxies_environment()
+    return any(proxies.get(scheme) for scheme in ("http", "https", "all"))
+
+
+async def close_http_clients() -> None:
+    """
+    Close the shared HTTP clients and their pooled connections.
+    """
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.aclose()
+
+
+@dataclass
+class RetryPolicy:
+    """
+    Retry and hedging settings for a request.
+    """
+
+    max_attempts: int = FETCH_MAX_ATTEMPTS
+    base_delay: float = FETCH_RETRY_BASE_DELAY_SECONDS
+    max_delay: float = FETCH_RETRY_MAX_DELAY_SECONDS
+    hedge: bool = FETCH_HEDGE_ENABLED
+    hedge_percentile: float = FETCH_HEDGE_PERCENTILE
+    hedge_min_delay: float = FETCH_HEDGE_MIN_DELAY_SECONDS
+
+    def backoff(self, retry: int) -> float:
+        """
+        Get the jittered delay before a retry.
+
+        Args:
+            retry: Number of the retry, starting at 0
+
+        Returns:
+            The delay in seconds, drawn uniformly up to the exponential backoff
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**retry))
+
+
+class LatencyTracker:
+    """
+    Keeps recent response latencies per host to derive hedging delays.
+    """
+
+    # Samples needed before a percentile is trusted
+    MIN_SAMPLES = 10
+
+    def __init__(self, window: int = 200) -> None:
+        self._window = window
+        self._hosts: "OrderedDict[str, Deque[float]]" = OrderedDict()
+        self._all: Deque[float] = deque(maxlen=window)
+
+    def record(self, host: str, seconds: float) -> None:
+        """
+        Record the latency of a successful request.
+
+        Args:
+            host: The host that answered
+            seconds: Time until the response was received
+        """
+        samples = self._hosts.get(host)
+        if samples is None:
+            samples = deque(maxlen=self._window)
+            self._hosts[host] = samples
+            if len(self._hosts) > HostScheduler.MAX_TRACKED_HOSTS:
+                self._hosts.popitem(last=False)
+        samples.append(seconds)
+        self._all.append(seconds)
+
+    def percentile(self, host: str, percentile: float) -> Optional[float]:
+        """
+        Get a latency percentile for a host, falling back to all hosts.
+
+        Args:
+            host: The host to look up
+            percentile: The percentile, between 0 and 100
+
+        Returns:
+            The latency in seconds, or None if too few samples were recorded
+        """
+        samples = self._hosts.get(host)
+        if samples is None or len(samples) < self.MIN_SAMPLES:
+            samples = self._all
+        if len(samples) < self.MIN_SAMPLES:
+            return None
+        ordered = sorted(samples)
+        index = min(int(len(ordered) * percentile / 100), len(ordered) - 1)
+        return ordered[index]
+
+
+# Shared latency history used for hedging
+latency_tracker = LatencyTracker()
+
+# Methods that may be repeated without side effects
+_IDEMPOTENT_METHODS = {"GET", "HEAD"}
+
+# Server errors worth retrying; 503 is handled with the throttled responses
+_RETRYABLE_STATUS_CODES = {500, 502, 504}
+
+
+async def send_request(
+    method: str,
+    url: str,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: float = 30,
+    verify_ssl: bool = False,
+    retry_policy: Optional[RetryPolicy] = None,
+    deadline: Optional[Deadline] = None,
+) -> httpx.Response:
+    """
+    Send a request through the host scheduler, retrying idempotent requests.
+
+    Idempotent requests are retried after transport errors and 500, 502 and
+    504 responses with jittered exponential backoff. Throttled responses (429
+    and 503) pause the host for their Retry-After, if it is at most
+    FETCH_MAX_RETRY_AFTER_SECONDS, before the retry. With hedging, a GET that
+    is slower than the configured latency percentile for its host gets a
+    second request and the first response wins. Retries and hedged requests
+    share the policy's attempt budget; once it is spent, the last response is
+    returned or the last error raised. A deadline bounds every attempt
+    including the wait for a host slot, and no retry is scheduled that
+    would end after it.
+
+    Args:
+        method: The HTTP method
+        url: The normalized URL to request
+        headers: Optional headers to include in the request
+        timeout: Request timeout in seconds
+        verify_ssl: Whether to verify SSL certificates
+        retry_policy: Retry and hedging settings (defaults from the configuration)
+        deadline: Optional deadline of the request the fetch belongs to
+
+    Returns:
+        The response
+
+    Raises:
+        httpx.TransportError: If the last attempt failed without a response
+        RequestCancelled: If the deadline passed or the request was cancelled
+    """
+    policy = retry_policy or RetryPolicy()
+    host = urlsplit(url).hostname or ""
+    idempotent = method.upper() in _IDEMPOTENT_METHODS
+    budget = _AttemptBudget(policy.max_attempts if idempotent else 1)
+    metrics.increment("fetch_requests_total", method=method.upper())
+
+    retry = 0
+    while True:
+        if deadline:
+            deadline.check()
+        attempt_timeout = deadline.timeout(timeout) if deadline else timeout
+        try:
+            if policy.hedge and method.upper() == "GET":
+                attempt = _hedged_attempt(
+                    method, url, headers, attempt_timeout, verify_ssl, policy, budget
+                )
+            else:
+                budget.spend()
+                attempt = _attempt(method, url, headers, attempt_timeout, verify_ssl)
+            response = await _within_deadline(attempt, deadline)
+        except httpx.TransportError as e:
+            if deadline and deadline.expired:
+                # The attempt timed out because the deadline cut it short
+                deadline.check()
+            if not budget.remaining:
+                _record_exhausted(budget)
+                raise
+            reason = "transport_error"
+            delay = policy.backoff(retry)
+            if _outlasts_deadline(delay, deadline):
+                raise
+            logger.info(
+                f"{method} {url} failed ({type(e).__name__}), retrying in {delay:.2f}s"
+            )
+        else:
+            if response.status_code in _THROTTLED_STATUS_CODES:
+                retry_after = parse_retry_after(response.headers.get("retry-after"))
+                if retry_after is None:
+                    # Back off exponentially when the server gives no hint
+                    retry_after = float(2**retry)
+                host_scheduler.defer(
+                    host, min(retry_after, FETCH_MAX_RETRY_AFTER_SECONDS)
+                )
+                if retry_after > FETCH_MAX_RETRY_AFTER_SECONDS or not idempotent:
+                    return response
+                reason = "throttled"
+                # The scheduler holds the host back, no extra sleep needed
+                delay = 0.0
+            elif response.status_code in _RETRYABLE_STATUS_CODES and idempotent:
+                reason = "server_error"
+                delay = policy.backoff(retry)
+            else:
+                return response
+
+            if not budget.remaining:
+                _record_exhausted(budget)
+                return response
+            if _outlasts_deadline(delay, deadline):
+                return response
+            logger.info(f"{url} answered {response.status_code}, retrying")
+
+        metrics.increment("fetch_retries_total", reason=reason)
+        retry += 1
+        if delay:
+            await asyncio.sleep(delay)
+
+
+class _AttemptBudget:
+    """
+    Number of attempts a single request may still make.
+    """
+
+    def __init__(self, max_attempts: int) -> None:
+        self.max_attempts = max(max_attempts, 1)
+        self.used = 0
+
+    @property
+    def remaining(self) -> int:
+        return self.max_attempts - self.used
+
+    def spend(self) -> None:
+        self.used += 1
+        metrics.increment("fetch_attempts_total")
+
+
+def _record_exhausted(budget: _AttemptBudget) -> None:
+    if budget.max_attempts > 1:
+        metrics.increment("fetch_retry_budget_exhausted_total")
+
+
+async def _within_deadline(attempt: Awaitable[T], deadline: Optional[Deadline]) -> T:
+    """
+    Await an attempt, giving up once the deadline passes.
+
+    The request timeout alone does not cover the wait for a host slot.
+    """
+    if deadline is None or deadline.timeout_seconds is None:
+        return await attempt
+    try:
+        return await asyncio.wait_for(attempt, deadline.remaining())
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded(
+            f"Fetch exceeded the request deadline of {deadline.timeout_seconds:g}s"
+        )
+
+
+def _outlasts_deadline(delay: float, deadline: Optional[Deadline]) -> bool:
+    remaining = deadline.remaining() if deadline else None
+    return remaining is not None and delay >= remaining
+
+
+async def _attempt(
+    method: str,
+    url: str,
+    headers: Optional[Dict[str, str]],
+    timeout: float,
+    verify_ssl: bool,
+) -> httpx.Response:
+    """
+    Make a single request through the host scheduler and record its latency.
+    """
+    host = urlsplit(url).hostname or ""
+    client = get_http_client(verify_ssl)
+    async with host_scheduler.slot(host):
+        start = time.monotonic()
+        response = await client.request(
+            method, url, headers=headers, follow_redirects=False, timeout=timeout
+        )
+    if response.status_code < 500:
+        latency_tracker.record(host, time.monotonic() - start)
+    return response
+
+
+async def _hedged_attempt(
+    method: str,
+    url: str,
+    headers: Optional[Dict[str, str]],
+    timeout: float,
+    verify_ssl: bool,
+    policy: RetryPolicy,
+    budget: _AttemptBudget,
+) -> httpx.Response:
+    """
+    Make a request and hedge it with a second one if it is slow.
+
+    The first successful response wins and the other request is cancelled.
+    Without enough latency history or attempt budget, no hedge is sent.
+    """
+    host = urlsplit(url).hostname or ""
+    budget.spend()
+    primary = asyncio.create_task(_attempt(method, url, headers, timeout, verify_ssl))
+
+    hedge_delay = latency_tracker.percentile(host, policy.hedge_percentile)
+    if hedge_delay is None or not budget.remaining:
+        return await primary
+
+    pending = {primary}
+    try:
+        done, _ = await asyncio.wait(
+            pending, timeout=max(hedge_delay, policy.hedge_min_delay)
+        )
+        if done:
+            return primary.result()
+
+        budget.spend()
+        metrics.increment("fetch_hedges_total")
+        hedge = asyncio.create_task(_attempt(method, url, headers, timeout, verify_ssl))
+        pending.add(hedge)
+
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None:
+                    if task is hedge:
+                        metrics.increment("fetch_hedge_wins_total")
+                    return task.result()
+                error = task.exception()
+        assert error is not None
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header given in seconds or as an HTTP date.
+
+    Args:
+        value: The header value
+
+    Returns:
+        The delay in seconds, or None if the header is missing or invalid
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(retry_at.timestamp() - time.time(), 0.0)
+
+
+def _is_ip_address(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host.strip("[]"))
+        return True
+    except ValueError:
+        return False
+
 
 def normalize_url(url: str) -> str:
     """
     Normalize a URL by adding https:// protocol if missing.
 
+    The scheme and host are lowercased, default ports and the fragment are
+    removed, so that equivalent URLs normalize to the same string. User info,
+    path and query keep their case.
+
     Args:
         url: The URL to normalize
 
@@ -20,18 +782,39 @@ def normalize_url(url: str) -> str:
         The normalized URL with protocol
     """
     url = url.strip()
-    
-    # Check if URL already has a protocol
-    if url.startswith("http://") or url.startswith("https://"):
+
+    # Add https:// as default protocol if the URL has none
+    if not (url.lower().startswith("http://") or url.lower().startswith("https://")):
+        logger.info(f"URL missing protocol, prepending https:// to: {url}")
+        url = f"https://{url}"
+
+    try:
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        # User info is case-sensitive, only the host is not
+        userinfo, _, hostport = parts.netloc.rpartition("@")
+        host, port = hostport, ""
+        if parts.port is not None:
+            host, _, port = hostport.rpartition(":")
+            if parts.port == _DEFAULT_PORTS.get(scheme):
+                port = ""
+        netloc = host.lower() + (f":{port}" if port else "")
+        if userinfo:
+            netloc = f"{userinfo}@{netloc}"
+    except ValueError:
+        # Leave malformed URLs for the request to reject
         return url
-    
-    # Add https:// as default protocol
-    logger.info(f"URL missing protocol, prepending https:// to: {url}")
-    return f"https://{url}"
+
+    return urlunsplit((scheme, netloc, parts.path or "/", parts.query, ""))
 
 
 async def fetch_url_content(
-    url: str, headers: Optional[Dict[str, str]] = None, timeout: int = 30, verify_ssl: bool = False
+    url: str,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: int = 30,
+    verify_ssl: bool = False,
+    retry_policy: Optional[RetryPolicy] = None,
+    deadline: Optional[Deadline] = None,
 ) -> Tuple[Union[str, bytes], Dict[str, str], int]:
     """
     Fetch content from a URL.
@@ -39,8 +822,10 @@ async def fetch_url_content(
     Args:
         url: The URL to fetch content from
         headers: Optional headers to include in the request
-        timeout: Request timeout in seconds
+        timeout: Request timeout in seconds per attempt
         verify_ssl: Whether to verify SSL certificates (default: False)
+        retry_policy: Retry and hedging settings (defaults from the configuration)
+        deadline: Optional deadline bounding the fetch including retries
 
     Returns:
         Tuple containing:
@@ -50,49 +835,128 @@ async def fetch_url_content(
 
     Raises:
         httpx.HTTPError: If the request fails
+        RequestCancelled: If the deadline passed or the request was cancelled
     """
     # Normalize URL to ensure it has a protocol
     url = normalize_url(url)
-    
+
     logger.info(f"Fetching content from URL: {url}")
-    
-    async with httpx.AsyncClient(timeout=timeout, verify=verify_ssl) as client:
-        response = await client.get(url, headers=headers, follow_redirects=False)
-        response.raise_for_status()
-        
-        content_type = response.headers.get("content-type", "")
-        content_length = len(response.content)
-        
-        logger.info(
-            f"Successfully fetched content from URL: {url} "
-            f"(type: {content_type}, size: {content_length} bytes)"
-        )
-        
-        # Return content as string for HTML, bytes for binary content
-        if "text/html" in content_type or "application/xhtml+xml" in content_type:
-            return response.text, dict(response.headers), content_length
-        else:
-            return response.content, dict(response.headers), content_length
 
+    response = await send_request(
+        "GET",
+        url,
+        headers,
+        timeout=timeout,
+        verify_ssl=verify_ssl,
+        retry_policy=retry_policy,
+        deadline=deadline,
+    )
+    response.raise_for_status()
+
+    content_type = response.headers.get("content-type", "")
+    content_length = len(response.content)
+
+    logger.info(
+        f"Successfully fetched content from URL: {url} "
+        f"(type: {content_type}, size: {content_length} bytes)"
+    )
 
-async def is_valid_url(url: str, verify_ssl: bool = False) -> bool:
+    # Return content as string for HTML, bytes for binary content
+    if "text/html" in content_type or "application/xhtml+xml" in content_type:
+        return response.text, dict(response.headers), content_length
+    else:
+        return response.content, dict(response.headers), content_length
+
+
+async def fetch_limited_content(
+    url: str,
+    max_bytes: int,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: float = 30,
+    verify_ssl: bool = False,
+    deadline: Optional[Deadline] = None,
+) -> Tuple[bytes, Dict[str, str]]:
+    """
+    Fetch binary content from a URL, aborting downloads above a size limit.
+
+    The body is streamed so that oversized content is not read into memory.
+    The request goes through the host scheduler but is not retried.
+
+    Args:
+        url: The URL to fetch content from
+        max_bytes: Largest accepted body size in bytes
+        headers: Optional headers to include in the request
+        timeout: Request timeout in seconds
+        verify_ssl: Whether to verify SSL certificates (default: False)
+        deadline: Optional deadline bounding the download
+
+    Returns:
+        Tuple containing:
+        - The content of the URL
+        - Response headers
+
+    Raises:
+        ValueError: If the content is larger than max_bytes
+        httpx.HTTPError: If the request fails
+        RequestCancelled: If the deadline passed or the request was cancelled
+    """
+    url = normalize_url(url)
+    host = urlsplit(url).hostname or ""
+    client = get_http_client(verify_ssl)
+    if deadline:
+        deadline.check()
+        timeout = deadline.timeout(timeout)
+    metrics.increment("fetch_requests_total", method="GET")
+
+    async def download() -> Tuple[bytes, Dict[str, str]]:
+        async with host_scheduler.slot(host):
+            metrics.increment("fetch_attempts_total")
+            async with client.stream(
+                "GET", url, headers=headers, follow_redirects=False, timeout=timeout
+            ) as response:
+                response.raise_for_status()
+                declared = response.headers.get("content-length", "")
+                if declared.isdigit() and int(declared) > max_bytes:
+                    raise ValueError(f"Content of {url} exceeds {max_bytes} bytes")
+                chunks = []
+                size = 0
+                async for chunk in response.aiter_bytes():
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise ValueError(f"Content of {url} exceeds {max_bytes} bytes")
+                    chunks.append(chunk)
+                return b"".join(chunks), dict(response.headers)
+
+    return await _within_deadline(download(), deadline)
+
+
+async def is_valid_url(
+    url: str, verify_ssl: bool = False, deadline: Optional[Deadline] = None
+) -> bool:
     """
     Check if a URL is valid and accessible.
 
     Args:
         url: The URL to check
         verify_ssl: Whether to verify SSL certificates (default: False)
+        deadline: Optional deadline bounding the check
 
     Returns:
         True if the URL is valid and accessible, False otherwise
+
+    Raises:
+        RequestCancelled: If the deadline passed or the request was cancelled
     """
     # Normalize URL to ensure it has a protocol
     url = normalize_url(url)
-    
+
     try:
-        async with httpx.AsyncClient(timeout=5, verify=verify_ssl) as client:
-            response = await client.head(url, follow_redirects=False)
-            return response.status_code < 400
+        response = await send_request(
+            "HEAD", url, timeout=5, verify_ssl=verify_ssl, deadline=deadline
+        )
+        return response.status_code < 400
+    except RequestCancelled:
+        raise
     except Exception as e:
         logger.warning(f"URL validation failed for {url}: {str(e)}")
         return False
@@ -0,0 +1,96 @@
+"""
+In-process metrics registry.
+
+Counters, gauges and summaries are kept in memory and exposed as JSON by the
+/metrics endpoint. Metric keys carry their labels in Prometheus notation,
+e.g. fetch_retries_total{reason="server_error"}.
+"""
+
+import threading
+from typing import Any, Dict, Tuple
+
+
+class MetricsRegistry:
+    """
+    Thread-safe store of counters, gauges and summaries.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {}
+        self._gauges: Dict[str, float] = {}
+        self._summaries: Dict[str, Dict[str, float]] = {}
+
+    def increment(self, name: str, value: float = 1.0, **labels: str) -> None:
+        """
+        Increase a counter.
+
+        Args:
+            name: Name of the counter
+            value: Amount to add
+            labels: Labels of the counter
+        """
+        key = _metric_key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def set_gauge(self, name: str, value: float, **labels: str) -> None:
+        """
+        Set a gauge to a value.
+
+        Args:
+            name: Name of the gauge
+            value: Current value
+            labels: Labels of the gauge
+        """
+        key = _metric_key(name, labels)
+        with self._lock:
+            self._gauges[key] = value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        """
+        Record an observation in a summary, such as a duration.
+
+        Args:
+            name: Name of the summary
+            value: Observed value
+            labels: Labels of the summary
+        """
+        key = _metric_key(name, labels)
+        with self._lock:
+            summary = self._summaries.get(key)
+            if summary is None:
+                self._summaries[key] = {"count": 1, "sum": value, "max": value}
+            else:
+                summary["count"] += 1
+                summary["sum"] += value
+                summary["max"] = max(summary["max"], value)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get the current values of all metrics.
+
+        Returns:
+            Counters, gauges and summaries keyed by metric key
+        """
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "summaries": {
+                    key: dict(summary) for key, summary in self._summaries.items()
+                },
+            }
+
+
+def _metric_key(name: str, labels: Dict[str, str]) -> str:
+    if not labels:
+        return name
+    label_items: Tuple[str, ...] = tuple(
+        f'{label}="{value}"' for label, value in sorted(labels.items())
+    )
+    return f"{name}{{{','.join(label_items)}}}"
+
+
+# Shared registry used by the service
+metrics = MetricsRegistry()
@@ -6,12 +6,16 @@ until the actual library is available.
 """
 import logging
 import re
-from typing import Optional
+from typing import Callable, Optional
 
 logger = logging.getLogger(__name__)
 
 
-def convert_html_to_markdown(html_content: str) -> str:
+def convert_html_to_markdown(
+    html_content: str,
+    title: Optional[str] = None,
+    check_cancelled: Optional[Callable[[], None]] = None,
+) -> str:
     """
     Mock implementation of the Docling HTML to Markdown conversion.
     
@@ -20,6 +24,11 @@ def convert_html_to_markdown(html_content: str) -> str:
     
     Args:
         html_content: The HTML content to convert
+        title: The document title if the caller already extracted it. Pass an
+            empty string for documents known to have no title; None scans the
+            HTML for a <title> element.
+        check_cancelled: Optional callback run between conversion passes; it
+            raises to abort a conversion that is no longer needed.
         
     Returns:
         The converted Markdown content
@@ -33,10 +42,13 @@ def convert_html_to_markdown(html_content: str) -> str:
     else:
         content = html_content
     
-    # Extract title
-    title = extract_title(html_content)
+    # Extract title unless the caller already did
+    if title is None:
+        title = extract_title(html_content)
     markdown = f"# {title}\n\n" if title else ""
     
+    checkpoint = check_cancelled or _no_checkpoint
+
     # Process content
     # Replace headings
     content = re.sub(r"<h1.*?>(.*?)</h1>", r"# \1\n", content, flags=re.IGNORECASE | re.DOTALL)
@@ -46,41 +58,52 @@ def convert_html_to_markdown(html_content: str) -> str:
     content = re.sub(r"<h5.*?>(.*?)</h5>", r"##### \1\n", content, flags=re.IGNORECASE | re.DOTALL)
     content = re.sub(r"<h6.*?>(.*?)</h6>", r"###### \1\n", content, flags=re.IGNORECASE | re.DOTALL)
     
+    checkpoint()
     # Replace paragraphs
     content = re.sub(r"<p.*?>(.*?)</p>", r"\1\n\n", content, flags=re.IGNORECASE | re.DOTALL)
     
+    checkpoint()
     # Replace links
     content = re.sub(r'<a.*?href="(.*?)".*?>(.*?)</a>', r"[\2](\1)", content, flags=re.IGNORECASE | re.DOTALL)
     
+    checkpoint()
     # Replace bold and italic
     content = re.sub(r"<strong.*?>(.*?)</strong>", r"**\1**", content, flags=re.IGNORECASE | re.DOTALL)
     content = re.sub(r"<b.*?>(.*?)</b>", r"**\1**", content, flags=re.IGNORECASE | re.DOTALL)
     content = re.sub(r"<em.*?>(.*?)</em>", r"*\1*", content, flags=re.IGNORECASE | re.DOTALL)
     content = re.sub(r"<i.*?>(.*?)</i>", r"*\1*", content, flags=re.IGNORECASE | re.DOTALL)
     
+    checkpoint()
     # Replace unordered lists
     content = re.sub(r"<ul.*?>(.*?)</ul>", process_ul, content, flags=re.IGNORECASE | re.DOTALL)
     
+    checkpoint()
     # Replace ordered lists
     content = re.sub(r"<ol.*?>(.*?)</ol>", process_ol, content, flags=re.IGNORECASE | re.DOTALL)
     
+    checkpoint()
     # Replace images
     content = re.sub(r'<img.*?src="(.*?)".*?alt="(.*?)".*?>', r"![\2](\1)", content, flags=re.IGNORECASE | re.DOTALL)
     content = re.sub(r'<img.*?src="(.*?)".*?>', r"![](\1)", content, flags=re.IGNORECASE | re.DOTALL)
     
+    checkpoint()
     # Replace divs and spans with their content
     content = re.sub(r"<div.*?>(.*?)</div>", r"\1\n", content, flags=re.IGNORECASE | re.DOTALL)
     content = re.sub(r"<span.*?>(.*?)</span>", r"\1", content, flags=re.IGNORECASE | re.DOTALL)
     
+    checkpoint()
     # Replace line breaks
     content = re.sub(r"<br.*?>", r"\n", content, flags=re.IGNORECASE)
     
+    checkpoint()
     # Replace horizontal rules
     content = re.sub(r"<hr.*?>", r"\n---\n", content, flags=re.IGNORECASE)
     
+    checkpoint()
     # Remove remaining HTML tags
     content = re.sub(r"<.*?>", "", content)
     
+    checkpoint()
     # Decode HTML entities
     content = decode_html_entities(content)
     
@@ -94,6 +117,10 @@ def convert_html_to_markdown(html_content: str) -> str:
     return markdown
 
 
+def _no_checkpoint() -> None:
+    pass
+
+
 def extract_title(html_content: str) -> Optional[str]:
     """
     Extract the title from HTML content.
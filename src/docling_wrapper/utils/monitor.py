@@ -0,0 +1,255 @@
+"""
+Resource and event-loop health monitoring.
+
+A background task samples event-loop lag, memory, CPU time, open file
+descriptors and conversion load at a fixed interval. The samples feed the
+health endpoints and the metrics registry. The worker is degraded while a
+measurement is above its configured threshold, so orchestrators can route
+traffic away from it.
+"""
+
+import asyncio
+import logging
+import os
+import resource
+import sys
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from docling_wrapper.config import (
+    CONVERSION_WORKERS,
+    HEALTH_MAX_LOOP_LAG_SECONDS,
+    HEALTH_MAX_OPEN_FDS,
+    HEALTH_MAX_QUEUE_DEPTH,
+    HEALTH_MAX_RSS_MB,
+    MONITOR_INTERVAL_SECONDS,
+)
+from docling_wrapper.utils.executor import in_flight_count, queue_depth
+from docling_wrapper.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Number of recent loop-lag measurements the health status looks at
+LAG_WINDOW = 10
+
+STATUS_HEALTHY = "healthy"
+STATUS_DEGRADED = "degraded"
+
+
+@dataclass
+class HealthThresholds:
+    """
+    Limits above which the worker counts as degraded; 0 disables a limit.
+    """
+
+    max_loop_lag_seconds: float = HEALTH_MAX_LOOP_LAG_SECONDS
+    max_rss_mb: float = HEALTH_MAX_RSS_MB
+    max_open_fds: int = HEALTH_MAX_OPEN_FDS
+    max_queue_depth: int = HEALTH_MAX_QUEUE_DEPTH
+
+
+@dataclass
+class ResourceSample:
+    """
+    A measurement of the worker's resources and load.
+    """
+
+    timestamp: float
+    loop_lag_seconds: float
+    max_loop_lag_seconds: float
+    rss_mb: Optional[float]
+    cpu_seconds: float
+    cpu_percent: Optional[float]
+    open_fds: Optional[int]
+    fd_limit: Optional[int]
+    conversions_in_flight: int
+    conversion_queue_depth: int
+    conversion_workers: int
+    status: str = STATUS_HEALTHY
+    reasons: List[str] = field(default_factory=list)
+
+
+class ResourceMonitor:
+    """
+    Samples resources in the background and evaluates health thresholds.
+    """
+
+    def __init__(
+        self,
+        interval_seconds: float = MONITOR_INTERVAL_SECONDS,
+        thresholds: Optional[HealthThresholds] = None,
+    ) -> None:
+        self.interval_seconds = interval_seconds
+        self.thresholds = thresholds or HealthThresholds()
+        self._lags: Deque[float] = deque(maxlen=LAG_WINDOW)
+        self._last_tick: Optional[float] = None
+        self._last_cpu: Optional[Tuple[float, float]] = None
+        self._latest: Optional[ResourceSample] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """
+        Start sampling on the running event loop.
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logger.info(
+                f"Resource monitor started (interval {self.interval_seconds:g}s)"
+            )
+
+    async def stop(self) -> None:
+        """
+        Stop sampling.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def snapshot(self) -> ResourceSample:
+        """
+        Get the current health of the worker.
+
+        Resources are measured on demand; loop lag comes from the background
+        task and includes the time since its last tick, so a loop that has
+        been blocked since then shows up once it answers again.
+
+        Returns:
+            The current sample with its health status
+        """
+        return self._sample(self._current_lag(), advance_cpu=False)
+
+    async def _run(self) -> None:
+        interval = self.interval_seconds
+        while True:
+            expected = time.monotonic() + interval
+            self._last_tick = time.monotonic()
+            await asyncio.sleep(interval)
+            lag = max(time.monotonic() - expected, 0.0)
+            self._lags.append(lag)
+            try:
+                self._record(self._sample(lag))
+            except Exception as e:
+                logger.warning(f"Resource sampling failed: {str(e)}")
+
+    def _current_lag(self) -> float:
+        if self._last_tick is None:
+            return 0.0
+        # The loop is late if the monitor has not woken up when it should have
+        overdue = time.monotonic() - self._last_tick - self.interval_seconds
+        return max(overdue, self._lags[-1] if self._lags else 0.0, 0.0)
+
+    def _sample(self, lag: float, advance_cpu: bool = True) -> ResourceSample:
+        now = time.monotonic()
+        times = os.times()
+        cpu_seconds = times.user + times.system
+        cpu_percent = None
+        if self._last_cpu is not None and now > self._last_cpu[0]:
+            cpu_percent = (
+                100 * (cpu_seconds - self._last_cpu[1]) / (now - self._last_cpu[0])
+            )
+        # On-demand samples measure CPU usage since the last background tick
+        if advance_cpu or self._last_cpu is None:
+            self._last_cpu = (now, cpu_seconds)
+
+        sample = ResourceSample(
+            timestamp=time.time(),
+            loop_lag_seconds=lag,
+            max_loop_lag_seconds=max([lag, *self._lags]),
+            rss_mb=_rss_mb(),
+            cpu_seconds=cpu_seconds,
+            cpu_percent=cpu_percent,
+            open_fds=_open_fds(),
+            fd_limit=_fd_limit(),
+            conversions_in_flight=in_flight_count(),
+            conversion_queue_depth=queue_depth(),
+            conversion_workers=CONVERSION_WORKERS,
+        )
+        sample.reasons = self._check_thresholds(sample)
+        sample.status = STATUS_DEGRADED if sample.reasons else STATUS_HEALTHY
+        return sample
+
+    def _check_thresholds(self, sample: ResourceSample) -> List[str]:
+        limits = self.thresholds
+        reasons = []
+        if _above(sample.max_loop_lag_seconds, limits.max_loop_lag_seconds):
+            reasons.append(
+                f"event loop lag {sample.max_loop_lag_seconds:.3f}s "
+                f"exceeds {limits.max_loop_lag_seconds:g}s"
+            )
+        if _above(sample.rss_mb, limits.max_rss_mb):
+            reasons.append(f"RSS {sample.rss_mb:.0f}MB exceeds {limits.max_rss_mb:g}MB")
+        if _above(sample.open_fds, limits.max_open_fds):
+            reasons.append(
+                f"{sample.open_fds} open file descriptors exceed {limits.max_open_fds}"
+            )
+        if _above(sample.conversion_queue_depth, limits.max_queue_depth):
+            reasons.append(
+                f"{sample.conversion_queue_depth} queued conversions exceed {limits.max_queue_depth}"
+            )
+        return reasons
+
+    def _record(self, sample: ResourceSample) -> None:
+        metrics.set_gauge("event_loop_lag_seconds", sample.loop_lag_seconds)
+        metrics.set_gauge("process_cpu_seconds", sample.cpu_seconds)
+        if sample.rss_mb is not None:
+            metrics.set_gauge("process_rss_megabytes", sample.rss_mb)
+        if sample.open_fds is not None:
+            metrics.set_gauge("process_open_fds", sample.open_fds)
+        metrics.set_gauge("conversions_in_flight", sample.conversions_in_flight)
+        metrics.set_gauge("conversion_queue_depth", sample.conversion_queue_depth)
+        metrics.set_gauge(
+            "worker_degraded", 1.0 if sample.status == STATUS_DEGRADED else 0.0
+        )
+
+        previous = self._latest
+        if previous is None or previous.status != sample.status:
+            if sample.status == STATUS_DEGRADED:
+                logger.warning(f"Worker degraded: {'; '.join(sample.reasons)}")
+            elif previous is not None:
+                logger.info("Worker healthy again")
+        self._latest = sample
+
+
+def sample_as_dict(sample: ResourceSample) -> Dict[str, Any]:
+    """
+    Convert a sample to a JSON-serialisable dictionary.
+    """
+    return asdict(sample)
+
+
+def _above(value: Optional[float], limit: float) -> bool:
+    # A limit of 0 is disabled; unavailable measurements never degrade
+    return bool(limit) and value is not None and value > limit
+
+
+def _rss_mb() -> Optional[float]:
+    try:
+        with open("/proc/self/statm") as statm:
+            resident_pages = int(statm.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        pass
+    # Without /proc only the peak is available (kilobytes on Linux, bytes on macOS)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _open_fds() -> Optional[int]:
+    for fd_dir in ("/proc/self/fd", "/dev/fd"):
+        try:
+            return len(os.listdir(fd_dir))
+        except OSError:
+            continue
+    return None
+
+
+def _fd_limit() -> Optional[int]:
+    soft, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    return None if soft == resource.RLIM_INFINITY else soft
+
+
+# Shared monitor used by the service
+resource_monitor = ResourceMonitor()
@@ -0,0 +1,246 @@
+"""
+Profiling tools for diagnosing slow conversions.
+
+A single conversion can be run under cProfile, with the report kept for
+later retrieval. A sampling profiler records the stacks of every thread of
+the running worker in the folded format read by flamegraph tools.
+"""
+
+import cProfile
+import io
+import logging
+import marshal
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from docling_wrapper.config import PROFILE_STORE_MAX_PROFILES
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Deepest stack recorded by the sampling profiler
+MAX_STACK_DEPTH = 128
+
+# Since Python 3.12 cProfile observes every thread, not only the one enabling it
+PROFILES_ARE_PROCESS_WIDE = sys.version_info >= (3, 12)
+
+
+class ProfilerBusy(Exception):
+    """
+    Raised when a profiler is requested while another one is running.
+    """
+
+
+@dataclass
+class ConversionProfile:
+    """
+    A cProfile capture of a single conversion.
+    """
+
+    profile_id: str
+    label: str
+    created_at: float
+    duration_ms: int
+    profiler: cProfile.Profile
+    # Whether the profile also covers other threads that ran meanwhile
+    process_wide: bool = PROFILES_ARE_PROCESS_WIDE
+
+    def report(self, sort: str = "cumulative", limit: int = 50) -> str:
+        """
+        Render the profile as a pstats text report.
+
+        Args:
+            sort: pstats sort key, such as "cumulative" or "tottime"
+            limit: Number of functions to list
+
+        Returns:
+            The report
+        """
+        stream = io.StringIO()
+        if self.process_wide:
+            stream.write(
+                "Process-wide profile: functions run by other threads during the "
+                "conversion, such as concurrent requests, are included.\n\n"
+            )
+        stats = pstats.Stats(self.profiler, stream=stream)
+        stats.strip_dirs().sort_stats(sort).print_stats(limit)
+        return stream.getvalue()
+
+    def dump(self) -> bytes:
+        """
+        Serialise the profile in the pstats file format, readable by snakeviz and pstats.
+
+        Returns:
+            The profile data
+        """
+        self.profiler.create_stats()
+        return marshal.dumps(self.profiler.stats)
+
+
+class ProfileStore:
+    """
+    Runs functions under cProfile and keeps the most recent profiles.
+
+    The interpreter allows one cProfile session at a time, so profiled
+    conversions do not overlap. Since Python 3.12 a session observes every
+    thread, so work running concurrently on other threads shows up in the
+    profile as well; such profiles are marked process_wide and their reports
+    say so.
+    """
+
+    def __init__(self, max_profiles: int = PROFILE_STORE_MAX_PROFILES) -> None:
+        self.max_profiles = max_profiles
+        self._profiles: "OrderedDict[str, ConversionProfile]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._session = threading.Lock()
+
+    def profile(
+        self, label: str, func: Callable[..., T], *args: Any, **kwargs: Any
+    ) -> Tuple[T, str]:
+        """
+        Run a function under cProfile and store the profile.
+
+        Args:
+            label: Description of the profiled work, such as the source URL
+            func: The function to run
+            args: Positional arguments for the function
+            kwargs: Keyword arguments for the function
+
+        Returns:
+            Tuple containing:
+            - The result of the function
+            - The id of the stored profile
+
+        Raises:
+            ProfilerBusy: If another profile is being captured
+        """
+        if not self._session.acquire(blocking=False):
+            raise ProfilerBusy("Another conversion is being profiled")
+        try:
+            profiler = cProfile.Profile()
+            start = time.perf_counter()
+            profiler.enable()
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                profiler.disable()
+            duration_ms = int((time.perf_counter() - start) * 1000)
+        finally:
+            self._session.release()
+
+        profile = ConversionProfile(
+            profile_id=uuid.uuid4().hex,
+            label=label,
+            created_at=time.time(),
+            duration_ms=duration_ms,
+            profiler=profiler,
+        )
+        with self._lock:
+            self._profiles[profile.profile_id] = profile
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+        logger.info(f"Stored profile {profile.profile_id} of {label} ({duration_ms}ms)")
+        return result, profile.profile_id
+
+    def get(self, profile_id: str) -> Optional[ConversionProfile]:
+        """
+        Look up a stored profile.
+
+        Args:
+            profile_id: Id of the profile
+
+        Returns:
+            The profile, or None if it is unknown or was evicted
+        """
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+    def list(self) -> List[ConversionProfile]:
+        """
+        Get the stored profiles, newest first.
+        """
+        with self._lock:
+            return list(reversed(self._profiles.values()))
+
+
+_sampling_lock = threading.Lock()
+
+
+def sample_stacks(duration_seconds: float, interval_seconds: float) -> Dict[str, int]:
+    """
+    Sample the stacks of all other threads at a fixed interval.
+
+    This only reads the current frame of each thread, so the overhead on the
+    sampled threads is small. It blocks for the whole duration and should
+    run in its own thread.
+
+    Args:
+        duration_seconds: How long to sample
+        interval_seconds: Time between samples
+
+    Returns:
+        Sample counts keyed by folded stack ("thread;outer;...;inner")
+
+    Raises:
+        ProfilerBusy: If the sampling profiler is already running
+    """
+    if not _sampling_lock.acquire(blocking=False):
+        raise ProfilerBusy("The sampling profiler is already running")
+    try:
+        own_id = threading.get_ident()
+        stacks: Counter = Counter()
+        end = time.monotonic() + duration_seconds
+        while time.monotonic() < end:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stacks[_fold_stack(names.get(thread_id, str(thread_id)), frame)] += 1
+            time.sleep(interval_seconds)
+        return dict(stacks)
+    finally:
+        _sampling_lock.release()
+
+
+def format_folded(stacks: Dict[str, int]) -> str:
+    """
+    Render stack samples in the folded format of flamegraph.pl and speedscope.
+
+    Args:
+        stacks: Sample counts keyed by folded stack
+
+    Returns:
+        One "stack count" line per distinct stack, most frequent first
+    """
+    lines = [
+        f"{stack} {count}"
+        for stack, count in sorted(
+            stacks.items(), key=lambda item: item[1], reverse=True
+        )
+    ]
+    return "\n".join(lines) + ("\n" if lines else "")
+
+
+def _fold_stack(thread_name: str, frame: Any) -> str:
+    frames: List[str] = []
+    while frame is not None and len(frames) < MAX_STACK_DEPTH:
+        code = frame.f_code
+        module = frame.f_globals.get("__name__", "?")
+        frames.append(f"{module}:{code.co_name}:{code.co_firstlineno}")
+        frame = frame.f_back
+    frames.append(thread_name.replace(" ", "_"))
+    # Semicolons and spaces separate frames and counts in the folded format
+    return ";".join(
+        name.replace(";", ":").replace(" ", "_") for name in reversed(frames)
+    )
+
+
+# Shared store used by the API
+profile_store = ProfileStore()
@@ -2,39 +2,31 @@
 """
 Main entry point for the Claude - Docling API Wrapper.
 """
+
 import logging
-import sys
 from contextlib import asynccontextmanager
+from typing import Any, Dict
 
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.utils import get_openapi
+from fastapi.responses import JSONResponse
 
-# Check if docling is installed, if not, use our mock implementation
-try:
-    import docling
-    
-    # Check if docling has the necessary functionality
-    required_functions = ['convert_html_to_markdown']
-    missing_functions = [func for func in required_functions if not hasattr(docling, func)]
-    
-    if missing_functions:
-        print(f"Docling library found but missing required functions: {', '.join(missing_functions)}")
-        print("Using mock implementation for missing functionality")
-        # Import our mock module and add the missing functions to the docling module
-        import importlib
-        mock_docling = importlib.import_module('docling_wrapper.utils.mock_docling')
-        for func in missing_functions:
-            setattr(docling, func, getattr(mock_docling, func))
-    else:
-        print("Using actual Docling library with all required functionality")
-except ImportError:
-    print("Docling library not found, using mock implementation")
-    import importlib
-    sys.modules['docling'] = importlib.import_module('docling_wrapper.utils.mock_docling')
-
+from docling_wrapper.api.admin import router as admin_router
 from docling_wrapper.api.routes import router as api_router
+from docling_wrapper.services.backends import default_mode, list_backends
+from docling_wrapper.services.near_duplicates import near_duplicate_index
+from docling_wrapper.services.result_cache import cache_refresher
+from docling_wrapper.services.segmenter import shutdown_segment_pool
+from docling_wrapper.utils.executor import shutdown_executor
+from docling_wrapper.utils.http_client import close_http_clients
+from docling_wrapper.utils.metrics import metrics
+from docling_wrapper.utils.monitor import (
+    STATUS_HEALTHY,
+    resource_monitor,
+    sample_as_dict,
+)
 
 # Configure logging
 logging.basicConfig(
@@ -51,9 +43,23 @@ async def lifespan(app: FastAPI):
     """
     # Startup events
     logger.info("Starting up Claude - Docling API Wrapper")
+    available = [backend.name for backend in list_backends() if backend.is_available()]
+    logger.info(
+        f"Conversion backends available: {', '.join(available)}; "
+        f"default mode {default_mode().value}"
+    )
+    near_duplicate_index.load()
+    resource_monitor.start()
+    cache_refresher.start()
     yield
     # Shutdown events
     logger.info("Shutting down Claude - Docling API Wrapper")
+    await cache_refresher.stop()
+    await resource_monitor.stop()
+    await close_http_clients()
+    shutdown_executor()
+    shutdown_segment_pool()
+    near_duplicate_index.save()
 
 
 app = FastAPI(
@@ -74,6 +80,7 @@ app.add_middleware(
 
 # Include API routes
 app.include_router(api_router, prefix="/api/v1")
+app.include_router(admin_router, prefix="/api/v1")
 
 
 # Custom OpenAPI schema
@@ -86,37 +93,45 @@ def custom_openapi():
         description=app.description,
         routes=app.routes,
     )
-    
+
     # Add additional info to the OpenAPI schema
     openapi_schema["info"]["x-logo"] = {
         "url": "https://fastapi.tiangolo.com/img/logo-margin/logo-teal.png"
     }
-    
+
     # Add contact information
     openapi_schema["info"]["contact"] = {
         "name": "Claude API Team",
         "url": "https://github.com/claude/docling-wrapper",
         "email": "api@claude-docling.example.com",
     }
-    
+
     # Add license information
     openapi_schema["info"]["license"] = {
         "name": "MIT",
         "url": "https://opensource.org/licenses/MIT",
     }
-    
+
     # Add tags metadata
     openapi_schema["tags"] = [
         {
             "name": "Conversion",
             "description": "Operations related to document conversion",
         },
+        {
+            "name": "Crawl",
+            "description": "Crawling sites and converting their pages",
+        },
         {
             "name": "Health",
             "description": "Health check endpoints",
         },
+        {
+            "name": "Admin",
+            "description": "Diagnostics that require the admin token",
+        },
     ]
-    
+
     app.openapi_schema = openapi_schema
     return app.openapi_schema
 
@@ -129,7 +144,7 @@ app.openapi = custom_openapi
 async def get_openapi_spec():
     """
     Get the OpenAPI specification for the API.
-    
+
     Returns the complete OpenAPI specification in JSON format.
     This can be used to generate API documentation or client libraries.
     """
@@ -138,11 +153,75 @@ async def get_openapi_spec():
 
 # Health check endpoint
 @app.get("/health", tags=["Health"])
-async def health_check():
+async def health_check() -> Dict[str, Any]:
     """
     Health check endpoint to verify the API is running.
+
+    This is a liveness probe and always returns 200 while the worker
+    responds. The status is "degraded" with the reasons listed while a
+    resource threshold such as event-loop lag or conversion queue depth is
+    exceeded; /ready turns that into a 503 for load balancers.
+    """
+    sample = resource_monitor.snapshot()
+    content: Dict[str, Any] = {"status": sample.status, "version": app.version}
+    if sample.status != STATUS_HEALTHY:
+        content["reasons"] = sample.reasons
+    return content
+
+
+# Readiness endpoint
+@app.get("/ready", tags=["Health"])
+async def readiness_check() -> JSONResponse:
+    """
+    Readiness probe telling load balancers whether to route requests here.
+
+    Returns 503 while the worker is degraded, so traffic goes to other
+    workers until it recovers, without the worker being restarted.
+    """
+    sample = resource_monitor.snapshot()
+    content: Dict[str, Any] = {"status": sample.status, "version": app.version}
+    if sample.status != STATUS_HEALTHY:
+        content["reasons"] = sample.reasons
+        return JSONResponse(status_code=503, content=content)
+    return JSONResponse(content=content)
+
+
+# Detailed health endpoint
+@app.get("/health/detailed", tags=["Health"])
+async def detailed_health_check() -> Dict[str, Any]:
+    """
+    Get the health status with the resource measurements behind it.
+
+    Reports event-loop lag, memory, CPU time, open file descriptors and
+    conversion load together with the configured thresholds, and which
+    conversion backends are installed. Always returns 200; the status field
+    tells whether the worker is degraded.
+    """
+    sample = resource_monitor.snapshot()
+    return {
+        "status": sample.status,
+        "version": app.version,
+        "resources": sample_as_dict(sample),
+        "thresholds": vars(resource_monitor.thresholds),
+        "backends": {
+            "default_mode": default_mode().value,
+            "available": {
+                backend.name: backend.is_available() for backend in list_backends()
+            },
+        },
+    }
+
+
+# Metrics endpoint
+@app.get("/metrics", tags=["Health"])
+async def get_metrics() -> Dict[str, Any]:
+    """
+    Get the service metrics.
+
+    Returns counters, gauges and summaries collected since startup, such as
+    fetch attempts, retries and hedged requests.
     """
-    return {"status": "healthy", "version": app.version}
+    return metrics.snapshot()
 
 
 if __name__ == "__main__":
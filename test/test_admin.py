@@ -0,0 +1,76 @@
+"""
+Tests for the admin token gate and conversion profiling.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+import docling_wrapper.api.admin as admin
+from docling_wrapper.api.routes import _conversion_error_response
+from main import app
+
+client = TestClient(app)
+
+TOKEN = "secret-token"
+HTML_REQUEST = {
+    "type": "html_source",
+    "source": "<html><body><h1>Profiled</h1><p>Text</p></body></html>",
+    "options": {"profile": True, "include_metadata": True},
+}
+
+
+@pytest.fixture
+def admin_token(monkeypatch):
+    monkeypatch.setattr(admin, "ADMIN_TOKEN", TOKEN)
+
+
+def test_admin_routes_are_disabled_without_configured_token():
+    response = client.get("/api/v1/admin/profiles", headers={"X-Admin-Token": ""})
+
+    assert response.status_code == 403
+
+
+def test_admin_routes_require_the_token(admin_token):
+    assert client.get("/api/v1/admin/profiles").status_code == 403
+    assert (
+        client.get(
+            "/api/v1/admin/profiles", headers={"X-Admin-Token": "wrong"}
+        ).status_code
+        == 403
+    )
+    assert (
+        client.get(
+            "/api/v1/admin/profiles", headers={"X-Admin-Token": TOKEN}
+        ).status_code
+        == 200
+    )
+
+
+def test_profiling_requires_the_token(admin_token):
+    response = client.post("/api/v1/convert", json=HTML_REQUEST)
+
+    assert response.status_code == 403
+    assert "X-Admin-Token" in response.json()["details"]["message"]
+
+
+def test_profiled_conversion_is_stored(admin_token):
+    headers = {"X-Admin-Token": TOKEN}
+
+    response = client.post("/api/v1/convert", json=HTML_REQUEST, headers=headers)
+
+    assert response.status_code == 200
+    profile_id = response.json()["metadata"]["profile_id"]
+    report = client.get(f"/api/v1/admin/profiles/{profile_id}", headers=headers)
+    assert report.status_code == 200
+    assert "function calls" in report.text
+    listed = client.get("/api/v1/admin/profiles", headers=headers).json()
+    profile = next(item for item in listed if item["profile_id"] == profile_id)
+    assert profile["process_wide"] == report.text.startswith("Process-wide profile")
+
+
+def test_os_permission_errors_are_not_reported_as_forbidden():
+    response = _conversion_error_response(
+        PermissionError("[Errno 13] Permission denied")
+    )
+
+    assert response.status_code == 500
@@ -0,0 +1,55 @@
+"""
+Tests for conversion engine selection.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from docling_wrapper.api.models import ConversionMode
+from docling_wrapper.api.routes import _conversion_error_response
+from docling_wrapper.services import backends
+from main import app
+
+client = TestClient(app)
+
+
+class InstalledDocling(backends.DoclingBackend):
+    def is_available(self):
+        return True
+
+
+@pytest.fixture
+def docling_installed(monkeypatch):
+    monkeypatch.setitem(
+        backends._backends, backends.DOCLING_BACKEND, InstalledDocling()
+    )
+
+
+def test_default_mode_is_fast_even_with_docling_installed(docling_installed):
+    assert backends.default_mode() == ConversionMode.FAST
+    assert backends.select_backend(None, 100).name == backends.FAST_BACKEND
+
+
+def test_balanced_mode_uses_docling_for_small_documents(docling_installed, monkeypatch):
+    monkeypatch.setattr(backends, "BALANCED_DOCLING_MAX_BYTES", 1000)
+
+    assert backends.select_backend(ConversionMode.BALANCED, 1000).name == "docling"
+    assert backends.select_backend(ConversionMode.BALANCED, 1001).name == "fast"
+
+
+def test_missing_engine_is_service_unavailable(monkeypatch):
+    monkeypatch.setattr(backends.DoclingBackend, "is_available", lambda self: False)
+
+    response = client.post(
+        "/api/v1/convert",
+        json={
+            "type": "html_source",
+            "source": "<p>Text</p>",
+            "options": {"mode": "accurate"},
+        },
+    )
+
+    assert response.status_code == 503
+    assert response.json()["error"] == "Backend unavailable"
+    assert not isinstance(backends.BackendUnavailable("x"), NotImplementedError)
+    assert _conversion_error_response(NotImplementedError("pdf")).status_code == 501
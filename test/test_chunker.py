@@ -0,0 +1,74 @@
+"""
+Tests for splitting converted Markdown into heading-aware chunks.
+"""
+
+from docling_wrapper.api.models import ChunkingOptions, ChunkUnit
+from docling_wrapper.services.chunker import chunk_markdown, split_sections
+
+
+def test_sections_follow_headings_outside_code_fences():
+    markdown = "Intro\n\n# A\n\nText\n\n```\n# not a heading\n```\n\n## B\n\nMore\n"
+
+    sections = split_sections(markdown)
+
+    assert [section.heading_path for section in sections] == [[], ["A"], ["A", "B"]]
+    assert "".join(markdown[s.start : s.end] for s in sections) == markdown
+
+
+def test_chunks_never_cross_headings():
+    markdown = "# One\n\nFirst section.\n\n# Two\n\nSecond section.\n"
+
+    chunks = chunk_markdown(markdown, ChunkingOptions(max_size=1000, overlap=0))
+
+    assert [chunk.text for chunk in chunks] == [
+        "# One\n\nFirst section.",
+        "# Two\n\nSecond section.",
+    ]
+    assert [chunk.heading_path for chunk in chunks] == [["One"], ["Two"]]
+
+
+def test_chunks_respect_max_size():
+    markdown = " ".join(f"word{i}" for i in range(200))
+
+    chunks = chunk_markdown(markdown, ChunkingOptions(max_size=50, overlap=10))
+
+    assert all(len(chunk.text) <= 50 for chunk in chunks)
+    assert chunks[-1].text.endswith("word199")
+
+
+def test_overlap_starts_on_word_boundary():
+    markdown = "Some interesting text about testing things here"
+    words = set(markdown.split())
+
+    chunks = chunk_markdown(markdown, ChunkingOptions(max_size=10, overlap=5))
+
+    # Only the word longer than a chunk may be cut
+    for chunk in chunks:
+        assert chunk.text.split()[0] in words | {"interestin", "g"}
+    assert "esting" not in [chunk.text.split()[0] for chunk in chunks]
+
+
+def test_overlap_repeats_whole_words():
+    markdown = "alpha beta gamma delta epsilon zeta eta theta"
+
+    chunks = chunk_markdown(markdown, ChunkingOptions(max_size=20, overlap=8))
+
+    for previous, chunk in zip(chunks, chunks[1:]):
+        first_word = chunk.text.split()[0]
+        assert first_word in markdown.split()
+        assert (
+            first_word in previous.text.split() or chunk.start_byte >= previous.end_byte
+        )
+
+
+def test_token_unit_and_byte_offsets():
+    markdown = "# Überschrift\n\nGrüße " + "text " * 40
+
+    chunks = chunk_markdown(
+        markdown, ChunkingOptions(max_size=10, unit=ChunkUnit.TOKENS, overlap=0)
+    )
+    encoded = markdown.encode("utf-8")
+
+    for chunk in chunks:
+        assert len(chunk.text) <= 40
+        assert encoded[chunk.start_byte : chunk.end_byte].decode("utf-8") == chunk.text
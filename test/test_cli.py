@@ -0,0 +1,73 @@
+"""
+Tests for the bulk conversion command.
+"""
+
+import json
+
+import pytest
+
+from docling_wrapper import cli
+
+
+@pytest.fixture
+def pages(tmp_path):
+    directory = tmp_path / "pages"
+    (directory / "nested").mkdir(parents=True)
+    (directory / "first.html").write_text("<h1>First</h1><p>One</p>")
+    (directory / "nested" / "second.html").write_text("<h1>Second</h1><p>Two</p>")
+    return directory
+
+
+def test_converts_and_resumes(pages, tmp_path, capsys):
+    output_dir = tmp_path / "markdown"
+    argv = [str(pages), "--output-dir", str(output_dir), "--workers", "1"]
+
+    assert cli.main(argv) == 0
+    assert "First" in (output_dir / "first.md").read_text()
+    assert "Second" in (output_dir / "nested" / "second.md").read_text()
+    capsys.readouterr()
+
+    assert cli.main(argv) == 0
+    assert "Skipping 2 files" in capsys.readouterr().err
+
+    # Changed sources are converted again
+    (pages / "first.html").write_text("<h1>Changed</h1><p>Longer text</p>")
+    assert cli.main(argv) == 0
+    assert "Skipping 1 files" in capsys.readouterr().err
+    assert "Changed" in (output_dir / "first.md").read_text()
+
+
+def test_manifest_outputs_must_stay_in_the_output_directory(pages, tmp_path):
+    manifest = tmp_path / "manifest.jsonl"
+    output_dir = str(tmp_path / "markdown")
+
+    manifest.write_text(json.dumps({"path": "pages/first.html", "output": "a/b.md"}))
+    (job,) = cli.collect_jobs([str(manifest)], output_dir)
+    assert job.output == str(tmp_path / "markdown" / "a" / "b.md")
+
+    for output in ("../escaped.md", str(tmp_path / "escaped.md"), "."):
+        manifest.write_text(json.dumps({"path": "pages/first.html", "output": output}))
+        with pytest.raises(ValueError):
+            list(cli.collect_jobs([str(manifest)], output_dir))
+
+
+def test_sources_are_recorded_as_of_enqueueing(pages, tmp_path):
+    output_dir = str(tmp_path / "markdown")
+    progress_path = str(tmp_path / "progress.jsonl")
+    jobs = list(cli.collect_jobs([str(pages / "first.html")], output_dir))
+    # Edited after the job was created, e.g. while earlier files convert
+    (pages / "first.html").write_text("<h1>Edited</h1><p>Much longer text</p>")
+
+    cli._run_pool(jobs, cli.ConversionOptions(), False, 1, 1, progress_path)
+
+    (entry,) = cli.load_progress(progress_path).values()
+    assert entry["size"] == jobs[0].size
+    (job,) = cli.collect_jobs([str(pages / "first.html")], output_dir)
+    assert not cli._is_done(job, cli.load_progress(progress_path))
+
+
+def test_sources_writing_the_same_output_are_rejected(pages, tmp_path):
+    (pages / "first.htm").write_text("<h1>Other</h1>")
+
+    with pytest.raises(ValueError, match="both write"):
+        list(cli.collect_jobs([str(pages)], str(tmp_path / "markdown")))
@@ -0,0 +1,89 @@
+"""
+Tests for the content filter applied before conversion.
+"""
+
+import pytest
+
+from docling_wrapper.services.html_converter import strip_boilerplate
+
+
+def test_clean_drops_non_content_markup():
+    html = (
+        "<html><head><style>p {}</style><script>alert(1)</script></head>"
+        "<body><!-- comment --><p>Text</p><svg><path/></svg></body></html>"
+    )
+
+    filtered, bytes_removed = strip_boilerplate(html)
+
+    assert filtered == "<html><head></head><body><p>Text</p></body></html>"
+    assert bytes_removed == len(html) - len(filtered)
+
+
+def test_main_content_keeps_main_region():
+    html = (
+        "<body><header>Site</header><nav>Menu</nav>"
+        "<main><h1>Title</h1><aside>Related</aside><p>Body</p></main>"
+        "<footer>Footer</footer></body>"
+    )
+
+    filtered, _ = strip_boilerplate(html, main_content=True)
+
+    assert filtered == "<main><h1>Title</h1><p>Body</p></main>"
+
+
+def test_main_content_picks_largest_article():
+    html = (
+        "<body><article><p>Teaser</p></article>"
+        "<article><h1>Story</h1><p>Much longer story text</p></article></body>"
+    )
+
+    filtered, _ = strip_boilerplate(html, main_content=True)
+
+    assert "Story" in filtered
+    assert "Teaser" not in filtered
+
+
+def test_main_content_falls_back_to_body_without_page_header():
+    html = "<body><header>Site</header><h1>Title</h1><p>Text</p></body>"
+
+    filtered, _ = strip_boilerplate(html, main_content=True)
+
+    assert filtered == "<h1>Title</h1><p>Text</p>"
+
+
+def test_main_content_keeps_page_wide_forms():
+    html = (
+        '<body><form id="aspnetForm" method="post"><nav>Menu</nav>'
+        "<h1>Title</h1><p>Text</p></form></body>"
+    )
+
+    filtered, _ = strip_boilerplate(html, main_content=True)
+
+    assert "<h1>Title</h1><p>Text</p>" in filtered
+    assert "Menu" not in filtered
+
+
+def test_main_content_drops_forms_without_content():
+    html = (
+        '<body><form action="/search"><input name="q"><button>Search</button></form>'
+        "<p>Text</p></body>"
+    )
+
+    filtered, _ = strip_boilerplate(html, main_content=True)
+
+    assert filtered == "<p>Text</p>"
+
+
+def test_main_content_reports_page_without_remaining_text():
+    html = "<body><nav>Only navigation</nav><footer>and a footer</footer></body>"
+
+    with pytest.raises(ValueError, match="main_content"):
+        strip_boilerplate(html, main_content=True)
+
+
+def test_main_content_accepts_empty_page():
+    filtered, _ = strip_boilerplate(
+        "<html><head><title>T</title></head><body></body></html>", True
+    )
+
+    assert filtered == ""
@@ -0,0 +1,125 @@
+"""
+Tests for reading crawl seeds from sitemaps.
+"""
+
+import asyncio
+import gzip
+
+import pytest
+
+import docling_wrapper.services.crawler as crawler
+from docling_wrapper.api.models import CrawlRequest
+from docling_wrapper.services.section_index import document_key
+
+SITEMAP = b"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <url><loc>https://example.com/a</loc></url>
+  <url><loc> https://example.com/b </loc></url>
+  <url><loc>https://other.example.org/c</loc></url>
+</urlset>
+"""
+
+
+def _seed_urls(monkeypatch, content, deadlines=None, **request_fields):
+    async def fetch(
+        url, headers=None, verify_ssl=False, retry_policy=None, deadline=None
+    ):
+        if deadlines is not None:
+            deadlines.append(deadline)
+        return content, {}, len(content)
+
+    monkeypatch.setattr(crawler, "fetch_url_content", fetch)
+    request = CrawlRequest(
+        seed="https://example.com/sitemap.xml", seed_type="sitemap", **request_fields
+    )
+    return asyncio.run(crawler.Crawler(request).seed_urls())
+
+
+def test_sitemap_locations_are_seeds(monkeypatch):
+    urls = _seed_urls(monkeypatch, SITEMAP)
+
+    assert urls == [
+        "https://example.com/a",
+        "https://example.com/b",
+        "https://other.example.org/c",
+    ]
+
+
+def test_gzipped_sitemap_is_decompressed(monkeypatch):
+    urls = _seed_urls(monkeypatch, gzip.compress(SITEMAP))
+
+    assert urls == _seed_urls(monkeypatch, SITEMAP)
+
+
+def test_gzip_bomb_is_rejected(monkeypatch):
+    monkeypatch.setattr(crawler, "SITEMAP_MAX_BYTES", 1024 * 1024)
+    bomb = gzip.compress(b"\0" * (16 * 1024 * 1024))
+
+    with pytest.raises(ValueError, match="Invalid or inaccessible URL"):
+        _seed_urls(monkeypatch, bomb)
+
+
+def test_decompression_stops_at_the_limit():
+    with pytest.raises(ValueError, match="exceeds 1000 bytes"):
+        crawler._decompress_gzip(gzip.compress(b"x" * 5000), 1000)
+
+    assert crawler._decompress_gzip(gzip.compress(b"x" * 1000), 1000) == b"x" * 1000
+
+
+def test_sitemap_with_entities_is_rejected(monkeypatch):
+    entities = b"""<?xml version="1.0"?>
+<!DOCTYPE urlset [<!ENTITY a "aaaaaaaaaa"><!ENTITY b "&a;&a;&a;&a;&a;&a;">]>
+<urlset><url><loc>https://example.com/&b;</loc></url></urlset>
+"""
+
+    with pytest.raises(ValueError, match="Invalid or inaccessible URL"):
+        _seed_urls(monkeypatch, entities)
+
+
+def test_sitemaps_are_fetched_with_a_deadline(monkeypatch):
+    deadlines = []
+
+    _seed_urls(monkeypatch, SITEMAP, deadlines, options={"timeout_ms": 2500})
+
+    assert [deadline.timeout_seconds for deadline in deadlines] == [2.5]
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {"profile": True},
+        {"diff_sections": True},
+        {"changed_sections_only": True},
+        {"use_cache": True},
+    ],
+)
+def test_single_conversion_options_are_rejected(options):
+    request = CrawlRequest(seed="https://example.com/", options=options)
+
+    with pytest.raises(ValueError, match="only available for single conversions"):
+        crawler.Crawler(request)
+
+
+def test_pages_are_indexed_per_headers(monkeypatch):
+    headers = {"Authorization": "Bearer secret"}
+    keys = []
+
+    async def fetch(
+        url, headers=None, verify_ssl=False, retry_policy=None, deadline=None
+    ):
+        return "<h1>Page</h1>", {}, 13
+
+    async def convert(html_content, options, deadline, label, document_key):
+        keys.append(document_key)
+        raise ValueError("stop after recording the key")
+
+    monkeypatch.setattr(crawler, "fetch_url_content", fetch)
+    monkeypatch.setattr(crawler, "convert_html_document_async", convert)
+    request = CrawlRequest(seed="https://example.com/", options={"headers": headers})
+
+    result, _ = asyncio.run(
+        crawler.Crawler(request)._crawl_page("https://example.com/", 0, None)
+    )
+
+    assert not result.success
+    assert keys == [document_key("https://example.com/", headers)]
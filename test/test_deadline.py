@@ -0,0 +1,78 @@
+"""
+Tests for request deadlines and cancellation.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from docling_wrapper.utils.deadline import (
+    ClientDisconnected,
+    Deadline,
+    DeadlineExceeded,
+)
+from docling_wrapper.utils.executor import run_conversion
+from docling_wrapper.utils.http_client import _within_deadline
+
+
+def test_deadline_without_limit_never_expires():
+    deadline = Deadline(0)
+
+    assert deadline.remaining() is None
+    assert deadline.timeout(5.0) == 5.0
+    deadline.check()
+
+
+def test_deadline_bounds_timeouts_and_expires():
+    deadline = Deadline(0.05)
+
+    assert deadline.timeout(5.0) <= 0.05
+    time.sleep(0.06)
+    assert deadline.expired
+    with pytest.raises(DeadlineExceeded):
+        deadline.check()
+
+
+def test_cancelled_deadline_raises_its_reason():
+    deadline = Deadline(10)
+    deadline.cancel()
+
+    with pytest.raises(ClientDisconnected):
+        deadline.check()
+
+
+def test_fetch_without_deadline_is_not_bounded():
+    async def attempt():
+        await asyncio.sleep(0.01)
+        return "done"
+
+    assert asyncio.run(_within_deadline(attempt(), None)) == "done"
+    assert asyncio.run(_within_deadline(attempt(), Deadline())) == "done"
+
+
+def test_fetch_past_deadline_raises():
+    async def attempt():
+        await asyncio.sleep(1)
+
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(_within_deadline(attempt(), Deadline(0.01)))
+
+
+def test_running_conversion_is_asked_to_stop_at_the_deadline():
+    deadline = Deadline(0.05)
+    stopped = []
+
+    def convert():
+        while True:
+            try:
+                deadline.check()
+            except DeadlineExceeded:
+                stopped.append(True)
+                raise
+            time.sleep(0.01)
+
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(run_conversion(convert, deadline=deadline))
+    time.sleep(0.05)
+    assert stopped
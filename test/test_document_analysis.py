@@ -0,0 +1,54 @@
+"""
+Tests for the single-pass HTML document analysis.
+"""
+
+import pytest
+
+from docling_wrapper.services.document_analysis import analyze_html
+
+
+def test_collects_document_information():
+    html = """
+    <html lang="en">
+    <head>
+      <title>Example  Page</title>
+      <meta name="description" content="An example">
+      <link rel="canonical" href="https://example.com/page">
+      <script>var ignored = "not text";</script>
+    </head>
+    <body>
+      <h1>Main heading</h1>
+      <p>Some <a href="/a">linked</a> text.</p>
+      <h2>Second</h2>
+      <img src="image.png">
+      <svg><title>Icon</title></svg>
+    </body>
+    </html>
+    """
+
+    analysis = analyze_html(html)
+
+    assert analysis.title == "Example Page"
+    assert analysis.language == "en"
+    assert analysis.description == "An example"
+    assert analysis.canonical_url == "https://example.com/page"
+    assert analysis.headings == [(1, "Main heading"), (2, "Second")]
+    assert analysis.links == ["/a"]
+    assert analysis.image_count == 1
+    assert "ignored" not in analysis.text
+    assert analysis.text == "Main heading Some linked text. Second"
+    assert analysis.word_count == 6
+
+
+def test_unterminated_title_is_kept():
+    analysis = analyze_html("<title>Unterminated")
+
+    assert analysis.title == "Unterminated"
+
+
+def test_cancellation_callback_aborts_analysis():
+    def check_cancelled():
+        raise TimeoutError("cancelled")
+
+    with pytest.raises(TimeoutError):
+        analyze_html("<p>text</p>", check_cancelled=check_cancelled)
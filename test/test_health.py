@@ -0,0 +1,51 @@
+"""
+Tests for the liveness, readiness and detailed health endpoints.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from docling_wrapper.utils.monitor import HealthThresholds, resource_monitor
+from main import app
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def degraded(monkeypatch):
+    # The process always has more than one open file descriptor
+    thresholds = HealthThresholds(max_open_fds=1)
+    monkeypatch.setattr(resource_monitor, "thresholds", thresholds)
+
+
+def test_healthy_worker_is_live_and_ready():
+    for path in ("/health", "/ready"):
+        response = client.get(path)
+
+        assert response.status_code == 200
+        assert response.json()["status"] == "healthy"
+
+
+def test_degraded_worker_stays_live(degraded):
+    response = client.get("/health")
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "degraded"
+    assert response.json()["reasons"]
+
+
+def test_degraded_worker_is_not_ready(degraded):
+    response = client.get("/ready")
+
+    assert response.status_code == 503
+    assert response.json()["status"] == "degraded"
+
+
+def test_detailed_health_reports_resources(degraded):
+    response = client.get("/health/detailed")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "degraded"
+    assert body["resources"]["open_fds"] > 1
+    assert body["thresholds"]["max_open_fds"] == 1
@@ -0,0 +1,117 @@
+"""
+Tests for the content-addressed image store.
+"""
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from docling_wrapper.services import images
+from docling_wrapper.services.images import ImageStore
+from docling_wrapper.utils.deadline import DeadlineExceeded
+from main import app
+
+client = TestClient(app)
+
+URL = "https://example.com/logo.png"
+PNG = b"\x89PNG\r\n\x1a\nimage"
+
+
+def slow_download(release, error=None):
+    async def download(url, headers, verify_ssl, deadline):
+        await release.wait()
+        if error is not None:
+            raise error
+        return PNG, "image/png"
+
+    return download
+
+
+def test_svg_is_not_accepted():
+    with pytest.raises(ValueError):
+        images._decode_data_uri("data:image/svg+xml,<svg onload='alert(1)'/>")
+
+
+def test_cancelling_the_first_request_keeps_the_shared_download(tmp_path):
+    store = ImageStore(root=str(tmp_path))
+
+    async def run():
+        release = asyncio.Event()
+        store._download = slow_download(release)
+        first = asyncio.create_task(store.fetch(URL))
+        second = asyncio.create_task(store.fetch(URL))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        image = await second
+        assert first.cancelled()
+        return image
+
+    image = asyncio.run(run())
+
+    assert image.size_bytes == len(PNG)
+    assert (tmp_path / image.name[:2] / image.name).read_bytes() == PNG
+
+
+def test_waiters_do_not_inherit_the_first_requests_deadline(tmp_path):
+    store = ImageStore(root=str(tmp_path))
+
+    async def run():
+        release = asyncio.Event()
+        store._download = slow_download(release, DeadlineExceeded("deadline"))
+        first = asyncio.create_task(store.fetch(URL))
+        second = asyncio.create_task(store.fetch(URL))
+        await asyncio.sleep(0)
+        release.set()
+        return await asyncio.gather(first, second, return_exceptions=True)
+
+    first_result, second_result = asyncio.run(run())
+
+    assert isinstance(first_result, DeadlineExceeded)
+    assert isinstance(second_result, ValueError)
+
+
+def test_images_are_served_sandboxed(tmp_path, monkeypatch):
+    monkeypatch.setattr(images.image_store, "root", str(tmp_path))
+    image = images.image_store.put(PNG, "image/png")
+
+    response = client.get(f"/api/v1/images/{image.name}")
+
+    assert response.status_code == 200
+    assert response.content == PNG
+    assert response.headers["content-security-policy"].startswith("sandbox")
+    assert response.headers["x-content-type-options"] == "nosniff"
+    assert client.get("/api/v1/images/not-an-image.svg").status_code == 404
+
+
+def test_downloads_with_different_headers_are_not_shared(tmp_path):
+    store = ImageStore(root=str(tmp_path))
+    downloads = []
+
+    async def download(url, headers, verify_ssl, deadline):
+        downloads.append(headers)
+        await asyncio.sleep(0)
+        return PNG, "image/png"
+
+    store._download = download
+
+    async def run():
+        # Concurrent fetches with different credentials
+        await asyncio.gather(
+            store.fetch(URL, {"Authorization": "Bearer a"}),
+            store.fetch(URL, {"Authorization": "Bearer b"}),
+        )
+        # Neither client's result answers a fetch without credentials
+        await store.fetch(URL)
+        # A repeated fetch with the same headers is served from the URL cache
+        await store.fetch(URL, {"authorization": "Bearer a"})
+
+    asyncio.run(run())
+
+    assert downloads == [
+        {"Authorization": "Bearer a"},
+        {"Authorization": "Bearer b"},
+        None,
+    ]
@@ -0,0 +1,80 @@
+"""
+Tests for near-duplicate detection and skipping.
+"""
+
+import re
+
+import pytest
+from fastapi.testclient import TestClient
+
+from docling_wrapper.api.models import ConversionOptions
+from docling_wrapper.services import html_converter
+from docling_wrapper.services.near_duplicates import (
+    NearDuplicateIndex,
+    simhash,
+)
+from main import app
+
+client = TestClient(app)
+
+TEXT = " ".join(f"word{index % 7} sentence number part" for index in range(40))
+
+
+def page(stamp):
+    return f"<html><body><h1>Report</h1><p>{TEXT}</p><p>Generated {stamp}</p></body></html>"
+
+
+@pytest.fixture
+def index(monkeypatch):
+    enabled = NearDuplicateIndex(max_documents=100, path="")
+    monkeypatch.setattr(html_converter, "near_duplicate_index", enabled)
+    return enabled
+
+
+def test_detection_is_off_by_default():
+    assert not NearDuplicateIndex().enabled
+
+
+def test_matches_are_reported_by_fingerprint():
+    index = NearDuplicateIndex(max_documents=100, path="")
+    fingerprint = simhash(TEXT)
+    index.add("https://other-client.example/private", fingerprint)
+
+    assert index.find(fingerprint ^ 1) == (fingerprint, 1)
+    assert (
+        index.find(fingerprint, exclude="https://other-client.example/private") is None
+    )
+
+
+def test_skipped_documents_are_marked_and_not_indexed(index):
+    options = ConversionOptions(skip_near_duplicates=True)
+    original = html_converter.convert_html_document(page("2024-01-01"), options)
+
+    duplicate = html_converter.convert_html_document(page("2024-02-02"), options)
+
+    assert original.markdown and not original.skipped
+    assert duplicate.skipped
+    assert duplicate.markdown == ""
+    assert duplicate.near_duplicate_of == original.fingerprint
+    assert len(index) == 1
+
+
+def test_response_reports_skipped_without_metadata(index):
+    request = {
+        "type": "html_source",
+        "options": {"skip_near_duplicates": True, "include_metadata": False},
+    }
+    first = client.post(
+        "/api/v1/convert", json={**request, "source": page("10:00")}
+    ).json()
+
+    response = client.post("/api/v1/convert", json={**request, "source": page("11:00")})
+
+    body = response.json()
+    assert response.status_code == 200
+    assert not first["skipped"] and first["duplicate_of"] is None
+    assert body["skipped"]
+    assert body["markdown"] == ""
+    assert body["metadata"] is None
+    # A fingerprint, never the reference of another client's document
+    assert re.fullmatch("[0-9a-f]{16}", body["duplicate_of"])
@@ -0,0 +1,89 @@
+"""
+Tests for the html_url result cache.
+"""
+
+import asyncio
+
+import pytest
+
+from docling_wrapper.api.models import ConversionMetadata, ConversionOptions, SourceType
+from docling_wrapper.services import result_cache
+from docling_wrapper.services.result_cache import ResultCache
+
+URL = "https://example.com/page"
+
+
+class FakeConverter:
+    """
+    Records the conversions that reach the converter.
+    """
+
+    def __init__(self):
+        self.calls = []
+        self.skipped = False
+
+    async def __call__(self, url, headers, verify_ssl, options, deadline):
+        self.calls.append(options)
+        metadata = ConversionMetadata(
+            source_type=SourceType.HTML_URL,
+            processing_time_ms=1,
+            skipped=self.skipped,
+        )
+        return f"# Conversion {len(self.calls)}", metadata
+
+
+@pytest.fixture
+def converter(monkeypatch):
+    monkeypatch.setattr(result_cache, "result_cache", ResultCache(ttl_seconds=60))
+    fake = FakeConverter()
+    monkeypatch.setattr(result_cache, "convert_html_url_to_markdown", fake)
+    return fake
+
+
+def convert(options=None):
+    return asyncio.run(result_cache.convert_html_url_cached(URL, options=options))
+
+
+def test_cache_is_off_by_default():
+    assert not ResultCache().enabled
+
+
+def test_repeated_requests_are_served_from_the_cache(converter):
+    first_markdown, first_metadata = convert()
+    markdown, metadata = convert()
+
+    assert len(converter.calls) == 1
+    assert markdown == first_markdown
+    assert metadata.cached and not first_metadata.cached
+
+
+@pytest.mark.parametrize(
+    "options",
+    [ConversionOptions(use_cache=False), ConversionOptions(profile=True)],
+)
+def test_bypassing_requests_do_not_write_the_cache(converter, options):
+    convert(options)
+    markdown, _ = convert()
+
+    assert len(converter.calls) == 2
+    assert markdown == "# Conversion 2"
+    assert len(result_cache.result_cache) == 1
+
+
+def test_bypassing_requests_do_not_read_the_cache(converter):
+    convert()
+    markdown, metadata = convert(ConversionOptions(use_cache=False))
+
+    assert markdown == "# Conversion 2"
+    assert not metadata.cached
+
+
+def test_skipped_near_duplicates_are_not_cached(converter):
+    converter.skipped = True
+    options = ConversionOptions(skip_near_duplicates=True)
+
+    convert(options)
+    convert(options)
+
+    assert len(converter.calls) == 2
+    assert len(result_cache.result_cache) == 0
@@ -0,0 +1,117 @@
+"""
+Tests for section-level diffs between conversions of the same URL.
+"""
+
+from fastapi.testclient import TestClient
+
+import docling_wrapper.api.routes as routes
+from docling_wrapper.api.models import ConversionMetadata, SourceType
+from docling_wrapper.services.section_index import (
+    SectionIndex,
+    document_key,
+    section_index,
+)
+from main import app
+
+client = TestClient(app)
+
+VERSION_1 = "# Intro\n\nHello\n\n# Usage\n\nRun it\n\n# Old\n\nGone soon\n"
+VERSION_2 = "# Intro\n\nHello\n\n# Usage\n\nRun it   twice\n\n# New\n\nFresh\n"
+
+
+def test_first_diff_has_no_previous_version():
+    index = SectionIndex()
+
+    section_diff, modified = index.diff("doc", VERSION_1)
+
+    assert not section_diff.previous_version
+    assert [change.heading_path for change in section_diff.added] == [
+        ["Intro"],
+        ["Usage"],
+        ["Old"],
+    ]
+    assert len(modified) == 3
+
+
+def test_diff_reports_added_changed_and_removed_sections():
+    index = SectionIndex()
+    index.diff("doc", VERSION_1)
+
+    section_diff, modified = index.diff("doc", VERSION_2)
+
+    assert section_diff.previous_version
+    assert [change.heading_path for change in section_diff.added] == [["New"]]
+    assert [change.heading_path for change in section_diff.changed] == [["Usage"]]
+    assert [change.heading_path for change in section_diff.removed] == [["Old"]]
+    assert section_diff.removed[0].start_byte is None
+    assert section_diff.unchanged_count == 1
+    assert [section.heading_path for section in modified] == [["Usage"], ["New"]]
+
+
+def test_whitespace_changes_are_not_changes():
+    index = SectionIndex()
+    index.diff("doc", "# A\n\nsome text\n")
+
+    section_diff, _ = index.diff("doc", "# A\n\nsome   text\n\n")
+
+    assert section_diff.unchanged_count == 1
+    assert not section_diff.changed
+
+
+def test_index_evicts_least_recently_used_documents():
+    index = SectionIndex(max_documents=1)
+    index.diff("a", VERSION_1)
+    index.diff("b", VERSION_1)
+
+    section_diff, _ = index.diff("a", VERSION_1)
+
+    assert not section_diff.previous_version
+
+
+def test_document_key_separates_request_headers():
+    url = "https://Example.com/page"
+
+    assert document_key(url) == "https://example.com/page"
+    assert document_key(url, {"Authorization": "a"}) != document_key(url)
+    assert document_key(url, {"Authorization": "a"}) != document_key(
+        url, {"Authorization": "b"}
+    )
+
+
+def test_conversions_without_diff_record_the_baseline(monkeypatch):
+    pages = iter([VERSION_1, VERSION_2])
+
+    async def convert(url, headers, verify_ssl, options, deadline):
+        metadata = ConversionMetadata(
+            source_type=SourceType.HTML_URL, processing_time_ms=1
+        )
+        return next(pages), metadata
+
+    monkeypatch.setattr(routes, "convert_html_url_cached", convert)
+    url = "https://example.com/section-diff-baseline"
+    section_index.forget(document_key(url))
+
+    first = client.post("/api/v1/convert", json={"type": "html_url", "source": url})
+    second = client.post(
+        "/api/v1/convert",
+        json={"type": "html_url", "source": url, "options": {"diff_sections": True}},
+    )
+
+    assert first.status_code == 200
+    assert first.json()["section_diff"] is None
+    section_diff = second.json()["section_diff"]
+    assert section_diff["previous_version"]
+    assert section_diff["unchanged_count"] == 1
+
+
+def test_diff_for_html_source_is_rejected_before_conversion():
+    response = client.post(
+        "/api/v1/convert",
+        json={
+            "type": "html_source",
+            "source": "<p>text</p>",
+            "options": {"diff_sections": True},
+        },
+    )
+
+    assert response.status_code == 422
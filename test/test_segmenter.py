@@ -0,0 +1,67 @@
+"""
+Tests for splitting large documents and stitching the converted segments.
+"""
+
+import pytest
+
+from docling_wrapper.services import segmenter
+from docling_wrapper.utils.metrics import metrics
+from docling_wrapper.utils.mock_docling import convert_html_to_markdown
+
+SECTIONS = [
+    f"<section><h2>Part {index}</h2><p>Text {index}.</p></section>"
+    for index in range(6)
+]
+HTML = f"<html><head><title>Doc</title></head><body><div>{''.join(SECTIONS)}</div></body></html>"
+
+
+@pytest.fixture
+def working_pool(monkeypatch):
+    monkeypatch.setattr(segmenter, "SEGMENT_PROCESSES", 2)
+    monkeypatch.setattr(segmenter, "_pool_failed", False)
+    yield
+    segmenter.shutdown_segment_pool()
+
+
+def failure_count():
+    return metrics.snapshot()["counters"].get("segment_pool_failures_total", 0)
+
+
+def test_split_keeps_containers_balanced():
+    segments = segmenter.split_html(HTML, target_size=100)
+
+    assert len(segments) > 1
+    assert segments[0].startswith("<html><head><title>Doc</title></head><body><div>")
+    for segment in segments:
+        assert segment.count("<div>") == segment.count("</div>") == 1
+        assert segment.count("<section>") == segment.count("</section>")
+
+
+def test_segments_are_stitched_in_order(working_pool):
+    segments = segmenter.split_html(HTML, target_size=100)
+
+    markdown = segmenter.convert_segments(
+        convert_html_to_markdown, segments, {"title": "Doc"}, {}
+    )
+
+    # Same words in the same order as converting the whole document
+    assert markdown.split() == convert_html_to_markdown(HTML, title="Doc").split()
+
+
+def test_pool_startup_failure_converts_in_process_and_disables_splitting(
+    working_pool, monkeypatch
+):
+    def fail_to_start():
+        raise RuntimeError("cannot spawn")
+
+    monkeypatch.setattr(segmenter, "_get_pool", fail_to_start)
+    segments = segmenter.split_html(HTML, target_size=100)
+    failures = failure_count()
+
+    markdown = segmenter.convert_segments(
+        convert_html_to_markdown, segments, {"title": "Doc"}, {}
+    )
+
+    assert "Part 5" in markdown
+    assert failure_count() == failures + 1
+    assert not segmenter.segmentation_enabled()
@@ -0,0 +1,55 @@
+"""
+Tests for the newline-delimited JSON conversion endpoint.
+"""
+
+import json
+
+from fastapi.testclient import TestClient
+
+from main import app
+
+client = TestClient(app)
+
+HTML = "<html><head><title>T</title></head><body><h1>A</h1><p>Text</p></body></html>"
+
+
+def _events(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_stream_sends_metadata_chunks_and_done():
+    response = client.post(
+        "/api/v1/convert/stream",
+        json={
+            "type": "html_source",
+            "source": HTML,
+            "options": {"include_metadata": True},
+        },
+    )
+
+    assert response.status_code == 200
+    events = _events(response)
+    chunks = [event["data"] for event in events if event["event"] == "chunk"]
+    assert events[0]["event"] == "metadata"
+    assert events[0]["data"]["title"] == "T"
+    assert chunks and any("Text" in chunk["text"] for chunk in chunks)
+    assert events[-1] == {
+        "event": "done",
+        "data": {"chunk_count": len(chunks), "skipped": False},
+    }
+
+
+def test_stream_honours_include_metadata():
+    response = client.post(
+        "/api/v1/convert/stream",
+        json={
+            "type": "html_source",
+            "source": HTML,
+            "options": {"include_metadata": False},
+        },
+    )
+
+    assert response.status_code == 200
+    events = [event["event"] for event in _events(response)]
+    assert "metadata" not in events
+    assert events[-1] == "done"